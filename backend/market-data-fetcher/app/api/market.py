@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from flask import current_app
 from app.components.security import get_quotes
 from app.components.application import application
@@ -6,45 +7,100 @@ from app.components.application import application
 def quote(securities: list[str]):
     try:
         current_app.logger.info(f"Subscribe for {securities} security quotes")
-        cached_securities = application.get_securities()
-        result = []
+        # Add the symbols to the registry of symbols for quote updates
+        application.get_subscriptions().subscribe(securities)
+        cached_securities = application.get_securities().get_many(securities)
         for security in securities:
-            # Add a symbol to the cache of symbols for quote updates
-            symbols = application.get_symbols()
-            symbols.add_item(security)
-
-            if cached_securities.has_security(security):
-                result.append(cached_securities.get_security(security))
-            else:
+            if security not in cached_securities:
                 current_app.logger.info(
                     f"Security '{security}' hasn't been found in the cache"
                 )
 
         # Return cached quotes to the client
-        return get_quotes(result), 200
+        return get_quotes(cached_securities.values()), 200
+    except Exception as error:
+        return {"message": str(error)}, 500
+
+
+def quotes(symbols: list[str]):
+    try:
+        current_app.logger.info(f"Get {symbols} security quotes")
+        # Unlike a subscription, a lookup leaves the registry unchanged
+        cached_securities = application.get_securities().get_many(symbols)
+        return get_quotes(cached_securities.values()), 200
+    except Exception as error:
+        return {"message": str(error)}, 500
+
+
+def history(symbol: str, since: str = None):
+    try:
+        current_app.logger.info(f"Get {symbol} ticks since {since}")
+        since_time = None
+        if since is not None:
+            try:
+                since_datetime = datetime.fromisoformat(since)
+            except ValueError:
+                return {"message": f"Invalid date and time '{since}'"}, 400
+            if since_datetime.tzinfo is None:
+                since_datetime = since_datetime.replace(tzinfo=timezone.utc)
+            since_time = since_datetime.timestamp()
+        ticks = application.get_tick_history().get_ticks(symbol, since_time)
+        if ticks is None:
+            return {"message": f"Ticks of '{symbol}' aren't recorded"}, 404
+        times, prices, volumes = ticks
+        return {
+            "symbol": symbol,
+            "times": times.tolist(),
+            "prices": prices.tolist(),
+            "volumes": volumes.tolist(),
+        }, 200
+    except Exception as error:
+        return {"message": str(error)}, 500
+
+
+def bars(symbol: str, interval: str):
+    try:
+        current_app.logger.info(f"Get {symbol} {interval} bars")
+        bars = application.get_bar_aggregator().get_bars(symbol, interval)
+        if bars is None:
+            return {"message": f"Bars of '{symbol}' aren't aggregated"}, 404
+        return {"symbol": symbol, "interval": interval, "bars": bars}, 200
     except Exception as error:
         return {"message": str(error)}, 500
 
 
-def fx(currencies: list[str]):
+def unsubscribe(securities: list[str]):
     try:
-        current_app.logger.info(f"Get {currencies} exchange rates")
-        exchange_rates = []
-        for rate in application.get_exchange_rates().get_all_items():
-            from_currency = rate.get_from_currency()
-            to_currency = rate.get_to_currency()
-            if from_currency != "USD":
-                continue
-            if to_currency not in currencies:
-                continue
-            exchange_rates.append(
-                {
-                    "from": from_currency,
-                    "to": to_currency,
-                    "rate": rate.midpoint_rate(),
-                }
+        current_app.logger.info(f"Unsubscribe from {securities} security quotes")
+        application.get_subscriptions().unsubscribe(securities)
+        return {"message": "Successfully unsubscribed from security quotes"}, 200
+    except Exception as error:
+        return {"message": str(error)}, 500
+
+
+def heartbeat(securities: list[str]):
+    try:
+        added_count = application.get_subscriptions().renew(securities)
+        if added_count:
+            current_app.logger.info(
+                f"{added_count} of {len(securities)} renewed symbols "
+                "haven't been subscribed for quotes"
             )
-        return exchange_rates, 200
+        return {"message": "Successfully renewed security quote subscriptions"}, 200
+    except Exception as error:
+        return {"message": str(error)}, 500
+
+
+def fx(currencies: list[str], base: str = "USD"):
+    try:
+        current_app.logger.info(f"Get {currencies} exchange rates from {base}")
+        rates = application.get_exchange_rates().get_rates(base, currencies)
+        if rates is None:
+            return {"message": f"Exchange rates of '{base}' aren't known"}, 404
+        return [
+            {"from": base, "to": currency, "rate": rate}
+            for currency, rate in rates.items()
+        ], 200
     except Exception as error:
         return {"message": str(error)}, 500
 
@@ -1,15 +1,28 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from app.components.bar_aggregator import BarAggregator
+from app.components.market_calendar import MarketCalendar, US_EXCHANGES
 from app.components.market_data_api import MarketDataApi
 from app.components.market_data_publisher import MarketDataPublisher
-from app.components.cache import ThreadSafeCache
+from app.components.exchange_rate_table import ExchangeRateTable
+from app.components.leader_election import LeaderElection
 from app.components.security_cache import SecurityCache
-from datetime import datetime, time
+from app.components.security_snapshot import SecuritySnapshot
+from app.components.shared_state import SharedState
+from app.components.subscription_registry import SubscriptionRegistry
+from app.components.quote_polling_trigger import QuotePollingTrigger
+from app.components.tick_history import TickHistory
+from datetime import datetime
 from logging import Logger
 
 
 class Application:
     """
     The main application class.
+
+    Instances of the service elect a leader, which alone requests quotes,
+    exchange rates and securities from the market data API and publishes
+    quotes. It shares them in Redis, and followers load them from there,
+    so that every instance serves the same data without extra API requests.
     """
 
     def __init__(self):
@@ -20,9 +33,18 @@ class Application:
         self._market_data_api = MarketDataApi()
         self._market_data_publisher = MarketDataPublisher()
         self._securities = SecurityCache()
-        self._symbols = ThreadSafeCache()
-        self._exchange_rates = ThreadSafeCache()
-        self._requires_update_after_market_close = True
+        self._securities_snapshot = SecuritySnapshot()
+        self._subscriptions = SubscriptionRegistry()
+        self._tick_history = TickHistory()
+        self._bar_aggregator = BarAggregator()
+        self._exchange_rates = ExchangeRateTable()
+        self._market_calendar = MarketCalendar()
+        self._leader_election = LeaderElection()
+        self._shared_state = SharedState()
+        # Update times of the shared state loaded by a follower
+        self._quotes_time = 0.0
+        self._exchange_rates_time = 0.0
+        self._securities_time = 0.0
         self._logger = Logger("MarketDataFetcher")
 
     def init_app(self, app):
@@ -32,15 +54,65 @@ class Application:
         self._app = app
         self._market_data_api.init_app(app)
         self._market_data_publisher.init_app(app)
-        self.__update_securities()
+        self._subscriptions.init_app(app)
+        self._securities_snapshot.init_app(app)
+        self._tick_history.init_app(app)
+        self._bar_aggregator.init_app(app)
+        self._leader_election.init_app(app)
+        self._shared_state.init_app(app)
+        self.__campaign()
+
+        # Start with the securities of the snapshot at once if there is one
+        snapshot_securities = self._securities_snapshot.load()
+        if snapshot_securities:
+            self._securities.replace_securities(snapshot_securities)
+        else:
+            self.__update_securities()
         self.__update_exchange_rates()
+        # Followers start with the state of the leader
+        self.__load_shared_state()
+
+        # Renew the lease of the leader or take it over
+        self._scheduler.add_job(
+            func=self.__campaign,
+            id="campaign",
+            trigger="interval",
+            seconds=app.config.get("LEADER_LEASE_RENEW_INTERVAL_SEC"),
+        )
 
-        # Publish quotes
+        # Load the state of the leader
+        self._scheduler.add_job(
+            func=self.__load_shared_state,
+            id="load-shared-state",
+            trigger="interval",
+            seconds=app.config.get("SHARED_STATE_LOAD_INTERVAL_SEC"),
+        )
+
+        # Publish quotes while the market is open
         self._scheduler.add_job(
             func=self.__publish_quotes,
             id="publish-quotes",
-            trigger="interval",
-            seconds=app.config.get("QUOTE_PUBLISHING_INTERVAL_SEC"),
+            trigger=QuotePollingTrigger(
+                self._market_calendar,
+                interval=app.config.get("QUOTE_PUBLISHING_INTERVAL_SEC"),
+                edge_interval=app.config.get("QUOTE_PUBLISHING_EDGE_INTERVAL_SEC"),
+                edge_window=app.config.get("QUOTE_PUBLISHING_EDGE_WINDOW_SEC"),
+                jitter=app.config.get("QUOTE_PUBLISHING_JITTER"),
+            ),
+        )
+
+        # Update the list of tradable securities once a day. Prices of
+        # the subscribed securities are updated with the quotes in between
+        update_hour, update_minute = app.config.get("SECURITIES_UPDATE_TIME_UTC").split(
+            ":"
+        )
+        self._scheduler.add_job(
+            func=self.__update_securities,
+            id="update-securities",
+            trigger="cron",
+            hour=int(update_hour),
+            minute=int(update_minute),
+            timezone="UTC",
         )
 
         # Update exchange rates
@@ -50,6 +122,12 @@ class Application:
             trigger="interval",
             seconds=app.config.get("CURRENCY_EXCHANGE_RATE_UPDATE_INTERVAL_SEC"),
         )
+
+        # Update the securities loaded from the snapshot in the background
+        if snapshot_securities:
+            self._scheduler.add_job(
+                func=self.__update_securities, id="update-snapshot-securities"
+            )
         self._scheduler.start()
 
     def __del__(self):
@@ -57,8 +135,11 @@ class Application:
         Destructs the application instance.
         """
         try:
-            if self._scheduler.running():
+            if self._scheduler.running:
                 self._scheduler.shutdown()
+            # Another instance takes over at once instead of after the lease
+            if self._leader_election.is_leader():
+                self._leader_election.release()
         except Exception as error:
             self._logger.error(f"Unable to shut down the scheduler. {error}")
 
@@ -86,75 +167,175 @@ class Application:
         """
         return self._securities
 
-    def get_symbols(self):
+    def get_subscriptions(self):
+        """
+        Gets the registry of the symbols subscribed for quotes.
+        """
+        return self._subscriptions
+
+    def get_tick_history(self):
+        """
+        Gets the intraday ticks of the subscribed symbols.
+        """
+        return self._tick_history
+
+    def get_bar_aggregator(self):
+        """
+        Gets the aggregator of the bars of the subscribed symbols.
+        """
+        return self._bar_aggregator
+
+    def get_market_calendar(self):
+        """
+        Gets the calendar of the market sessions.
+        """
+        return self._market_calendar
+
+    def get_leader_election(self):
         """
-        Gets the cache of the symbols for quotes.
+        Gets the leader election of the instance.
         """
-        return self._symbols
+        return self._leader_election
 
     def get_exchange_rates(self):
         """
-        Gets the cache of the currency exchange rates.
+        Gets the table of the currency exchange rates.
         """
         return self._exchange_rates
 
+    def __campaign(self):
+        try:
+            was_leader = self._leader_election.is_leader()
+            if self._leader_election.campaign() and not was_leader:
+                # Another leader may have published quotes since the last message
+                self._market_data_publisher.reset()
+        except Exception as error:
+            # The lease expires unless it's renewed in time
+            self._app.logger.error(f"Unable to renew the leader lease. {error}.")
+
+    def __is_still_leader(self, state: str) -> bool:
+        if self._leader_election.is_leader():
+            return True
+        self._app.logger.info(
+            f"The leader lease has expired, the {state} won't be shared."
+        )
+        return False
+
+    def __load_shared_state(self):
+        if self._leader_election.is_leader():
+            return
+        try:
+            quotes_state = self._shared_state.load_quotes(self._quotes_time)
+            if quotes_state is not None:
+                # The ticks and bars are made of the same quotes as by the leader
+                self._quotes_time, quotes = quotes_state
+                symbols = self._subscriptions.get_symbols()
+                self._tick_history.retain(symbols)
+                self._bar_aggregator.retain(symbols)
+                self._tick_history.record(quotes, self._quotes_time)
+                self._bar_aggregator.update(quotes, self._quotes_time)
+                self._securities.update_prices(quotes)
+
+            exchange_rates_state = self._shared_state.load_exchange_rates(
+                self._exchange_rates_time
+            )
+            if exchange_rates_state is not None:
+                self._exchange_rates_time, exchange_rates = exchange_rates_state
+                self._exchange_rates.replace_rates(exchange_rates)
+
+            securities_state = self._shared_state.load_securities(self._securities_time)
+            if securities_state is not None:
+                self._securities_time, securities = securities_state
+                updated_security_count = self._securities.replace_securities(securities)
+                self._app.logger.info(
+                    f"Stats: loaded {updated_security_count} securities of the leader."
+                )
+                self.__save_snapshot()
+        except Exception as error:
+            self._app.logger.error(f"Unable to load the shared state. {error}.")
+
     def __update_securities(self):
-        # Currently support only US stock exchanges
-        SUPPORTED_EXCHANGES = ("NYSE", "NASDAQ", "BATS", "CBOE", "AMEX")
-        updated_security_count = 0
+        if not self._leader_election.is_leader():
+            return
         try:
-            for security in self._market_data_api.get_tradable_securities_list():
-                if not all(value is not None for value in security.to_dict().values()):
-                    continue
-                if security.get_exchange() not in SUPPORTED_EXCHANGES:
-                    continue
-                self._securities.update_security(security.get_symbol(), security)
-                updated_security_count += 1
+            # The cache keeps the previous securities until the list is complete
+            updated_security_count = self._securities.replace_securities(
+                self._market_data_api.iter_tradable_securities(US_EXCHANGES)
+            )
             self._app.logger.info(
                 f"Stats: updated {updated_security_count} securities."
             )
         except Exception as error:
             self._app.logger.error(f"Unable to update the security cache. {error}.")
+            return
+
+        try:
+            self._shared_state.save_securities(self._securities.get_all_securities())
+        except Exception as error:
+            self._app.logger.error(f"Unable to share the securities. {error}.")
+        self.__save_snapshot()
+
+    def __save_snapshot(self):
+        try:
+            self._securities_snapshot.save(self._securities.get_all_securities())
+        except Exception as error:
+            self._app.logger.error(f"Unable to save the securities snapshot. {error}.")
 
     def __publish_quotes(self):
+        if not self._leader_election.is_leader():
+            return
         try:
+            # Stop publishing quotes nobody has renewed the interest in
+            evicted_count = self._subscriptions.evict_expired()
+            if evicted_count:
+                self._app.logger.info(
+                    f"Stats: evicted {evicted_count} expired quote subscriptions."
+                )
+
             # Check if there are any requested quotes
-            symbols = self._symbols.get_all_items()
+            symbols = self._subscriptions.get_symbols()
+            self._tick_history.retain(symbols)
+            self._bar_aggregator.retain(symbols)
             if not symbols:
                 self._app.logger.info("No requested quotes to publish")
                 return
 
-            # Check market hours
-            utc_now = datetime.utcnow().time()
-            # NYSE and NASDAQ market hours
-            market_open_utc = time(14, 30)
-            market_close_utc = time(21, 0)
-            if not (market_open_utc <= utc_now <= market_close_utc):
-                # Update securities after the market has been closed
-                if self._requires_update_after_market_close:
-                    self._app.logger.info(
-                        "Update securities after the market has been closed."
-                    )
-                    self.__update_securities()
-                    self._requires_update_after_market_close = False
-                self._app.logger.info("Market is closed. Nothing to publish.")
+            # Only quotes of the subscribed known symbols are requested
+            symbols = list(self._securities.get_many(symbols))
+            quotes = self._market_data_api.get_quotes(symbols)
+            quotes_time = datetime.now().timestamp()
+            # The lease may have expired while the quotes were requested,
+            # then another instance is the leader already
+            if not self.__is_still_leader("quotes"):
+                return
+            self._shared_state.save_quotes(quotes, quotes_time)
+            self._tick_history.record(quotes, quotes_time)
+            closed_bars = self._bar_aggregator.update(quotes, quotes_time)
+            updated_quotes = self._securities.update_prices(quotes)
+            self._app.logger.info(
+                f"Stats: received {len(quotes)} quotes of {len(symbols)} symbols."
+            )
+            if not self.__is_still_leader("quotes"):
                 return
-
-            self._requires_update_after_market_close = True
-            self.__update_securities()
-            securities = self._securities.get_securities(symbols)
             with self._app.app_context():
-                self._market_data_publisher.publish_security_quotes(securities)
+                self._market_data_publisher.publish_quotes(updated_quotes)
+                if closed_bars:
+                    self._market_data_publisher.publish_bars(closed_bars)
         except Exception as error:
             self._app.logger.error(f"Unable to publish quotes. {error}.")
 
     def __update_exchange_rates(self):
+        if not self._leader_election.is_leader():
+            return
         self._app.logger.info("Update exchange rates")
         try:
-            self._exchange_rates.clear()
-            self._exchange_rates.add_items(
-                self._market_data_api.get_currency_exchange_rates()
-            )
+            exchange_rates = self._market_data_api.get_currency_exchange_rates()
+            # The previous rates are served until the new ones are replaced at once
+            currencies_count = self._exchange_rates.replace_rates(exchange_rates)
+            self._app.logger.info(f"Updated rates of {currencies_count} currencies")
+            if not self.__is_still_leader("exchange rates"):
+                return
+            self._shared_state.save_exchange_rates(exchange_rates)
         except Exception as error:
             self._app.logger.error(
                 f"Unable to update currency exchange rates. {error}."
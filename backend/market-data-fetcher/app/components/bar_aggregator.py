@@ -0,0 +1,211 @@
+from app.components.quote import Quote
+from collections import deque
+import numpy as np
+import threading
+
+# Bar intervals in seconds by names
+BAR_INTERVALS = {"1m": 60, "5m": 5 * 60, "1h": 60 * 60, "1d": 24 * 60 * 60}
+
+# Day bars include the volume of the day before the first quote of a symbol
+DAY_INTERVAL = BAR_INTERVALS["1d"]
+
+
+class IntervalBars:
+    """
+    The current bars of an interval of all symbols in arrays indexed by symbol rows.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the bars without any ticks.
+
+        :param capacity: The number of rows.
+        """
+        self.start = np.full(capacity, np.nan)
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.close = np.zeros(capacity)
+        # The cumulative volume of the day before the bar
+        self.volume_base = np.zeros(capacity)
+
+    def take(self, rows: np.ndarray, capacity: int) -> "IntervalBars":
+        """
+        Get the bars of the rows in new arrays.
+
+        :param rows: The rows to take, they become the first rows.
+        :param capacity: The number of rows of the new arrays.
+        :return: The bars of the rows.
+        """
+        bars = IntervalBars(capacity)
+        for name, values in vars(self).items():
+            getattr(bars, name)[: len(rows)] = values[rows]
+        return bars
+
+
+class BarAggregator:
+    """
+    Aggregates quotes into OHLCV bars of every interval per symbol.
+
+    The current bar of every symbol and interval is kept in arrays, so quotes
+    of all the subscribed symbols are applied at once with a few vectorized
+    operations, and a single quote is applied in constant time. Bars are aligned
+    to multiples of their interval since the epoch in UTC.
+
+    Quotes carry the cumulative volume of the day, so the volume of a bar is
+    the difference between the volume of its last quote and the volume before it.
+    """
+
+    def __init__(self):
+        """
+        Initialize the aggregator without symbols.
+        """
+        self._rows = {}
+        self._capacity = 0
+        self._volumes = np.zeros(0)
+        self._bars = {name: IntervalBars(0) for name in BAR_INTERVALS}
+        self._closed_bars = {name: {} for name in BAR_INTERVALS}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Initialize the aggregator from the flask app instance.
+
+        :param app: The Flask app instance
+        """
+        self._history_capacity = app.config.get("BAR_HISTORY_CAPACITY")
+
+    def update(self, quotes: list[Quote], time: float) -> dict[str, list[dict]]:
+        """
+        Apply the quotes to the bars of their symbols.
+
+        :param quotes: The latest quotes.
+        :param time: The time of the quotes in seconds since the epoch.
+        :return: The bars closed by the quotes by interval names.
+        """
+        # A symbol can't be updated twice by a single vectorized assignment
+        quotes = {quote.get_symbol(): quote for quote in quotes}
+        closed_bars = {}
+        with self._lock:
+            rows = np.array([self.__get_row(symbol) for symbol in quotes], dtype=int)
+            prices = np.array([quote.get_price() for quote in quotes.values()])
+            volumes = np.array(
+                [quote.get_volume() or 0 for quote in quotes.values()], dtype=float
+            )
+            last_volumes = self._volumes[rows]
+            # The volume of a new day starts from zero
+            volume_bases = np.where(volumes < last_volumes, 0, last_volumes)
+
+            for name, seconds in BAR_INTERVALS.items():
+                bars = self._bars[name]
+                start = time // seconds * seconds
+                is_new = bars.start[rows] != start
+                is_first = np.isnan(bars.start[rows])
+                is_closed = is_new & ~is_first
+                if is_closed.any():
+                    closed_bars[name] = self.__close_bars(name, rows[is_closed])
+                # The volume traded before the first quote of a symbol is unknown
+                bases = volume_bases
+                if seconds < DAY_INTERVAL:
+                    bases = np.where(is_first, volumes, volume_bases)
+
+                new_rows = rows[is_new]
+                bars.start[new_rows] = start
+                bars.open[new_rows] = prices[is_new]
+                bars.high[new_rows] = prices[is_new]
+                bars.low[new_rows] = prices[is_new]
+                bars.volume_base[new_rows] = bases[is_new]
+
+                current_rows = rows[~is_new]
+                bars.high[current_rows] = np.maximum(
+                    bars.high[current_rows], prices[~is_new]
+                )
+                bars.low[current_rows] = np.minimum(
+                    bars.low[current_rows], prices[~is_new]
+                )
+                bars.close[rows] = prices
+            self._volumes[rows] = volumes
+        return closed_bars
+
+    def retain(self, symbols: list[str]) -> int:
+        """
+        Remove the bars of all symbols except the given ones.
+
+        :param symbols: The symbols to keep the bars of.
+        :return: The number of removed symbols.
+        """
+        symbols = set(symbols)
+        with self._lock:
+            removed_symbols = [symbol for symbol in self._rows if symbol not in symbols]
+            if not removed_symbols:
+                return 0
+            kept_symbols = [symbol for symbol in self._rows if symbol in symbols]
+            kept_rows = np.array([self._rows[symbol] for symbol in kept_symbols], int)
+            self.__resize(kept_rows, max(len(kept_rows), 1))
+            self._rows = {symbol: row for row, symbol in enumerate(kept_symbols)}
+            for closed_bars in self._closed_bars.values():
+                for symbol in removed_symbols:
+                    closed_bars.pop(symbol, None)
+        return len(removed_symbols)
+
+    def get_bars(self, symbol: str, interval: str) -> list[dict] | None:
+        """
+        Get the bars of the symbol.
+
+        :param symbol: The symbol.
+        :param interval: The interval name.
+        :return: The closed bars followed by the current one in time order
+            or None if there are no bars of the symbol.
+        """
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None:
+                return None
+            bars = list(self._closed_bars[interval].get(symbol, ()))
+            bar = self.__make_bar(interval, row)
+            bar["closed"] = False
+            bars.append(bar)
+            return bars
+
+    def __get_row(self, symbol: str) -> int:
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self._rows)
+            if row == self._capacity:
+                self.__resize(np.arange(row), max(2 * self._capacity, 64))
+            self._rows[symbol] = row
+        return row
+
+    def __resize(self, rows: np.ndarray, capacity: int):
+        volumes = np.zeros(capacity)
+        volumes[: len(rows)] = self._volumes[rows]
+        self._volumes = volumes
+        self._bars = {
+            name: bars.take(rows, capacity) for name, bars in self._bars.items()
+        }
+        self._capacity = capacity
+
+    def __make_bar(self, interval: str, row: int) -> dict:
+        bars = self._bars[interval]
+        return {
+            "start": bars.start[row].item(),
+            "open": bars.open[row].item(),
+            "high": bars.high[row].item(),
+            "low": bars.low[row].item(),
+            "close": bars.close[row].item(),
+            "volume": (self._volumes[row] - bars.volume_base[row]).item(),
+        }
+
+    def __close_bars(self, interval: str, rows: np.ndarray) -> list[dict]:
+        # Only some bars are closed by a tick, so they are converted one by one
+        symbols = list(self._rows)
+        closed_bars = []
+        for row in rows.tolist():
+            bar = self.__make_bar(interval, row)
+            bar["closed"] = True
+            symbol = symbols[row]
+            self._closed_bars[interval].setdefault(
+                symbol, deque(maxlen=self._history_capacity)
+            ).append(bar)
+            closed_bars.append({"symbol": symbol, **bar})
+        return closed_bars
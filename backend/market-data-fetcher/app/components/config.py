@@ -16,12 +16,80 @@ class Config(object):
     # Financial Modeling Prep API URL
     FINANCIAL_MODELING_PREP_API_BASE_URL = "https://financialmodelingprep.com/api/v3"
 
+    # Timeouts of requests to Financial Modeling Prep API in seconds. The list
+    # of tradable securities takes the longest to download
+    FINANCIAL_MODELING_PREP_API_CONNECT_TIMEOUT_SEC = 5
+    FINANCIAL_MODELING_PREP_API_READ_TIMEOUT_SEC = 60
+
+    # Max number of symbols requested by a single quote request
+    QUOTE_BATCH_SIZE = 100
+
     # Redis URL
     REDIS_URL = os.getenv("REDIS_URL")
 
-    # Quotes publishing interval in seconds
+    # Quotes publishing interval in seconds while the market is open. Quotes
+    # aren't published while the market is closed
     QUOTE_PUBLISHING_INTERVAL_SEC = 120
 
+    # Quotes publishing interval in seconds within the window after the open
+    # and the window before the close
+    QUOTE_PUBLISHING_EDGE_INTERVAL_SEC = 30
+    QUOTE_PUBLISHING_EDGE_WINDOW_SEC = 15 * 60
+
+    # Max random deviation of a publishing interval as a fraction of it,
+    # so that replicas don't request quotes at once
+    QUOTE_PUBLISHING_JITTER = 0.1
+
+    # Quotes of a symbol are published until its subscriptions are cancelled
+    # or haven't been renewed by a heartbeat for this many seconds
+    QUOTE_SUBSCRIPTION_TTL_SEC = 5 * 60
+
+    # Interval in seconds between snapshots of all the published quotes
+    QUOTE_SNAPSHOT_INTERVAL_SEC = 10 * 60
+
+    # Transport of the quote messages, the same as in the portfolio-manager:
+    # "pubsub" publishes them to channels, "streams" appends them to Redis
+    # streams named as the channels, which consumers can read from any point
+    QUOTE_TRANSPORT = os.getenv("QUOTE_TRANSPORT", "pubsub")
+
+    # Approximate max number of messages kept in a quote stream
+    QUOTE_STREAM_MAXLEN = 1000
+
+    # Min size in bytes of the payload of a quotes message to compress. zlib
+    # halves large snapshots but makes decoding several times slower, so small
+    # messages are sent as they are
+    QUOTE_MESSAGE_COMPRESSION_THRESHOLD = 16 * 1024
+
+    # Number of channels the quotes are sharded between by symbols, the same
+    # as in the portfolio-manager. All the quotes are published to
+    # the market-data-channel if 0
+    QUOTE_CHANNEL_SHARDS = int(os.getenv("QUOTE_CHANNEL_SHARDS", 64))
+
+    # Max number of intraday ticks kept per subscribed symbol, a tick takes 24 bytes
+    TICK_HISTORY_CAPACITY = 4096
+
+    # Max number of symbols intraday ticks are kept for
+    TICK_HISTORY_MAX_SYMBOLS = 5000
+
+    # Max number of closed bars kept per symbol and interval
+    BAR_HISTORY_CAPACITY = 500
+
+    # Time of the day in UTC the list of tradable securities is updated at,
+    # after NYSE and NASDAQ have been closed
+    SECURITIES_UPDATE_TIME_UTC = "21:15"
+
+    # Path of the snapshot of the securities, the service starts with them
+    # and updates them in the background. It's in the instance folder if not set
+    SECURITIES_SNAPSHOT_PATH = os.getenv("SECURITIES_SNAPSHOT_PATH")
+
+    # The leader of the instances requests the market data, its lease expires
+    # unless it's renewed in time, then another instance takes over
+    LEADER_LEASE_SEC = 15
+    LEADER_LEASE_RENEW_INTERVAL_SEC = 5
+
+    # How often followers load the market data shared by the leader
+    SHARED_STATE_LOAD_INTERVAL_SEC = 10
+
     # Currency exchange rate update interval in seconds
     CURRENCY_EXCHANGE_RATE_UPDATE_INTERVAL_SEC = 24 * 60 * 60
 
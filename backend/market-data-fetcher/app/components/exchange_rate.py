@@ -20,7 +20,7 @@ class ExchangeRate:
 
         :return: The midpoint rate.
         """
-        return round((self._bid + self._ask) / 2, 2)
+        return (self._bid + self._ask) / 2
 
     def get_from_currency(self):
         """
@@ -37,3 +37,19 @@ class ExchangeRate:
         :return: The 'to' currency.
         """
         return self._to_currency
+
+    def get_ask(self):
+        """
+        Gets the ask price.
+
+        :return: The ask price.
+        """
+        return self._ask
+
+    def get_bid(self):
+        """
+        Gets the bid price.
+
+        :return: The bid price.
+        """
+        return self._bid
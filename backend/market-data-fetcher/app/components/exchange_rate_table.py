@@ -0,0 +1,107 @@
+from app.components.exchange_rate import ExchangeRate
+import math
+import numpy as np
+
+
+class ExchangeRateTable:
+    """
+    The table of exchange rates between all pairs of known currencies.
+
+    Rates are kept in a dense matrix indexed by currency codes, where the row
+    is the 'from' currency and the column is the 'to' currency. Pairs without
+    a quoted rate get the inverse of the opposite rate or a cross rate through
+    other currencies, so any pair is looked up in constant time.
+
+    The currency index and the matrix are replaced together on update and are
+    never modified, so they are read without a lock.
+    """
+
+    def __init__(self):
+        """
+        Initialize the empty exchange rate table.
+        """
+        self._table = ({}, np.ones((0, 0)))
+
+    def replace_rates(self, exchange_rates: list[ExchangeRate]) -> int:
+        """
+        Replaces the table with the exchange rates and their cross rates.
+
+        :param exchange_rates: The quoted exchange rates.
+        :return: The number of currencies.
+        """
+        currencies = {}
+        for rate in exchange_rates:
+            for currency in (rate.get_from_currency(), rate.get_to_currency()):
+                currencies.setdefault(currency, len(currencies))
+
+        rates = np.full((len(currencies), len(currencies)), np.nan)
+        for rate in exchange_rates:
+            midpoint_rate = rate.midpoint_rate()
+            if not midpoint_rate > 0:
+                continue
+            from_index = currencies[rate.get_from_currency()]
+            to_index = currencies[rate.get_to_currency()]
+            rates[from_index, to_index] = midpoint_rate
+        np.fill_diagonal(rates, 1.0)
+        # Quoted rates take precedence over the inverse rates
+        rates = np.where(np.isnan(rates), 1 / rates.T, rates)
+        # Pairs which are still missing are triangulated through every currency
+        # in turn, so a cross rate can go through several currencies
+        for index in range(len(currencies)):
+            rates = np.where(
+                np.isnan(rates), np.outer(rates[:, index], rates[index, :]), rates
+            )
+
+        self._table = (currencies, rates)
+        return len(currencies)
+
+    def get_rate(self, from_currency: str, to_currency: str) -> float | None:
+        """
+        Gets the exchange rate of the pair.
+
+        :param from_currency: The 'from' currency.
+        :param to_currency: The 'to' currency.
+        :return: The rate or None if it is unknown.
+        """
+        currencies, rates = self._table
+        from_index = currencies.get(from_currency)
+        to_index = currencies.get(to_currency)
+        if from_index is None or to_index is None:
+            return None
+        rate = rates[from_index, to_index]
+        return None if np.isnan(rate) else rate.item()
+
+    def get_rates(self, from_currency: str, to_currencies: list[str]) -> dict | None:
+        """
+        Gets the exchange rates from the currency to several currencies at once.
+
+        :param from_currency: The 'from' currency.
+        :param to_currencies: The 'to' currencies.
+        :return: The known rates by the 'to' currencies
+            or None if the 'from' currency is unknown.
+        """
+        currencies, rates = self._table
+        from_index = currencies.get(from_currency)
+        if from_index is None:
+            return None
+        to_currencies = [
+            currency
+            for currency in dict.fromkeys(to_currencies)
+            if currency in currencies
+        ]
+        to_rates = rates[
+            from_index, [currencies[currency] for currency in to_currencies]
+        ]
+        return {
+            currency: rate
+            for currency, rate in zip(to_currencies, to_rates.tolist())
+            if not math.isnan(rate)
+        }
+
+    def get_currencies(self) -> list[str]:
+        """
+        Gets the known currencies.
+
+        :return: The currency codes.
+        """
+        return list(self._table[0])
@@ -0,0 +1,100 @@
+import os
+import redis
+import socket
+import threading
+import time
+import uuid
+
+LEADER_KEY = "market-data-fetcher:leader"
+
+# The lease is renewed and released only by its holder
+RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """
+    Elects a single leader among the instances of the service.
+
+    The leader holds a lease on a Redis key, which expires unless the leader
+    renews it. Any instance acquires the lease when it's free, e.g. when
+    the leader has stopped. An instance considers itself the leader until
+    its lease expires by the local clock, counted from before the lease was
+    requested, so it stops leading before another instance can take over.
+    """
+
+    def __init__(self):
+        """
+        Initialize the leader election of the instance.
+        """
+        self._instance_id = (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self._lease_deadline = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Initialize the leader election from the flask app instance.
+
+        :param app: The Flask app instance
+        """
+        self._lease = app.config.get("LEADER_LEASE_SEC")
+        self._redis = redis.from_url(app.config.get("REDIS_URL"), decode_responses=True)
+        self._renew_script = self._redis.register_script(RENEW_SCRIPT)
+        self._release_script = self._redis.register_script(RELEASE_SCRIPT)
+        self._logger = app.logger
+
+    def campaign(self) -> bool:
+        """
+        Renew the lease of the leader or acquire it if it's free.
+
+        :return: True if the instance is the leader.
+        """
+        request_time = time.monotonic()
+        lease_ms = int(self._lease * 1000)
+        is_leader = bool(
+            self._renew_script(keys=[LEADER_KEY], args=[self._instance_id, lease_ms])
+            or self._redis.set(LEADER_KEY, self._instance_id, nx=True, px=lease_ms)
+        )
+        with self._lock:
+            was_leader = self.is_leader()
+            self._lease_deadline = request_time + self._lease if is_leader else 0.0
+        if is_leader != was_leader:
+            self._logger.info(
+                f"Instance {self._instance_id} has "
+                f"{'become' if is_leader else 'stopped being'} the leader"
+            )
+        return is_leader
+
+    def release(self):
+        """
+        Release the lease, so that another instance takes over at once.
+        """
+        with self._lock:
+            self._lease_deadline = 0.0
+        self._release_script(keys=[LEADER_KEY], args=[self._instance_id])
+
+    def is_leader(self) -> bool:
+        """
+        Checks if the instance is the leader.
+
+        :return: True if the lease of the instance hasn't expired.
+        """
+        return time.monotonic() < self._lease_deadline
+
+    def get_instance_id(self) -> str:
+        """
+        Gets the ID of the instance.
+        """
+        return self._instance_id
@@ -0,0 +1,160 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+import threading
+
+# US stock exchanges, they share the NYSE holidays and trading hours
+US_EXCHANGES = ("NYSE", "NASDAQ", "BATS", "CBOE", "AMEX")
+
+EXCHANGE_TIMEZONE = ZoneInfo("America/New_York")
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Juneteenth has been an NYSE holiday since
+JUNETEENTH_FIRST_YEAR = 2022
+
+
+def _get_nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    # The last weekday of the month if n is -1
+    if n > 0:
+        first_day = date(year, month, 1)
+        return first_day + timedelta(
+            days=(weekday - first_day.weekday()) % 7 + 7 * (n - 1)
+        )
+    last_day = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last_day - timedelta(days=(last_day.weekday() - weekday) % 7)
+
+
+def _get_easter(year: int) -> date:
+    # The anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 19 * l) // 433
+    month, day = divmod(h + l - 7 * m + 90, 25)
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def _get_observed(day: date) -> date:
+    # Holidays on Saturday are observed on Friday and on Sunday on Monday
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def get_holidays(year: int) -> set[date]:
+    """
+    Gets the full-day NYSE holidays of the year.
+
+    :param year: The year.
+    :return: The holidays.
+    """
+    holidays = {
+        _get_nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _get_nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _get_easter(year) - timedelta(days=2),  # Good Friday
+        _get_nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _get_observed(date(year, 7, 4)),  # Independence Day
+        _get_nth_weekday(year, 9, 0, 1),  # Labor Day
+        _get_nth_weekday(year, 11, 3, 4),  # Thanksgiving Day
+        _get_observed(date(year, 12, 25)),  # Christmas Day
+    }
+    # New Year's Day on Saturday isn't observed on the last day of the year before
+    new_year = _get_observed(date(year, 1, 1))
+    if new_year.year == year:
+        holidays.add(new_year)
+    if year >= JUNETEENTH_FIRST_YEAR:
+        holidays.add(_get_observed(date(year, 6, 19)))
+    return holidays
+
+
+def get_early_closes(year: int) -> set[date]:
+    """
+    Gets the NYSE days of the year which close at 1 p.m.
+
+    :param year: The year.
+    :return: The days.
+    """
+    early_closes = {_get_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}
+    # The days before Independence Day and Christmas Day unless they are holidays
+    for day in (date(year, 7, 3), date(year, 12, 24)):
+        if day.weekday() < 4:
+            early_closes.add(day)
+    return early_closes
+
+
+class MarketCalendar:
+    """
+    The trading sessions of the US stock exchanges.
+
+    The open and close times of all sessions of a few years around the current
+    one are precomputed into sorted arrays of UTC timestamps, so the session
+    of a time is found by a binary search. The table is rebuilt when the time
+    leaves the covered years or gets to the last one.
+    """
+
+    def __init__(self):
+        """
+        Initialize the calendar without sessions.
+        """
+        self._table = (0, 0, np.zeros(0), np.zeros(0))
+        self._lock = threading.Lock()
+
+    def is_open(self, timestamp: float) -> bool:
+        """
+        Checks if the market is open at the time.
+
+        :param timestamp: The time in seconds since the epoch.
+        :return: True if the time is within a session.
+        """
+        session_open, _ = self.get_session(timestamp)
+        return session_open <= timestamp
+
+    def get_session(self, timestamp: float) -> tuple[float, float]:
+        """
+        Gets the session the time is within or the next session.
+
+        :param timestamp: The time in seconds since the epoch.
+        :return: The open and close times of the session in seconds since the epoch.
+        """
+        _, _, opens, closes = self.__get_table(timestamp)
+        index = np.searchsorted(closes, timestamp, "left")
+        return opens[index].item(), closes[index].item()
+
+    def __get_table(self, timestamp: float) -> tuple:
+        year = datetime.fromtimestamp(timestamp, EXCHANGE_TIMEZONE).year
+        table = self._table
+        first_year, last_year, _, _ = table
+        # The next session of a time is at most in the next year
+        if first_year <= year < last_year:
+            return table
+        with self._lock:
+            self._table = self.__build_table(year)
+            return self._table
+
+    def __build_table(self, year: int) -> tuple:
+        first_year, last_year = year - 1, year + 1
+        opens, closes = [], []
+        day = date(first_year, 1, 1)
+        holidays = set().union(*map(get_holidays, range(first_year, last_year + 1)))
+        early_closes = set().union(
+            *map(get_early_closes, range(first_year, last_year + 1))
+        )
+        while day.year <= last_year:
+            if day.weekday() < 5 and day not in holidays:
+                close = EARLY_CLOSE if day in early_closes else SESSION_CLOSE
+                opens.append(self.__get_timestamp(day, SESSION_OPEN))
+                closes.append(self.__get_timestamp(day, close))
+            day += timedelta(days=1)
+        return first_year, last_year, np.array(opens), np.array(closes)
+
+    @staticmethod
+    def __get_timestamp(day: date, session_time: time) -> float:
+        return datetime.combine(day, session_time, EXCHANGE_TIMEZONE).timestamp()
@@ -1,8 +1,15 @@
 from app.components.errors import MarketDataFetcherError
 from app.components.security import Security
 from app.components.exchange_rate import ExchangeRate
+from app.components.quote import Quote
+from collections.abc import Iterator
+from urllib.parse import quote
+import ijson
 import requests
 
+# Fields of a tradable securities list row a security is created from
+SECURITY_FIELDS = ("symbol", "name", "price", "exchangeShortName", "type")
+
 
 # The API wrapper class over Financial Modeling Prep API
 class MarketDataApi:
@@ -24,24 +31,63 @@ class MarketDataApi:
         self._financial_modeling_prep_api_key = app.config.get(
             "FINANCIAL_MODELING_PREP_API_KEY"
         )
+        self._quote_batch_size = app.config.get("QUOTE_BATCH_SIZE")
+        self._timeout = (
+            app.config.get("FINANCIAL_MODELING_PREP_API_CONNECT_TIMEOUT_SEC"),
+            app.config.get("FINANCIAL_MODELING_PREP_API_READ_TIMEOUT_SEC"),
+        )
+        # Connections to the API are kept alive between requests
+        self._session = requests.Session()
+
+    def iter_tradable_securities(self, exchanges: tuple[str]) -> Iterator[Security]:
+        """
+        Iterates over tradable securities of the exchanges.
+
+        The list has tens of thousands of rows, so it's parsed while being
+        downloaded and only the rows of complete securities of the exchanges
+        become securities.
+
+        :param exchanges: The exchange short names.
+        :return: The iterator of the tradable securities.
+        """
+        url = self.__make_full_url("/available-traded/list")
+        params = {"apikey": self._financial_modeling_prep_api_key}
+        with self._session.get(
+            url,
+            params=params,
+            headers={"Accept-Encoding": "gzip"},
+            timeout=self._timeout,
+            stream=True,
+        ) as response:
+            if response.status_code != requests.codes.ok:
+                raise MarketDataFetcherError(response.text)
+            # The raw stream is decompressed while being read
+            response.raw.decode_content = True
+            for row in ijson.items(response.raw, "item", use_float=True):
+                if row.get("exchangeShortName") not in exchanges:
+                    continue
+                if any(row.get(field) is None for field in SECURITY_FIELDS):
+                    continue
+                yield Security(*(row[field] for field in SECURITY_FIELDS))
 
-    def get_tradable_securities_list(self) -> list[Security]:
+    def get_quotes(self, symbols: list[str]) -> list[Quote]:
         """
-        Gets all tradable securities.
+        Gets the latest quotes of the securities. Symbols are requested in
+        batches of QUOTE_BATCH_SIZE symbols per request.
 
-        :return: The list of tradable symbols.
+        :param symbols: The security symbols.
+        :return: The quotes of the found securities.
         """
-        rows = self.__send_request("/available-traded/list")
-        return [
-            Security(
-                row["symbol"],
-                row["name"],
-                row["price"],
-                row["exchangeShortName"],
-                row["type"],
-            )
-            for row in rows
-        ]
+        quotes = []
+        for i in range(0, len(symbols), self._quote_batch_size):
+            batch = symbols[i : i + self._quote_batch_size]
+            rows = self.__send_request(f"/quote/{quote(','.join(batch), safe=',')}")
+            quotes += [
+                Quote(row["symbol"], row["price"], row["volume"])
+                for row in rows
+                if row.get("price") is not None
+            ]
+        return quotes
 
     def get_currency_exchange_rates(self) -> list[ExchangeRate]:
         """
@@ -64,7 +110,7 @@ class MarketDataApi:
     def __send_request(self, endpoint: str) -> list:
         url = self.__make_full_url(endpoint)
         params = {"apikey": self._financial_modeling_prep_api_key}
-        response = requests.get(url, params=params)
+        response = self._session.get(url, params=params, timeout=self._timeout)
         if response.status_code != requests.codes.ok:
             raise MarketDataFetcherError(response.text)
         return response.json()
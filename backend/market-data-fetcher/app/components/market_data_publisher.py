@@ -1,18 +1,69 @@
 from app.components.errors import MarketDataFetcherError
-from app.components.security import Security, get_quotes
+from app.components.quote_message import encode_quotes_message
 from flask import current_app
 import redis
 import json
+import threading
+import time
+import zlib
 
 MARKET_DATA_CHANNEL = "market-data-channel"
 
+# Closed bars of an interval are published to the channel with the interval name
+BARS_CHANNEL = "bars:{interval}"
+
+# Message types
+QUOTES_DELTA = "delta"
+QUOTES_SNAPSHOT = "snapshot"
+
+# Quote transports
+PUBSUB_TRANSPORT = "pubsub"
+STREAMS_TRANSPORT = "streams"
+
+# The field of a stream entry with the message
+STREAM_DATA_FIELD = "data"
+
+
+def get_quote_channel(symbol: str, shards: int) -> str:
+    """
+    Get the channel of the symbol quotes.
+
+    :param symbol: The security symbol.
+    :param shards: The number of quote channels, all the quotes are
+        published to the market data channel if 0.
+    :return: The channel name.
+    """
+    if not shards:
+        return MARKET_DATA_CHANNEL
+    return f"quotes:{zlib.crc32(symbol.encode()) % shards}"
+
 
 class MarketDataPublisher:
+    """
+    Publishes security quotes to the quote channels.
+
+    Quotes are sharded by symbols between QUOTE_CHANNEL_SHARDS channels,
+    so subscribers receive only the shards of the symbols they need.
+
+    Only the quotes changed since the previous message of a channel are
+    published as a delta. Every message has the next sequence number of its
+    channel, so subscribers detect lost messages by gaps. A snapshot of all
+    the quotes is published periodically to let subscribers resynchronize
+    after a gap.
+
+    Messages are encoded in the binary format of quote_message. With
+    the streams transport they are appended to streams instead, so consumers
+    which reconnect or join late read the messages they missed.
+    """
+
     def __init__(self):
         """
         Initialize the default market data publisher instance.
         """
-        pass
+        self._published_quotes = {}
+        self._sequences = {}
+        self._last_snapshot_time = None
+        self._lock = threading.Lock()
 
     def init_app(self, app):
         """
@@ -21,6 +72,17 @@ class MarketDataPublisher:
         :param app: The Flask app instance
         """
 
+        self._snapshot_interval = app.config.get("QUOTE_SNAPSHOT_INTERVAL_SEC")
+        self._compression_threshold = app.config.get(
+            "QUOTE_MESSAGE_COMPRESSION_THRESHOLD"
+        )
+        self._shards = app.config.get("QUOTE_CHANNEL_SHARDS")
+        self._transport = app.config.get("QUOTE_TRANSPORT")
+        if self._transport not in (PUBSUB_TRANSPORT, STREAMS_TRANSPORT):
+            raise MarketDataFetcherError(
+                f"Quote transport '{self._transport}' isn't supported"
+            )
+        self._stream_maxlen = app.config.get("QUOTE_STREAM_MAXLEN")
         self._url = app.config.get("REDIS_URL")
         self._redis = redis.from_url(self._url)
         self.ping()
@@ -33,16 +95,115 @@ class MarketDataPublisher:
         if not self._redis.ping():
             raise MarketDataFetcherError(f"Cannot connect to redis '{self._url}' url")
 
-    def publish_security_quotes(self, securities: list[Security]):
+    def reset(self):
         """
-        Publish security quotes.
+        Forget the published quotes, so that the next message is a snapshot.
 
-        :param quotes: The quotes list.
+        Called when the instance becomes the leader, since subscribers may have
+        received quotes of another leader since its previous message.
         """
-        self.__publish_message(MARKET_DATA_CHANNEL, json.dumps(get_quotes(securities)))
+        with self._lock:
+            self._published_quotes = {}
+            self._last_snapshot_time = None
 
-    def __publish_message(self, channel: str, message: str):
-        subscribers_count = self._redis.publish(channel, message)
+    def publish_quotes(self, quotes: dict[str, float]):
+        """
+        Publish the changed security quotes or a snapshot of all of them.
+
+        :param quotes: The latest prices of the requested securities by symbols.
+        """
+        quotes_by_channels = {}
+        for symbol, price in quotes.items():
+            channel = get_quote_channel(symbol, self._shards)
+            quotes_by_channels.setdefault(channel, {})[symbol] = price
+
+        with self._lock:
+            now = time.monotonic()
+            is_snapshot = (
+                self._last_snapshot_time is None
+                or now - self._last_snapshot_time >= self._snapshot_interval
+            )
+            if is_snapshot:
+                self._last_snapshot_time = now
+
+            messages = []
+            for channel, channel_quotes in quotes_by_channels.items():
+                if is_snapshot:
+                    message_quotes = channel_quotes
+                else:
+                    published_quotes = self._published_quotes.get(channel, {})
+                    message_quotes = {
+                        symbol: price
+                        for symbol, price in channel_quotes.items()
+                        if published_quotes.get(symbol) != price
+                    }
+                    if not message_quotes:
+                        continue
+                sequence = self._sequences.get(channel, 0) + 1
+                self._sequences[channel] = sequence
+                messages.append(
+                    (
+                        channel,
+                        {
+                            "type": QUOTES_SNAPSHOT if is_snapshot else QUOTES_DELTA,
+                            "sequence": sequence,
+                            "quotes": message_quotes,
+                        },
+                    )
+                )
+            # Quotes of symbols which are no longer requested are forgotten
+            self._published_quotes = quotes_by_channels
+
+            if not messages:
+                current_app.logger.info("Quotes haven't changed. Nothing to publish")
+                return
+            # Published under the lock so that messages are sent in sequence order
+            with self._redis.pipeline(transaction=False) as pipeline:
+                for channel, message in messages:
+                    data = encode_quotes_message(
+                        message["type"],
+                        message["sequence"],
+                        message["quotes"],
+                        self._compression_threshold,
+                    )
+                    if self._transport == STREAMS_TRANSPORT:
+                        # Trimmed by whole nodes, which is much cheaper than exactly
+                        pipeline.xadd(
+                            channel,
+                            {STREAM_DATA_FIELD: data},
+                            maxlen=self._stream_maxlen,
+                            approximate=True,
+                        )
+                    else:
+                        pipeline.publish(channel, data)
+                results = pipeline.execute()
+
+        stats = (
+            f"Stats: published {'snapshot' if is_snapshot else 'delta'} of "
+            f"{sum(len(message['quotes']) for _, message in messages)} quotes "
+            f"to {len(messages)} "
+        )
+        if self._transport == STREAMS_TRANSPORT:
+            current_app.logger.info(stats + "streams")
+        else:
+            current_app.logger.info(stats + f"channels with {sum(results)} subscribers")
+
+    def publish_bars(self, closed_bars: dict[str, list[dict]]):
+        """
+        Publish the closed bars.
+
+        :param closed_bars: The closed bars by interval names.
+        """
+        with self._redis.pipeline(transaction=False) as pipeline:
+            for interval, bars in closed_bars.items():
+                pipeline.publish(
+                    BARS_CHANNEL.format(interval=interval),
+                    json.dumps({"interval": interval, "bars": bars}),
+                )
+            pipeline.execute()
         current_app.logger.info(
-            f"Message '{message}' has been delivered to {subscribers_count} subscribers"
+            "Stats: published closed bars "
+            + ", ".join(
+                f"{len(bars)} {interval}" for interval, bars in closed_bars.items()
+            )
         )
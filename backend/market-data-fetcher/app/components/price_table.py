@@ -0,0 +1,68 @@
+from array import array
+
+
+class PriceTable:
+    """
+    The table of the latest prices of the cached securities.
+
+    Prices are stored unboxed in a single array indexed by security ids,
+    which are assigned to the symbols the table is built of. Updating a price
+    is a write to the array. Symbols are never added or removed: the cache
+    builds a new table for every new mapping of securities, so ids of
+    the removed securities are freed with the previous table.
+    """
+
+    def __init__(self, prices: dict[str, float]):
+        """
+        Initialize the price table of symbols.
+
+        :param prices: The initial prices by symbols.
+        """
+        self._ids = {symbol: price_id for price_id, symbol in enumerate(prices)}
+        self._prices = array("d", prices.values())
+
+    def get_id(self, symbol: str) -> int | None:
+        """
+        Gets the id of the symbol.
+
+        :param symbol: The security symbol.
+        :return: The index of the symbol price in the table or None if
+            the symbol isn't in the table.
+        """
+        return self._ids.get(symbol)
+
+    def get_price(self, price_id: int) -> float:
+        """
+        Gets the price by the id of a symbol.
+
+        :param price_id: The id of the symbol.
+        :return: The latest price.
+        """
+        return self._prices[price_id]
+
+    def set_price(self, price_id: int, price: float):
+        """
+        Sets the price by the id of a symbol.
+
+        :param price_id: The id of the symbol.
+        :param price: The latest price.
+        """
+        self._prices[price_id] = price
+
+    def set_prices(self, quotes: dict[str, float]) -> dict[str, float]:
+        """
+        Sets the prices of the symbols in the table.
+
+        :param quotes: The latest prices by symbols.
+        :return: The set prices by symbols, symbols which aren't in the table
+            are skipped.
+        """
+        ids = self._ids
+        table = self._prices
+        updated_quotes = {}
+        for symbol, price in quotes.items():
+            price_id = ids.get(symbol)
+            if price_id is not None:
+                table[price_id] = price
+                updated_quotes[symbol] = price
+        return updated_quotes
@@ -0,0 +1,37 @@
+# The class represents the latest quote of a security
+class Quote:
+    def __init__(self, symbol: str, price: float, volume: int):
+        """
+        Initialize the quote instance.
+
+        :param symbol: The security symbol
+        :param price: The latest market price
+        :param volume: The traded volume of the day
+        """
+        self._symbol = symbol
+        self._price = price
+        self._volume = volume
+
+    def get_symbol(self):
+        """
+        Gets the security symbol.
+
+        :return: The security symbol.
+        """
+        return self._symbol
+
+    def get_price(self):
+        """
+        Gets the latest market price.
+
+        :return: The latest market price.
+        """
+        return self._price
+
+    def get_volume(self):
+        """
+        Gets the traded volume of the day.
+
+        :return: The traded volume.
+        """
+        return self._volume
@@ -0,0 +1,49 @@
+import msgpack
+import numpy as np
+import zlib
+
+# Incremented on every change of the message layout, the same as in
+# the portfolio-manager
+QUOTE_MESSAGE_VERSION = 1
+
+# Content types of the message payload
+CONTENT_TYPE_MSGPACK = "msgpack"
+CONTENT_TYPE_MSGPACK_ZLIB = "msgpack+zlib"
+
+# Compression level of payloads, the fastest one
+COMPRESSION_LEVEL = 1
+
+
+def encode_quotes_message(
+    message_type: str,
+    sequence: int,
+    quotes: dict[str, float],
+    compression_threshold: int,
+) -> bytes:
+    """
+    Encode a quotes message into the binary wire format.
+
+    The message is an envelope of the version, the content type and
+    the payload in msgpack. The payload is the type, the sequence, the symbols
+    and their prices as little-endian float64 in msgpack, compressed by zlib
+    if it's larger than the threshold.
+
+    :param message_type: The message type.
+    :param sequence: The sequence number of the message in its channel.
+    :param quotes: The prices by symbols.
+    :param compression_threshold: The min size of a payload in bytes to compress.
+    :return: The encoded message.
+    """
+    payload = msgpack.packb(
+        {
+            "type": message_type,
+            "sequence": sequence,
+            "symbols": list(quotes),
+            "prices": np.fromiter(quotes.values(), "<f8", len(quotes)).tobytes(),
+        }
+    )
+    content_type = CONTENT_TYPE_MSGPACK
+    if len(payload) > compression_threshold:
+        payload = zlib.compress(payload, COMPRESSION_LEVEL)
+        content_type = CONTENT_TYPE_MSGPACK_ZLIB
+    return msgpack.packb((QUOTE_MESSAGE_VERSION, content_type, payload))
@@ -0,0 +1,77 @@
+from apscheduler.triggers.base import BaseTrigger
+from app.components.market_calendar import MarketCalendar
+from datetime import datetime, timedelta, timezone
+import random
+
+
+class QuotePollingTrigger(BaseTrigger):
+    """
+    The APScheduler trigger of quote polling, which follows the market sessions.
+
+    Quotes are polled more often in the windows after the open and before
+    the close, at the regular interval in between and not at all while the market
+    is closed. The first poll of a session is at its open and the last one is
+    at its close. Intervals are jittered, so that replicas don't poll at once.
+    """
+
+    __slots__ = ("_calendar", "_interval", "_edge_interval", "_edge_window", "_jitter")
+
+    def __init__(
+        self,
+        calendar: MarketCalendar,
+        interval: float,
+        edge_interval: float,
+        edge_window: float,
+        jitter: float,
+    ):
+        """
+        Initialize the trigger.
+
+        :param calendar: The market calendar.
+        :param interval: The polling interval in seconds.
+        :param edge_interval: The polling interval after the open and before the close.
+        :param edge_window: The duration of the windows after the open and before
+            the close in seconds.
+        :param jitter: The max deviation of an interval as a fraction of it.
+        """
+        self._calendar = calendar
+        self._interval = interval
+        self._edge_interval = edge_interval
+        self._edge_window = edge_window
+        self._jitter = jitter
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        timestamp = now.timestamp()
+        session_open, session_close = self._calendar.get_session(timestamp)
+        if timestamp < session_open:
+            next_timestamp = self.__get_open_poll_time(session_open)
+        else:
+            interval = self._interval
+            if (
+                timestamp < session_open + self._edge_window
+                or timestamp > session_close - self._edge_window
+            ):
+                interval = self._edge_interval
+            interval *= 1 + random.uniform(-self._jitter, self._jitter)
+            next_timestamp = min(timestamp + interval, session_close)
+            if next_timestamp <= timestamp:
+                # The poll at the close has just been made, wait for the next session
+                session_open, _ = self._calendar.get_session(session_close + 1)
+                next_timestamp = self.__get_open_poll_time(session_open)
+        return datetime.fromtimestamp(next_timestamp, timezone.utc).astimezone(
+            now.tzinfo
+        )
+
+    def __get_open_poll_time(self, session_open: float) -> float:
+        # A poll at the open, delayed by up to the jitter
+        return session_open + random.uniform(0, self._jitter * self._edge_interval)
+
+    def __str__(self):
+        return f"quote polling[interval={timedelta(seconds=self._interval)}]"
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__} (interval={self._interval}, "
+            f"edge_interval={self._edge_interval}, edge_window={self._edge_window}, "
+            f"jitter={self._jitter})>"
+        )
@@ -1,7 +1,24 @@
+from app.components.price_table import PriceTable
+import sys
+
+
 # The class represents the security
 class Security:
+    # Tens of thousands of securities are cached, so instances have no __dict__.
+    # Prices of cached securities are kept in the price table of the cache,
+    # exchanges and asset types are interned
+    __slots__ = (
+        "_symbol",
+        "_name",
+        "_price",
+        "_prices",
+        "_price_id",
+        "_exchange",
+        "_assetType",
+    )
+
     def __init__(
-        self, symbol: str, name: str, price: int, exchange: str, assetType: str
+        self, symbol: str, name: str, price: float, exchange: str, assetType: str
     ):
         """
         Initialize the security instance.
@@ -14,9 +31,40 @@ class Security:
         """
         self._symbol = symbol
         self._name = name
+        # The security keeps its price until the cache moves it into its table,
+        # so loading securities doesn't change the prices of the cached ones
         self._price = price
-        self._exchange = exchange
-        self._assetType = assetType
+        self._prices = None
+        self._price_id = -1
+        self._exchange = sys.intern(exchange)
+        self._assetType = sys.intern(assetType)
+
+    def attach_price(self, prices: PriceTable, price_id: int) -> "Security":
+        """
+        Moves the price into the price table of the cache.
+
+        A security is attached to a single table, so that readers never see
+        the id of one table with another. A security of another table
+        is copied.
+
+        :param prices: The price table, which has the price of the security.
+        :param price_id: The id of the security in the table.
+        :return: The security attached to the table.
+        """
+        if self._prices is not None:
+            security = Security.__new__(Security)
+            security._symbol = self._symbol
+            security._name = self._name
+            security._exchange = self._exchange
+            security._assetType = self._assetType
+            security._prices = None
+            return security.attach_price(prices, price_id)
+        # The id is set before the table and the own price is released after it,
+        # so readers always see either the own price or the table and its id
+        self._price_id = price_id
+        self._prices = prices
+        self._price = None
+        return self
 
     def get_symbol(self):
         """
@@ -40,7 +88,23 @@ class Security:
 
         :return: The security price.
         """
-        return self._price
+        price = self._price
+        prices = self._prices
+        if prices is None:
+            return price
+        return prices.get_price(self._price_id)
+
+    def set_price(self, price):
+        """
+        Sets the latest market price.
+
+        :param price: The security price.
+        """
+        prices = self._prices
+        if prices is None:
+            self._price = price
+        else:
+            prices.set_price(self._price_id, price)
 
     def get_exchange(self):
         """
@@ -58,6 +122,21 @@ class Security:
         """
         return self._assetType
 
+    def to_row(self) -> tuple:
+        """
+        Returns a tuple of the security arguments, which initializes
+        the same security.
+
+        :return: The symbol, name, price, exchange and asset type.
+        """
+        return (
+            self._symbol,
+            self._name,
+            self.get_price(),
+            self._exchange,
+            self._assetType,
+        )
+
     def to_dict(self):
         """
         Returns a dictionary representation of the object.
@@ -67,7 +146,7 @@ class Security:
         return {
             "symbol": self._symbol,
             "name": self._name,
-            "price": self._price,
+            "price": self.get_price(),
             "exchange": self._exchange,
             "assetType": self._assetType,
         }
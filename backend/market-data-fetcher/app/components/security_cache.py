@@ -1,24 +1,39 @@
+from app.components.price_table import PriceTable
+from app.components.quote import Quote
 from app.components.security import Security
+from collections.abc import Iterable
 import threading
 
 
 class SecurityCache:
+    """
+    The cache of securities with lock-free reads.
+
+    The mapping of symbols to securities is never modified. Writers build
+    a new mapping and replace the previous one, which is atomic, so readers
+    always see a consistent snapshot without taking a lock. Prices are kept
+    in a price table of the mapping, so updating them doesn't replace it.
+    The table is built with the mapping, so securities being loaded don't
+    change the prices of the cached ones until the mapping is replaced.
+    """
+
     def __init__(self):
         """
         Initialize the security cache.
         """
         self._securities = dict()
+        self._prices = PriceTable({})
+        # Serializes writers only
         self._lock = threading.Lock()
 
     def has_security(self, symbol: str) -> bool:
         """
-        Checks if a security is in the cache in a thread-safe manner.
+        Checks if a security is in the cache.
 
         :param symbol: The security symbol.
         :return: True if the security with a symbol is in the cache, False if it doesn't exist.
         """
-        with self._lock:
-            return symbol in self._securities
+        return symbol in self._securities
 
     def update_security(self, symbol: str, security: Security):
         """
@@ -28,7 +43,33 @@ class SecurityCache:
         :param security: The security info.
         """
         with self._lock:
-            self._securities[symbol] = security
+            securities = dict(self._securities)
+            securities[symbol] = security
+            self.__replace(securities)
+
+    def replace_securities(self, securities: Iterable[Security]) -> int:
+        """
+        Replace all the securities in the cache at once.
+
+        :param securities: The security infos.
+        :return: The number of cached securities.
+        """
+        new_securities = {security.get_symbol(): security for security in securities}
+        with self._lock:
+            self.__replace(new_securities)
+        return len(new_securities)
+
+    def update_prices(self, quotes: list[Quote]) -> dict[str, float]:
+        """
+        Update prices of the cached securities.
+
+        :param quotes: The latest quotes.
+        :return: The updated prices by symbols, quotes of unknown securities
+            are skipped.
+        """
+        return self._prices.set_prices(
+            {quote.get_symbol(): quote.get_price() for quote in quotes}
+        )
 
     def remove_security(self, symbol: str) -> bool:
         """
@@ -38,36 +79,50 @@ class SecurityCache:
         :return: True if the symbol was removed, False if it didn't exist.
         """
         with self._lock:
-            if not self.has_security(symbol):
+            if symbol not in self._securities:
                 return False
-
-            self._securities.remove(symbol)
+            securities = dict(self._securities)
+            del securities[symbol]
+            self.__replace(securities)
+            return True
 
     def get_security(self, symbol: str) -> Security:
         """
-        Get a security managed by the cache in a thread-safe manner.
+        Get a security managed by the cache.
 
         :param symbol: The security symbol.
         :return: The security.
         """
-        with self._lock:
-            return self._securities[symbol]
+        return self._securities[symbol]
 
-    def get_securities(self, symbols: list[str]) -> list[Security]:
+    def get_many(self, symbols: list[str]) -> dict[str, Security]:
         """
-        Get a list of securities managed by the cache in a thread-safe manner.
+        Get securities managed by the cache from a single snapshot.
 
-        :param symbol: The security symbols.
-        :return: The security list.
+        :param symbols: The security symbols.
+        :return: The found securities by symbols.
         """
-        with self._lock:
-            return [self._securities[symbol] for symbol in symbols]
+        securities = self._securities
+        return {
+            symbol: securities[symbol] for symbol in symbols if symbol in securities
+        }
 
     def get_all_securities(self) -> list[Security]:
         """
-        Get all securities managed by the cache in a thread-safe manner.
+        Get all securities managed by the cache.
 
         :return: The security list.
         """
-        with self._lock:
-            return self._securities.values()
+        return list(self._securities.values())
+
+    def __replace(self, securities: dict[str, Security]):
+        # The prices are moved into a new table, which is replaced with the mapping
+        prices = PriceTable(
+            {symbol: security.get_price() for symbol, security in securities.items()}
+        )
+        securities = {
+            symbol: security.attach_price(prices, prices.get_id(symbol))
+            for symbol, security in securities.items()
+        }
+        self._prices = prices
+        self._securities = securities
@@ -0,0 +1,86 @@
+from app.components.security import Security
+import msgpack
+import os
+import tempfile
+import time
+
+# Incremented on every change of the snapshot layout,
+# snapshots of other versions are ignored
+SNAPSHOT_VERSION = 1
+
+
+class SecuritySnapshot:
+    """
+    The snapshot of the security cache on the local disk.
+
+    The snapshot is written after every update of the securities, so that
+    the service starts with them at once and updates them in the background.
+    It consists of a header with the version and the creation time followed
+    by the rows of securities, both in msgpack.
+    """
+
+    def __init__(self):
+        """
+        Initialize the security snapshot.
+        """
+        self._path = None
+
+    def init_app(self, app):
+        """
+        Initialize the security snapshot from the flask app instance.
+
+        :param app: The Flask app instance
+        """
+        self._path = app.config.get("SECURITIES_SNAPSHOT_PATH") or os.path.join(
+            app.instance_path, "securities.msgpack"
+        )
+        self._logger = app.logger
+
+    def save(self, securities: list[Security]):
+        """
+        Write the snapshot of the securities. The previous snapshot is replaced
+        atomically, so a snapshot is never read partially written.
+
+        :param securities: The securities.
+        """
+        directory = os.path.dirname(self._path)
+        os.makedirs(directory, exist_ok=True)
+        header = {"version": SNAPSHOT_VERSION, "created_at": time.time()}
+        rows = [security.to_row() for security in securities]
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+            try:
+                file.write(msgpack.packb(header))
+                file.write(msgpack.packb(rows))
+                file.flush()
+                os.fsync(file.fileno())
+            except BaseException:
+                os.unlink(file.name)
+                raise
+        os.replace(file.name, self._path)
+
+    def load(self) -> list[Security] | None:
+        """
+        Read the securities from the snapshot.
+
+        :return: The securities or None if there is no valid snapshot.
+        """
+        try:
+            with open(self._path, "rb") as file:
+                unpacker = msgpack.Unpacker(file, use_list=False)
+                header = unpacker.unpack()
+                if header.get("version") != SNAPSHOT_VERSION:
+                    self._logger.info(
+                        f"Snapshot version {header.get('version')} is not supported"
+                    )
+                    return None
+                rows = unpacker.unpack()
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            self._logger.error(f"Unable to read the securities snapshot. {error}.")
+            return None
+        self._logger.info(
+            f"Loaded {len(rows)} securities from the snapshot created "
+            f"{time.time() - header['created_at']:.0f} seconds ago."
+        )
+        return [Security(*row) for row in rows]
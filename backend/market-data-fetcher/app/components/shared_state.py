@@ -0,0 +1,138 @@
+from app.components.exchange_rate import ExchangeRate
+from app.components.quote import Quote
+from app.components.security import Security
+import msgpack
+import redis
+import time
+
+QUOTES_KEY = "market-data-fetcher:quotes"
+EXCHANGE_RATES_KEY = "market-data-fetcher:exchange-rates"
+SECURITIES_KEY = "market-data-fetcher:securities"
+
+# The update time of a state is kept next to it, so that the state is
+# downloaded only when it has changed
+UPDATED_AT_KEY = "{key}:updated-at"
+
+
+class SharedState:
+    """
+    The state the leader shares with the other instances of the service in Redis.
+
+    The leader saves the latest quotes of the subscribed symbols, the exchange
+    rates and the securities after requesting them from the market data API.
+    Followers load them when they change, so that they serve the same data
+    without requesting it from the API. Every state is saved with its update
+    time as rows in msgpack.
+    """
+
+    def __init__(self):
+        """
+        Initialize the shared state.
+        """
+        self._redis = None
+
+    def init_app(self, app):
+        """
+        Initialize the shared state from the flask app instance.
+
+        :param app: The Flask app instance
+        """
+        self._redis = redis.from_url(app.config.get("REDIS_URL"))
+
+    def save_quotes(self, quotes: list[Quote], quotes_time: float):
+        """
+        Save the latest quotes.
+
+        :param quotes: The quotes.
+        :param quotes_time: The time of the quotes in seconds since the epoch.
+        """
+        rows = [
+            (quote.get_symbol(), quote.get_price(), quote.get_volume())
+            for quote in quotes
+        ]
+        self.__save(QUOTES_KEY, rows, quotes_time)
+
+    def load_quotes(self, since: float) -> tuple[float, list[Quote]] | None:
+        """
+        Load the latest quotes if they are newer than the time.
+
+        :param since: The time of the last loaded quotes in seconds since the epoch.
+        :return: The time of the quotes and the quotes or None if they are not newer.
+        """
+        state = self.__load(QUOTES_KEY, since)
+        if state is None:
+            return None
+        quotes_time, rows = state
+        return quotes_time, [Quote(*row) for row in rows]
+
+    def save_exchange_rates(self, exchange_rates: list[ExchangeRate]):
+        """
+        Save the exchange rates.
+
+        :param exchange_rates: The quoted exchange rates.
+        """
+        rows = [
+            (
+                rate.get_from_currency(),
+                rate.get_to_currency(),
+                rate.get_ask(),
+                rate.get_bid(),
+            )
+            for rate in exchange_rates
+        ]
+        self.__save(EXCHANGE_RATES_KEY, rows, time.time())
+
+    def load_exchange_rates(
+        self, since: float
+    ) -> tuple[float, list[ExchangeRate]] | None:
+        """
+        Load the exchange rates if they have been updated after the time.
+
+        :param since: The update time of the last loaded rates in seconds since the epoch.
+        :return: The update time and the rates or None if they haven't been updated.
+        """
+        state = self.__load(EXCHANGE_RATES_KEY, since)
+        if state is None:
+            return None
+        updated_at, rows = state
+        return updated_at, [ExchangeRate(*row) for row in rows]
+
+    def save_securities(self, securities: list[Security]):
+        """
+        Save the securities.
+
+        :param securities: The securities.
+        """
+        rows = [security.to_row() for security in securities]
+        self.__save(SECURITIES_KEY, rows, time.time())
+
+    def load_securities(self, since: float) -> tuple[float, list[Security]] | None:
+        """
+        Load the securities if they have been updated after the time.
+
+        :param since: The update time of the last loaded securities
+            in seconds since the epoch.
+        :return: The update time and the securities or None if they haven't
+            been updated.
+        """
+        state = self.__load(SECURITIES_KEY, since)
+        if state is None:
+            return None
+        updated_at, rows = state
+        return updated_at, [Security(*row) for row in rows]
+
+    def __save(self, key: str, rows: list[tuple], updated_at: float):
+        with self._redis.pipeline() as pipeline:
+            pipeline.set(key, msgpack.packb((updated_at, rows)))
+            pipeline.set(UPDATED_AT_KEY.format(key=key), updated_at)
+            pipeline.execute()
+
+    def __load(self, key: str, since: float) -> tuple[float, list] | None:
+        updated_at = self._redis.get(UPDATED_AT_KEY.format(key=key))
+        if updated_at is None or float(updated_at) <= since:
+            return None
+        data = self._redis.get(key)
+        if data is None:
+            return None
+        # The state may have been updated again after its update time was read
+        return msgpack.unpackb(data, use_list=False)
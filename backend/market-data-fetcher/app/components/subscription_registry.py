@@ -0,0 +1,131 @@
+import redis
+import time
+
+# The numbers of subscriptions by symbols
+SUBSCRIPTIONS_KEY = "market-data-fetcher:subscriptions"
+
+# The symbols scored by the time they were last seen
+LAST_SEEN_KEY = "market-data-fetcher:subscriptions:last-seen"
+
+# Symbols without subscriptions are removed
+UNSUBSCRIBE_SCRIPT = """
+for _, symbol in ipairs(ARGV) do
+    if redis.call("HINCRBY", KEYS[1], symbol, -1) <= 0 then
+        redis.call("HDEL", KEYS[1], symbol)
+        redis.call("ZREM", KEYS[2], symbol)
+    end
+end
+"""
+
+# Symbols which aren't registered get a subscription, the number of them is returned
+RENEW_SCRIPT = """
+local added_count = 0
+for index = 2, #ARGV do
+    added_count = added_count + redis.call("HSETNX", KEYS[1], ARGV[index], 1)
+    redis.call("ZADD", KEYS[2], ARGV[1], ARGV[index])
+end
+return added_count
+"""
+
+EVICT_SCRIPT = """
+local expired_symbols = redis.call("ZRANGEBYSCORE", KEYS[2], "-inf", ARGV[1])
+for _, symbol in ipairs(expired_symbols) do
+    redis.call("HDEL", KEYS[1], symbol)
+    redis.call("ZREM", KEYS[2], symbol)
+end
+return #expired_symbols
+"""
+
+
+class SubscriptionRegistry:
+    """
+    The registry of the symbols requested for quote updates.
+
+    Every symbol has a number of subscriptions and the time it was last seen
+    in a subscription or a heartbeat. A symbol is removed when its last
+    subscription is cancelled, or evicted when no heartbeat has renewed it
+    for the time to live, e.g. when a subscriber has stopped without
+    cancelling its subscriptions.
+
+    The registry is kept in Redis and shared by all instances of the service,
+    so the leader publishes quotes of the symbols subscribed through any of them.
+    Every change is applied atomically by a single command or script.
+    """
+
+    def __init__(self):
+        """
+        Initialize the subscription registry.
+        """
+        self._redis = None
+
+    def init_app(self, app):
+        """
+        Initialize the subscription registry from the flask app instance.
+
+        :param app: The Flask app instance
+        """
+        self._ttl = app.config.get("QUOTE_SUBSCRIPTION_TTL_SEC")
+        self._redis = redis.from_url(app.config.get("REDIS_URL"), decode_responses=True)
+        self._unsubscribe_script = self._redis.register_script(UNSUBSCRIBE_SCRIPT)
+        self._renew_script = self._redis.register_script(RENEW_SCRIPT)
+        self._evict_script = self._redis.register_script(EVICT_SCRIPT)
+
+    def subscribe(self, symbols: list[str]):
+        """
+        Add a subscription to the symbols.
+
+        :param symbols: The symbols.
+        """
+        symbols = set(symbols)
+        if not symbols:
+            return
+        now = time.time()
+        with self._redis.pipeline() as pipeline:
+            for symbol in symbols:
+                pipeline.hincrby(SUBSCRIPTIONS_KEY, symbol, 1)
+            pipeline.zadd(LAST_SEEN_KEY, {symbol: now for symbol in symbols})
+            pipeline.execute()
+
+    def unsubscribe(self, symbols: list[str]):
+        """
+        Cancel a subscription to the symbols.
+
+        :param symbols: The symbols.
+        """
+        symbols = set(symbols)
+        if not symbols:
+            return
+        self._unsubscribe_script(
+            keys=[SUBSCRIPTIONS_KEY, LAST_SEEN_KEY], args=list(symbols)
+        )
+
+    def renew(self, symbols: list[str]) -> int:
+        """
+        Renew the subscriptions to the symbols. Symbols which aren't registered,
+        e.g. after a restart of the service, are subscribed to.
+
+        :param symbols: The symbols.
+        :return: The number of symbols which haven't been registered.
+        """
+        symbols = set(symbols)
+        if not symbols:
+            return 0
+        return self._renew_script(
+            keys=[SUBSCRIPTIONS_KEY, LAST_SEEN_KEY], args=[time.time(), *symbols]
+        )
+
+    def evict_expired(self) -> int:
+        """
+        Remove the symbols which haven't been renewed for the time to live.
+
+        :return: The number of evicted symbols.
+        """
+        return self._evict_script(
+            keys=[SUBSCRIPTIONS_KEY, LAST_SEEN_KEY], args=[time.time() - self._ttl]
+        )
+
+    def get_symbols(self) -> list[str]:
+        """
+        Gets the subscribed symbols.
+        """
+        return self._redis.hkeys(SUBSCRIPTIONS_KEY)
@@ -0,0 +1,145 @@
+from app.components.quote import Quote
+import numpy as np
+import threading
+
+
+class TickRingBuffer:
+    """
+    The latest ticks of a symbol in a fixed-capacity ring buffer.
+
+    Times, prices and volumes are stored in preallocated arrays, so the memory
+    of a buffer doesn't grow. When the buffer is full, a new tick overwrites
+    the oldest one.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the empty ring buffer.
+
+        :param capacity: The max number of ticks.
+        """
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._prices = np.zeros(capacity, dtype=np.float64)
+        self._volumes = np.zeros(capacity, dtype=np.float64)
+        self._capacity = capacity
+        # The total number of appended ticks
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, time: float, price: float, volume: float):
+        """
+        Append a tick.
+
+        :param time: The time of the tick in seconds since the epoch.
+        :param price: The price.
+        :param volume: The traded volume of the day.
+        """
+        with self._lock:
+            # Ticks are kept in time order
+            if self._count and time <= self._times[(self._count - 1) % self._capacity]:
+                return
+            index = self._count % self._capacity
+            self._times[index] = time
+            self._prices[index] = price
+            self._volumes[index] = volume
+            self._count += 1
+
+    def get_since(self, since: float = None) -> tuple[np.ndarray]:
+        """
+        Get the ticks after the time. Only the requested ticks are copied.
+
+        :param since: The time in seconds since the epoch, all ticks if not given.
+        :return: The times, prices and volumes of the ticks in time order.
+        """
+        with self._lock:
+            size = min(self._count, self._capacity)
+            start = self._count % self._capacity if self._count > self._capacity else 0
+            # The ticks are in one or two contiguous segments of the arrays
+            segments = [(start, start + size)]
+            if start + size > self._capacity:
+                segments = [(start, self._capacity), (0, start + size - self._capacity)]
+            if since is not None:
+                segments = [
+                    (
+                        begin + np.searchsorted(self._times[begin:end], since, "right"),
+                        end,
+                    )
+                    for begin, end in segments
+                ]
+            return tuple(
+                np.concatenate([array[begin:end] for begin, end in segments])
+                for array in (self._times, self._prices, self._volumes)
+            )
+
+
+class TickHistory:
+    """
+    Intraday ticks of the subscribed symbols.
+
+    The memory is bounded by TICK_HISTORY_CAPACITY ticks per symbol and
+    TICK_HISTORY_MAX_SYMBOLS symbols. Ticks of unsubscribed symbols are removed.
+    """
+
+    def __init__(self):
+        """
+        Initialize the empty tick history.
+        """
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Initialize the tick history from the flask app instance.
+
+        :param app: The Flask app instance
+        """
+        self._capacity = app.config.get("TICK_HISTORY_CAPACITY")
+        self._max_symbols = app.config.get("TICK_HISTORY_MAX_SYMBOLS")
+
+    def record(self, quotes: list[Quote], time: float):
+        """
+        Append the quotes to the ticks of their symbols.
+
+        :param quotes: The latest quotes.
+        :param time: The time of the quotes in seconds since the epoch.
+        """
+        for quote in quotes:
+            buffer = self._buffers.get(quote.get_symbol())
+            if buffer is None:
+                with self._lock:
+                    if len(self._buffers) >= self._max_symbols:
+                        continue
+                    buffer = self._buffers.setdefault(
+                        quote.get_symbol(), TickRingBuffer(self._capacity)
+                    )
+            buffer.append(time, quote.get_price(), quote.get_volume() or 0)
+
+    def retain(self, symbols: list[str]) -> int:
+        """
+        Remove the ticks of all symbols except the given ones.
+
+        :param symbols: The symbols to keep the ticks of.
+        :return: The number of removed symbols.
+        """
+        symbols = set(symbols)
+        with self._lock:
+            removed_symbols = [
+                symbol for symbol in self._buffers if symbol not in symbols
+            ]
+            for symbol in removed_symbols:
+                del self._buffers[symbol]
+        return len(removed_symbols)
+
+    def get_ticks(self, symbol: str, since: float = None) -> tuple[np.ndarray] | None:
+        """
+        Get the ticks of the symbol after the time.
+
+        :param symbol: The symbol.
+        :param since: The time in seconds since the epoch, all ticks if not given.
+        :return: The times, prices and volumes of the ticks in time order
+            or None if the ticks of the symbol aren't recorded.
+        """
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            return None
+        return buffer.get_since(since)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Benchmark of aggregating quotes of all the subscribed symbols into bars.
+
+Compares updating the bars of every symbol and interval one by one in
+dictionaries with the vectorized update of the bar aggregator.
+
+Usage: python -m benchmarks.bar_aggregation [--symbols 5000] [--ticks 100]
+"""
+
+from app.components.bar_aggregator import BAR_INTERVALS, BarAggregator
+from app.components.quote import Quote
+import argparse
+import random
+import statistics
+import time
+
+START_TIME = 1700000000
+
+
+def update_one_by_one(bars: dict, quotes: list[Quote], quotes_time: float) -> list:
+    closed_bars = []
+    for quote in quotes:
+        price = quote.get_price()
+        for name, seconds in BAR_INTERVALS.items():
+            start = quotes_time // seconds * seconds
+            bar = bars.get((quote.get_symbol(), name))
+            if bar is None or bar["start"] != start:
+                if bar is not None:
+                    closed_bars.append(bar)
+                bars[(quote.get_symbol(), name)] = {
+                    "start": start,
+                    "open": price,
+                    "high": price,
+                    "low": price,
+                    "close": price,
+                    "volume": quote.get_volume(),
+                }
+            else:
+                bar["high"] = max(bar["high"], price)
+                bar["low"] = min(bar["low"], price)
+                bar["close"] = price
+                bar["volume"] = quote.get_volume()
+    return closed_bars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--ticks", type=int, default=100)
+    args = parser.parse_args()
+
+    random.seed(0)
+    ticks = [
+        [
+            Quote(f"S{i}", random.uniform(10, 500), 1000 * (tick + 1))
+            for i in range(args.symbols)
+        ]
+        for tick in range(args.ticks)
+    ]
+
+    bars = {}
+    aggregator = BarAggregator()
+    aggregator._history_capacity = 500
+    print(f"Symbols: {args.symbols}, ticks: {args.ticks}, a tick every 10 s")
+    for title, update in (
+        ("one by one", lambda quotes, now: update_one_by_one(bars, quotes, now)),
+        ("vectorized", aggregator.update),
+    ):
+        timings = []
+        for tick, quotes in enumerate(ticks):
+            start_time = time.perf_counter()
+            update(quotes, START_TIME + 10 * tick)
+            timings.append((time.perf_counter() - start_time) * 1000)
+        print(
+            f"{title:>10}: median {statistics.median(timings):7.2f} ms, "
+            f"max {max(timings):7.2f} ms per tick"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Benchmark of looking exchange rates up as GET /market/fx does.
+
+Compares the previous scan over the list of all quoted rates with the lookup
+in the exchange rate table, and measures the time to build the table with
+all cross rates.
+
+Usage: python -m benchmarks.exchange_rates [--currencies 150] [--requested 10]
+"""
+
+from app.components.exchange_rate import ExchangeRate
+from app.components.exchange_rate_table import ExchangeRateTable
+import argparse
+import random
+import timeit
+
+
+def scan_rates(exchange_rates: list[ExchangeRate], currencies: list[str]) -> list:
+    result = []
+    for rate in exchange_rates:
+        if rate.get_from_currency() != "USD":
+            continue
+        if rate.get_to_currency() not in currencies:
+            continue
+        result.append(rate.midpoint_rate())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--currencies", type=int, default=150)
+    parser.add_argument("--requested", type=int, default=10)
+    args = parser.parse_args()
+
+    random.seed(0)
+    currencies = ["USD"] + [f"C{i:02}" for i in range(args.currencies - 1)]
+    # Every currency is quoted against USD and a few other currencies
+    exchange_rates = []
+    for currency in currencies[1:]:
+        for other in ["USD"] + random.sample(currencies[1:], 10):
+            if other != currency:
+                rate = random.uniform(0.1, 10)
+                exchange_rates.append(ExchangeRate(other, currency, rate, rate))
+    requested = random.sample(currencies, args.requested)
+
+    table = ExchangeRateTable()
+    number = 10
+    seconds = timeit.timeit(lambda: table.replace_rates(exchange_rates), number=number)
+    print(
+        f"Currencies: {args.currencies}, quoted rates: {len(exchange_rates)}, "
+        f"table built in {seconds / number * 1000:.1f} ms"
+    )
+    number = 10000
+    for title, lookup in (
+        ("scan", lambda: scan_rates(exchange_rates, requested)),
+        ("table", lambda: table.get_rates("USD", requested)),
+    ):
+        seconds = timeit.timeit(lookup, number=number)
+        print(f"{title:>5}: {seconds / number * 1e6:8.1f} us per request")
+
+
+if __name__ == "__main__":
+    main()
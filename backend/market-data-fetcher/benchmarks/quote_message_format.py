@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Benchmark of encoding quote messages.
+
+Compares the previous JSON messages with the binary format of quote_message,
+uncompressed and compressed, by the encoding throughput and the payload size
+for messages of a few quotes, a delta of a shard and a snapshot of all quotes.
+
+Usage: python -m benchmarks.quote_message_format [--number 2000]
+"""
+
+from app.components.quote_message import encode_quotes_message
+import argparse
+import json
+import random
+import timeit
+
+MESSAGE_SIZES = (5, 100, 5000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    for size in MESSAGE_SIZES:
+        # Prices of the upstream API have up to 4 decimals
+        quotes = {f"S{i:04}": round(random.uniform(10, 500), 4) for i in range(size)}
+        number = max(args.number * MESSAGE_SIZES[0] // size, 10)
+        print(f"Quotes: {size}")
+        for title, encode in (
+            (
+                "json",
+                lambda: json.dumps(
+                    {"type": "delta", "sequence": 1, "quotes": quotes}
+                ).encode(),
+            ),
+            (
+                "binary",
+                lambda: encode_quotes_message("delta", 1, quotes, float("inf")),
+            ),
+            ("zlib", lambda: encode_quotes_message("delta", 1, quotes, 0)),
+        ):
+            seconds = timeit.timeit(encode, number=number)
+            print(
+                f"{title:>8}: {len(encode()):7} bytes, "
+                f"{number / seconds:9.0f} messages/s, "
+                f"{number * size / seconds / 1e6:6.2f} M quotes/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Simulation of quote polling over a year.
+
+Compares the previous schedule, a poll every interval within the fixed
+14:30-21:00 UTC window every day, with the quote polling trigger, which follows
+the market calendar. Counts the polls of a closed market, which waste the quota
+of the upstream API, and the session time nobody polled within the longest interval.
+
+Usage: python -m benchmarks.quote_polling [--year 2026]
+"""
+
+from app.components.market_calendar import MarketCalendar
+from app.components.quote_polling_trigger import QuotePollingTrigger
+from app.components.config import Config
+from datetime import datetime, timedelta, timezone, time as dt_time
+import argparse
+import numpy as np
+
+
+def poll_previously(start: datetime, end: datetime) -> list[float]:
+    polls = []
+    time = start
+    while time < end:
+        if dt_time(14, 30) <= time.time() <= dt_time(21, 0):
+            polls.append(time.timestamp())
+        time += timedelta(seconds=Config.QUOTE_PUBLISHING_INTERVAL_SEC)
+    return polls
+
+
+def poll_adaptively(calendar: MarketCalendar, start: datetime, end: datetime):
+    trigger = QuotePollingTrigger(
+        calendar,
+        interval=Config.QUOTE_PUBLISHING_INTERVAL_SEC,
+        edge_interval=Config.QUOTE_PUBLISHING_EDGE_INTERVAL_SEC,
+        edge_window=Config.QUOTE_PUBLISHING_EDGE_WINDOW_SEC,
+        jitter=Config.QUOTE_PUBLISHING_JITTER,
+    )
+    polls = []
+    time = trigger.get_next_fire_time(None, start)
+    while time < end:
+        polls.append(time.timestamp())
+        time = trigger.get_next_fire_time(time, time + timedelta(milliseconds=10))
+    return polls
+
+
+def get_stats(calendar: MarketCalendar, polls: list[float]) -> tuple:
+    polls = np.array(polls)
+    is_open = np.array([calendar.is_open(poll) for poll in polls])
+    # Session time which was not covered by a poll within the longest interval
+    max_interval = Config.QUOTE_PUBLISHING_INTERVAL_SEC * (
+        1 + Config.QUOTE_PUBLISHING_JITTER
+    )
+    uncovered = 0.0
+    open_polls = polls[is_open]
+    time = polls[0]
+    while True:
+        session_open, session_close = calendar.get_session(time)
+        if session_open > polls[-1]:
+            break
+        session_polls = open_polls[
+            (open_polls >= session_open) & (open_polls <= session_close)
+        ]
+        edges = np.concatenate(([session_open], session_polls, [session_close]))
+        gaps = np.diff(edges) - max_interval
+        uncovered += gaps[gaps > 0].sum()
+        time = session_close + 1
+    return len(polls), int((~is_open).sum()), uncovered / 3600
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--year", type=int, default=2026)
+    args = parser.parse_args()
+
+    start = datetime(args.year, 1, 1, tzinfo=timezone.utc)
+    end = datetime(args.year + 1, 1, 1, tzinfo=timezone.utc)
+    calendar = MarketCalendar()
+    print(f"Year: {args.year}")
+    for title, polls in (
+        ("previous", poll_previously(start, end)),
+        ("adaptive", poll_adaptively(calendar, start, end)),
+    ):
+        count, closed_count, uncovered_hours = get_stats(calendar, polls)
+        print(
+            f"{title:>8}: {count:6} polls, {closed_count:6} of a closed market, "
+            f"{uncovered_hours:6.1f} session hours not polled"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Memory benchmark of updating the security cache from the tradable securities list.
+
+A local stub serves a gzipped list in the format of Financial Modeling Prep API.
+Compares the peak memory of the previous update, which decoded the whole list
+and created a security per row before filtering, with the streaming update.
+Every mode runs in its own process, so that the peak RSS isn't shared.
+Times are measured with tracing enabled, which slows down both modes.
+
+Usage: python -m benchmarks.securities_update_memory [--rows 70000]
+"""
+
+from app.components.market_data_api import MarketDataApi
+from app.components.security import Security
+from app.components.security_cache import SecurityCache
+from flask import Flask
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import gzip
+import json
+import random
+import requests
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+SUPPORTED_EXCHANGES = ("NYSE", "NASDAQ", "BATS", "CBOE", "AMEX")
+EXCHANGES = SUPPORTED_EXCHANGES + ("LSE", "XETRA", "TSX", "HKSE", "EURONEXT")
+
+
+def make_list(rows: int) -> bytes:
+    random.seed(0)
+    return json.dumps(
+        [
+            {
+                "symbol": f"S{i}",
+                "name": f"Security {i} Incorporated",
+                "price": round(random.uniform(1, 500), 2),
+                "exchange": "Exchange",
+                "exchangeShortName": random.choice(EXCHANGES),
+                "type": random.choice(("stock", "etf", "trust")),
+            }
+            for i in range(rows)
+        ]
+    ).encode()
+
+
+def serve_list(body: bytes) -> ThreadingHTTPServer:
+    compressed_body = gzip.compress(body)
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(compressed_body)))
+            self.end_headers()
+            self.wfile.write(compressed_body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def update_at_once(api: MarketDataApi, base_url: str, cache: SecurityCache):
+    # The previous update
+    rows = requests.get(f"{base_url}/available-traded/list").json()
+    securities = [
+        Security(
+            row["symbol"],
+            row["name"],
+            row["price"],
+            row["exchangeShortName"],
+            row["type"],
+        )
+        for row in rows
+    ]
+    supported_securities = []
+    for security in securities:
+        if not all(value is not None for value in security.to_dict().values()):
+            continue
+        if security.get_exchange() not in SUPPORTED_EXCHANGES:
+            continue
+        supported_securities.append(security)
+    cache.replace_securities(supported_securities)
+
+
+def update_streaming(api: MarketDataApi, base_url: str, cache: SecurityCache):
+    cache.replace_securities(api.iter_tradable_securities(SUPPORTED_EXCHANGES))
+
+
+def run_mode(mode: str, base_url: str):
+    app = Flask(__name__)
+    app.config.from_object("app.components.config.Config")
+    app.config["FINANCIAL_MODELING_PREP_API_BASE_URL"] = base_url
+    api = MarketDataApi()
+    api.init_app(app)
+    cache = SecurityCache()
+    update = update_at_once if mode == "at-once" else update_streaming
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    update(api, base_url, cache)
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        f"{mode:>9}: {len(cache.get_all_securities())} securities, "
+        f"peak traced {peak / 2**20:6.1f} MiB, max RSS {max_rss / 2**10:6.1f} MiB, "
+        f"{elapsed:5.2f} s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=70000)
+    parser.add_argument("--mode", choices=("at-once", "streaming"))
+    parser.add_argument("--base-url")
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.base_url)
+        return
+
+    body = make_list(args.rows)
+    server = serve_list(body)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    print(f"Rows: {args.rows}, list size: {len(body) / 2**20:.1f} MiB")
+    for mode in ("at-once", "streaming"):
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                __spec__.name,
+                "--mode",
+                mode,
+                "--base-url",
+                base_url,
+            ],
+            check=True,
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
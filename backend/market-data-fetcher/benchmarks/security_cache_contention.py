@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Benchmark of concurrent reads of the security cache.
+
+Request threads look quotes of a few symbols up as POST /market/quote does,
+while the scheduler thread updates prices and replaces the securities.
+Compares the previous cache, which took its lock twice per symbol, with
+the copy-on-write cache, which reads a snapshot without a lock.
+
+Usage: python -m benchmarks.security_cache_contention [--readers 8] [--seconds 3]
+"""
+
+from app.components.quote import Quote
+from app.components.security import Security, get_quotes
+from app.components.security_cache import SecurityCache
+import argparse
+import random
+import threading
+import time
+
+SECURITIES = 30000
+SYMBOLS_PER_REQUEST = 10
+
+
+class PreviousSecurityCache:
+    def __init__(self):
+        self._securities = dict()
+        self._lock = threading.Lock()
+
+    def has_security(self, symbol: str) -> bool:
+        with self._lock:
+            return symbol in self._securities
+
+    def get_security(self, symbol: str) -> Security:
+        with self._lock:
+            return self._securities[symbol]
+
+    def replace_securities(self, securities: list[Security]):
+        with self._lock:
+            self._securities = {
+                security.get_symbol(): security for security in securities
+            }
+
+    def update_prices(self, quotes: list[Quote]):
+        with self._lock:
+            for quote in quotes:
+                security = self._securities.get(quote.get_symbol())
+                if security is not None:
+                    security.set_price(quote.get_price())
+
+
+def read_previous(cache: PreviousSecurityCache, symbols: list[str]) -> dict:
+    result = []
+    for symbol in symbols:
+        if cache.has_security(symbol):
+            result.append(cache.get_security(symbol))
+    return get_quotes(result)
+
+
+def read_snapshot(cache: SecurityCache, symbols: list[str]) -> dict:
+    return get_quotes(cache.get_many(symbols).values())
+
+
+def run(cache, read, securities, readers: int, seconds: float) -> int:
+    cache.replace_securities(securities)
+    symbols = [security.get_symbol() for security in securities]
+    stop = threading.Event()
+    counts = [0] * readers
+
+    def reader(index):
+        rng = random.Random(index)
+        while not stop.is_set():
+            read(cache, rng.sample(symbols, SYMBOLS_PER_REQUEST))
+            counts[index] += 1
+
+    def writer():
+        rng = random.Random(-1)
+        while not stop.is_set():
+            quotes = [
+                Quote(symbol, rng.uniform(1, 500), 1000)
+                for symbol in rng.sample(symbols, 100)
+            ]
+            cache.update_prices(quotes)
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    securities = [
+        Security(f"S{i}", f"Security {i}", 100.0, "NYSE", "stock")
+        for i in range(SECURITIES)
+    ]
+    print(
+        f"Readers: {args.readers}, symbols per request: {SYMBOLS_PER_REQUEST}, "
+        f"{args.seconds} s"
+    )
+    for title, cache, read in (
+        ("previous", PreviousSecurityCache(), read_previous),
+        ("snapshot", SecurityCache(), read_snapshot),
+    ):
+        requests = run(cache, read, securities, args.readers, args.seconds)
+        print(f"{title:>8}: {requests / args.seconds:9.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Memory benchmark of cached securities.
+
+Compares the memory per security of the previous representation, a regular
+instance with the price and the strings parsed from every row, with the
+compact one: slots, interned exchanges and asset types and prices in the
+price table. Compares the time of updating prices of the cached securities too.
+
+Usage: python -m benchmarks.security_memory [--securities 50000]
+"""
+
+from app.components.quote import Quote
+from app.components.security import Security
+from app.components.security_cache import SecurityCache
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+EXCHANGES = ("NYSE", "NASDAQ", "BATS", "CBOE", "AMEX")
+ASSET_TYPES = ("stock", "etf", "trust")
+REPEATS = 10
+
+
+class PreviousSecurity:
+    def __init__(self, symbol, name, price, exchange, assetType):
+        self._symbol = symbol
+        self._name = name
+        self._price = price
+        self._exchange = exchange
+        self._assetType = assetType
+
+    def set_price(self, price):
+        self._price = price
+
+
+def make_rows(count: int) -> str:
+    random.seed(0)
+    return json.dumps(
+        [
+            {
+                "symbol": f"S{i}",
+                "name": f"Security {i} Incorporated",
+                "price": round(random.uniform(1, 500), 2),
+                "exchangeShortName": random.choice(EXCHANGES),
+                "type": random.choice(ASSET_TYPES),
+            }
+            for i in range(count)
+        ]
+    )
+
+
+def measure(make_security, rows: str, cache: SecurityCache = None) -> tuple:
+    # The memory retained after the parsed rows are released is measured.
+    # Strings of every row are separate objects as after parsing a response
+    tracemalloc.start()
+    parsed_rows = json.loads(rows)
+    securities = [
+        make_security(
+            row["symbol"],
+            row["name"],
+            row["price"],
+            row["exchangeShortName"],
+            row["type"],
+        )
+        for row in parsed_rows
+    ]
+    del parsed_rows
+    if cache is not None:
+        # The cache moves the prices into its price table
+        cache.replace_securities(securities)
+        securities = cache.get_all_securities()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return securities, size
+
+
+def update_previous_prices(securities: dict, quotes: list[Quote]) -> dict:
+    # The previous SecurityCache.update_prices and quotes of the securities
+    updated_securities = []
+    for quote in quotes:
+        security = securities.get(quote.get_symbol())
+        if security is None:
+            continue
+        security.set_price(quote.get_price())
+        updated_securities.append(security)
+    return {security._symbol: security._price for security in updated_securities}
+
+
+def measure_price_updates(update_prices, quotes: list[Quote]) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start_time = time.perf_counter()
+        update_prices(quotes)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--securities", type=int, default=50000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.securities)
+    quotes = [
+        Quote(f"S{i}", random.uniform(1, 500), 1000) for i in range(args.securities)
+    ]
+    print(f"Securities: {args.securities}")
+
+    previous_securities, size = measure(PreviousSecurity, rows)
+    print(f" previous: {size / args.securities:6.1f} bytes per security")
+    previous_cache = {
+        f"S{i}": security for i, security in enumerate(previous_securities)
+    }
+    update_time = measure_price_updates(
+        lambda quotes: update_previous_prices(previous_cache, quotes), quotes
+    )
+    print(f"           {update_time:6.2f} ms to update all prices, median")
+    del previous_securities
+
+    # The price table is built by the cache, so that its size is measured too
+    cache = SecurityCache()
+    securities, size = measure(Security, rows, cache)
+    print(f"  compact: {size / args.securities:6.1f} bytes per security")
+    update_time = measure_price_updates(cache.update_prices, quotes)
+    print(f"           {update_time:6.2f} ms to update all prices, median")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import fakeredis
+import pytest
+import redis
+from app.components.config import Config
+from flask import Flask
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    return app
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    # Clients of all components connect to the same in-memory server
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis,
+        "from_url",
+        lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs),
+    )
+    return server
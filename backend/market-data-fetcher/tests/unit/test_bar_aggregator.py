@@ -0,0 +1,117 @@
+"""
+This file (test_bar_aggregator.py) contains the unit tests for the bar aggregator.
+
+These tests apply quotes to the bars of a few symbols and check the prices
+and volumes of the current and the closed bars.
+"""
+
+import pytest
+from app.components.bar_aggregator import BarAggregator
+from app.components.quote import Quote
+
+# The start of a day in UTC
+DAY_START = 1_700_006_400
+
+
+@pytest.fixture
+def aggregator(app):
+    app.config.update(BAR_HISTORY_CAPACITY=2)
+    aggregator = BarAggregator()
+    aggregator.init_app(app)
+    return aggregator
+
+
+def get_current_bar(aggregator, symbol, interval):
+    *_, bar = aggregator.get_bars(symbol, interval)
+    return bar
+
+
+def test_quotes_are_aggregated_into_bars(aggregator):
+    for offset, price, volume in ((0, 10.0, 1000), (10, 12.0, 1500), (20, 9.0, 1800)):
+        assert (
+            aggregator.update([Quote("IBM", price, volume)], DAY_START + offset) == {}
+        )
+    bar = get_current_bar(aggregator, "IBM", "1m")
+    assert bar == {
+        "start": DAY_START,
+        "open": 10.0,
+        "high": 12.0,
+        "low": 9.0,
+        "close": 9.0,
+        # The volume before the first quote belongs to earlier bars
+        "volume": 800.0,
+        "closed": False,
+    }
+    # Day bars include the whole volume of the day
+    assert get_current_bar(aggregator, "IBM", "1d")["volume"] == 1800.0
+
+
+def test_new_interval_closes_bars(aggregator):
+    aggregator.update([Quote("IBM", 10.0, 1000), Quote("AAPL", 20.0, 500)], DAY_START)
+    aggregator.update([Quote("IBM", 11.0, 1200)], DAY_START + 30)
+    closed_bars = aggregator.update([Quote("IBM", 12.0, 1300)], DAY_START + 60)
+    assert list(closed_bars) == ["1m"]
+    assert closed_bars["1m"] == [
+        {
+            "symbol": "IBM",
+            "start": DAY_START,
+            "open": 10.0,
+            "high": 11.0,
+            "low": 10.0,
+            "close": 11.0,
+            "volume": 200.0,
+            "closed": True,
+        }
+    ]
+    bars = aggregator.get_bars("IBM", "1m")
+    assert [bar["closed"] for bar in bars] == [True, False]
+    assert bars[1]["start"] == DAY_START + 60
+    assert bars[1]["open"] == 12.0
+    assert bars[1]["volume"] == 100.0
+    # Bars of other symbols are closed by their own quotes only
+    assert aggregator.get_bars("AAPL", "1m")[0]["closed"] is False
+
+    closed_bars = aggregator.update([Quote("IBM", 13.0, 1400)], DAY_START + 3600)
+    assert sorted(closed_bars) == ["1h", "1m", "5m"]
+
+
+def test_closed_bars_are_bounded(aggregator):
+    for minute in range(5):
+        aggregator.update([Quote("IBM", 10.0 + minute, 0)], DAY_START + 60 * minute)
+    bars = aggregator.get_bars("IBM", "1m")
+    assert [bar["open"] for bar in bars] == [12.0, 13.0, 14.0]
+
+
+def test_volume_restarts_on_new_day(aggregator):
+    aggregator.update([Quote("IBM", 10.0, 5000)], DAY_START - 60)
+    aggregator.update([Quote("IBM", 10.0, 300)], DAY_START)
+    assert get_current_bar(aggregator, "IBM", "1m")["volume"] == 300.0
+    assert get_current_bar(aggregator, "IBM", "1d")["volume"] == 300.0
+
+
+def test_duplicate_quotes_apply_the_last_one(aggregator):
+    aggregator.update([Quote("IBM", 10.0, 100), Quote("IBM", 11.0, 200)], DAY_START)
+    bar = get_current_bar(aggregator, "IBM", "1m")
+    assert (bar["open"], bar["close"]) == (11.0, 11.0)
+
+
+def test_retained_symbols_keep_their_bars(aggregator):
+    symbols = [f"S{i}" for i in range(100)]
+    # More symbols than the initial capacity of the arrays
+    aggregator.update(
+        [Quote(symbol, float(i), i) for i, symbol in enumerate(symbols)], DAY_START
+    )
+    aggregator.update([Quote("S99", 1.0, 200)], DAY_START + 60)
+
+    assert aggregator.retain(["S1", "S99"]) == 98
+    assert aggregator.retain(["S1", "S99"]) == 0
+    assert aggregator.get_bars("S0", "1m") is None
+    assert get_current_bar(aggregator, "S1", "1m")["open"] == 1.0
+    bars = aggregator.get_bars("S99", "1m")
+    assert [bar["open"] for bar in bars] == [99.0, 1.0]
+    assert bars[1]["volume"] == 101.0
+
+    aggregator.update([Quote("S99", 2.0, 250), Quote("S2", 2.0, 0)], DAY_START + 70)
+    assert get_current_bar(aggregator, "S99", "1m")["high"] == 2.0
+    assert get_current_bar(aggregator, "S2", "1m")["open"] == 2.0
+    assert aggregator.get_bars("S99", "1m")[0]["open"] == 99.0
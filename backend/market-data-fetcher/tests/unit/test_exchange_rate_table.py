@@ -0,0 +1,73 @@
+"""
+This file (test_exchange_rate_table.py) contains the unit tests for
+the exchange rate table.
+
+These tests check the quoted, the inverse and the cross rates of the table.
+"""
+
+import pytest
+from app.components.exchange_rate import ExchangeRate
+from app.components.exchange_rate_table import ExchangeRateTable
+
+
+def make_table(*rates) -> ExchangeRateTable:
+    table = ExchangeRateTable()
+    table.replace_rates(
+        [
+            ExchangeRate(from_currency, to_currency, rate, rate)
+            for from_currency, to_currency, rate in rates
+        ]
+    )
+    return table
+
+
+def test_quoted_rates_are_midpoints():
+    table = ExchangeRateTable()
+    assert table.replace_rates([ExchangeRate("USD", "EUR", 0.94, 0.92)]) == 2
+    assert table.get_rate("USD", "EUR") == pytest.approx(0.93)
+    assert table.get_rate("EUR", "EUR") == 1.0
+    assert table.get_currencies() == ["USD", "EUR"]
+
+
+def test_inverse_rates():
+    table = make_table(("USD", "EUR", 0.8))
+    assert table.get_rate("EUR", "USD") == pytest.approx(1.25)
+
+
+def test_quoted_rates_take_precedence_over_inverse_rates():
+    table = make_table(("USD", "EUR", 0.8), ("EUR", "USD", 1.2))
+    assert table.get_rate("USD", "EUR") == pytest.approx(0.8)
+    assert table.get_rate("EUR", "USD") == pytest.approx(1.2)
+
+
+def test_cross_rates():
+    table = make_table(("USD", "EUR", 0.8), ("USD", "JPY", 150.0))
+    assert table.get_rate("EUR", "JPY") == pytest.approx(150.0 / 0.8)
+    assert table.get_rate("JPY", "EUR") == pytest.approx(0.8 / 150.0)
+
+
+def test_cross_rates_through_several_currencies():
+    table = make_table(("EUR", "USD", 1.25), ("USD", "GBP", 0.8), ("GBP", "JPY", 190.0))
+    assert table.get_rate("EUR", "JPY") == pytest.approx(1.25 * 0.8 * 190.0)
+    assert table.get_rate("JPY", "EUR") == pytest.approx(1 / (1.25 * 0.8 * 190.0))
+
+
+def test_unknown_rates():
+    # The two pairs aren't connected by any currency
+    table = make_table(("USD", "EUR", 0.8), ("GBP", "JPY", 190.0), ("CHF", "SEK", 0.0))
+    assert table.get_rate("USD", "JPY") is None
+    assert table.get_rate("USD", "XXX") is None
+    # A rate which isn't positive is ignored
+    assert table.get_rate("CHF", "SEK") is None
+    assert table.get_rates("USD", ["EUR", "JPY", "XXX", "EUR", "USD"]) == {
+        "EUR": pytest.approx(0.8),
+        "USD": 1.0,
+    }
+    assert table.get_rates("XXX", ["USD"]) is None
+
+
+def test_rates_are_replaced():
+    table = make_table(("USD", "EUR", 0.8))
+    table.replace_rates([ExchangeRate("USD", "GBP", 0.7, 0.7)])
+    assert table.get_rate("USD", "EUR") is None
+    assert table.get_rate("GBP", "USD") == pytest.approx(1 / 0.7)
@@ -0,0 +1,79 @@
+"""
+This file (test_leader_election.py) contains the unit tests for the leader election.
+
+These tests run several instances against an in-memory Redis server.
+"""
+
+import pytest
+import time
+from app.components.leader_election import LEADER_KEY, LeaderElection
+
+LEASE_SEC = 0.2
+
+
+@pytest.fixture
+def instances(app, redis_server):
+    app.config.update(LEADER_LEASE_SEC=LEASE_SEC)
+    instances = [LeaderElection() for _ in range(2)]
+    for instance in instances:
+        instance.init_app(app)
+    return instances
+
+
+def test_single_leader_is_elected(instances):
+    leader, follower = instances
+    assert leader.campaign()
+    assert not follower.campaign()
+    assert leader.is_leader()
+    assert not follower.is_leader()
+    assert leader.get_instance_id() != follower.get_instance_id()
+
+
+def test_leader_renews_lease(instances):
+    leader, follower = instances
+    leader.campaign()
+    for _ in range(3):
+        time.sleep(LEASE_SEC / 2)
+        assert leader.campaign()
+        assert not follower.campaign()
+
+
+def test_lease_expires_without_renewal(instances):
+    leader, follower = instances
+    leader.campaign()
+    time.sleep(LEASE_SEC * 1.5)
+    # The leader stops leading by its own clock before anyone takes over
+    assert not leader.is_leader()
+    assert follower.campaign()
+    # The previous leader can't renew the lease of the new one
+    assert not leader.campaign()
+    assert follower.is_leader()
+
+
+def test_released_lease_is_taken_over(instances):
+    leader, follower = instances
+    leader.campaign()
+    leader.release()
+    assert not leader.is_leader()
+    assert follower.campaign()
+
+
+def test_lease_of_another_instance_is_not_released(instances, app):
+    leader, follower = instances
+    leader.campaign()
+    follower.release()
+    assert leader.campaign()
+    assert leader._redis.get(LEADER_KEY) == leader.get_instance_id()
+
+
+def test_lease_is_regained_after_loss(instances):
+    leader, follower = instances
+    leader.campaign()
+    time.sleep(LEASE_SEC * 1.5)
+    assert follower.campaign()
+    follower.release()
+    # The previous leader becomes the leader again, not remains it
+    assert not leader.is_leader()
+    assert leader.campaign()
+    assert leader.is_leader()
+    assert not follower.is_leader()
@@ -0,0 +1,112 @@
+"""
+This file (test_market_calendar.py) contains the unit tests for the market calendar.
+
+These tests check the NYSE holidays, the early closes and the sessions found
+for times around them.
+"""
+
+import pytest
+from app.components.market_calendar import (
+    MarketCalendar,
+    get_early_closes,
+    get_holidays,
+)
+from datetime import date, datetime, timezone
+
+
+def timestamp(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_holidays():
+    assert get_holidays(2026) == {
+        date(2026, 1, 1),
+        date(2026, 1, 19),
+        date(2026, 2, 16),
+        # Good Friday
+        date(2026, 4, 3),
+        date(2026, 5, 25),
+        date(2026, 6, 19),
+        # Independence Day on Saturday is observed on Friday
+        date(2026, 7, 3),
+        date(2026, 9, 7),
+        date(2026, 11, 26),
+        date(2026, 12, 25),
+    }
+
+
+@pytest.mark.parametrize(
+    "year, good_friday", [(2024, date(2024, 3, 29)), (2025, date(2025, 4, 18))]
+)
+def test_good_friday(year, good_friday):
+    assert good_friday in get_holidays(year)
+
+
+def test_new_year_on_saturday_is_not_observed():
+    # January 1, 2022 was a Saturday, the market was open on December 31, 2021
+    assert date(2021, 12, 31) not in get_holidays(2021) | get_holidays(2022)
+    assert not any(day.month == 1 and day.day < 3 for day in get_holidays(2022))
+
+
+def test_juneteenth_since_2022():
+    assert date(2021, 6, 18) not in get_holidays(2021)
+    assert date(2022, 6, 20) in get_holidays(2022)
+
+
+def test_early_closes():
+    # July 3, 2026 is a holiday, so the market closes early on two days only
+    assert get_early_closes(2026) == {date(2026, 11, 27), date(2026, 12, 24)}
+    assert get_early_closes(2025) == {
+        date(2025, 7, 3),
+        date(2025, 11, 28),
+        date(2025, 12, 24),
+    }
+
+
+@pytest.mark.parametrize(
+    "time, session",
+    [
+        # Standard time, 9:30-16:00 in New York is 14:30-21:00 UTC
+        (timestamp(2026, 1, 5, 15), ((2026, 1, 5, 14, 30), (2026, 1, 5, 21))),
+        # Daylight saving time, 13:30-20:00 UTC
+        (timestamp(2026, 3, 9, 13), ((2026, 3, 9, 13, 30), (2026, 3, 9, 20))),
+        # After the close on Friday the next session is on Monday
+        (timestamp(2026, 3, 13, 20, 1), ((2026, 3, 16, 13, 30), (2026, 3, 16, 20))),
+        # Good Friday
+        (timestamp(2026, 4, 2, 21), ((2026, 4, 6, 13, 30), (2026, 4, 6, 20))),
+        # The early close after Thanksgiving Day at 13:00 in New York
+        (timestamp(2026, 11, 27, 15), ((2026, 11, 27, 14, 30), (2026, 11, 27, 18))),
+        # The next session is in the next year
+        (timestamp(2026, 12, 31, 22), ((2027, 1, 4, 14, 30), (2027, 1, 4, 21))),
+    ],
+)
+def test_sessions(time, session):
+    calendar = MarketCalendar()
+    expected_open, expected_close = session
+    assert calendar.get_session(time) == (
+        timestamp(*expected_open),
+        timestamp(*expected_close),
+    )
+
+
+def test_is_open():
+    calendar = MarketCalendar()
+    assert not calendar.is_open(timestamp(2026, 3, 9, 13, 29, 59))
+    assert calendar.is_open(timestamp(2026, 3, 9, 13, 30))
+    assert calendar.is_open(timestamp(2026, 3, 9, 20))
+    assert not calendar.is_open(timestamp(2026, 3, 9, 20, 0, 1))
+    assert not calendar.is_open(timestamp(2026, 3, 14, 15))
+
+
+def test_sessions_of_distant_years():
+    calendar = MarketCalendar()
+    calendar.get_session(timestamp(2026, 6, 1))
+    # The table is rebuilt for the years around the time in both directions
+    assert calendar.get_session(timestamp(2031, 1, 1)) == (
+        timestamp(2031, 1, 2, 14, 30),
+        timestamp(2031, 1, 2, 21),
+    )
+    assert calendar.get_session(timestamp(2020, 1, 1)) == (
+        timestamp(2020, 1, 2, 14, 30),
+        timestamp(2020, 1, 2, 21),
+    )
@@ -0,0 +1,64 @@
+"""
+This file (test_market_data_publisher.py) contains the unit tests for
+the market data publisher.
+
+These tests read the published messages from a stream of an in-memory Redis server.
+"""
+
+import msgpack
+import numpy as np
+import pytest
+from app.components.market_data_publisher import (
+    MARKET_DATA_CHANNEL,
+    QUOTES_DELTA,
+    QUOTES_SNAPSHOT,
+    STREAMS_TRANSPORT,
+    STREAM_DATA_FIELD,
+    MarketDataPublisher,
+)
+
+
+@pytest.fixture
+def publisher(app, redis_server):
+    app.config.update(QUOTE_TRANSPORT=STREAMS_TRANSPORT, QUOTE_CHANNEL_SHARDS=0)
+    publisher = MarketDataPublisher()
+    publisher.init_app(app)
+    with app.app_context():
+        yield publisher
+
+
+def read_messages(publisher):
+    messages = []
+    for _, fields in publisher._redis.xrange(MARKET_DATA_CHANNEL):
+        _, _, payload = msgpack.unpackb(fields[STREAM_DATA_FIELD.encode()])
+        message = msgpack.unpackb(payload)
+        prices = np.frombuffer(message["prices"], "<f8").tolist()
+        messages.append(
+            (
+                message["type"],
+                message["sequence"],
+                dict(zip(message["symbols"], prices)),
+            )
+        )
+    return messages
+
+
+def test_only_changed_quotes_are_published(publisher):
+    publisher.publish_quotes({"IBM": 150.0, "AAPL": 190.0})
+    publisher.publish_quotes({"IBM": 150.0, "AAPL": 191.0})
+    publisher.publish_quotes({"IBM": 150.0, "AAPL": 191.0})
+    assert read_messages(publisher) == [
+        (QUOTES_SNAPSHOT, 1, {"IBM": 150.0, "AAPL": 190.0}),
+        (QUOTES_DELTA, 2, {"AAPL": 191.0}),
+    ]
+
+
+def test_reset_publishes_snapshot(publisher):
+    publisher.publish_quotes({"IBM": 150.0, "AAPL": 190.0})
+    # Another leader has published other prices of IBM in the meantime,
+    # so the unchanged quotes of the instance are sent again
+    publisher.reset()
+    publisher.publish_quotes({"IBM": 150.0, "AAPL": 191.0})
+    assert read_messages(publisher)[1:] == [
+        (QUOTES_SNAPSHOT, 2, {"IBM": 150.0, "AAPL": 191.0}),
+    ]
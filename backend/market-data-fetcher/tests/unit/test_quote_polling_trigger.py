@@ -0,0 +1,131 @@
+"""
+This file (test_quote_polling_trigger.py) contains the unit tests for
+the quote polling trigger.
+
+These tests check the intervals between polls within sessions, the polls
+at the opens and the closes and the bounds of the jitter.
+"""
+
+import pytest
+import random
+from app.components.market_calendar import MarketCalendar
+from app.components.quote_polling_trigger import QuotePollingTrigger
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+INTERVAL = 120
+EDGE_INTERVAL = 30
+EDGE_WINDOW = 15 * 60
+JITTER = 0.1
+
+# The session of Monday, March 9, 2026 is 13:30-20:00 UTC
+SESSION_OPEN = datetime(2026, 3, 9, 13, 30, tzinfo=timezone.utc)
+SESSION_CLOSE = datetime(2026, 3, 9, 20, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def trigger():
+    random.seed(0)
+    return QuotePollingTrigger(
+        MarketCalendar(),
+        interval=INTERVAL,
+        edge_interval=EDGE_INTERVAL,
+        edge_window=EDGE_WINDOW,
+        jitter=JITTER,
+    )
+
+
+def get_delays(trigger, now: datetime, count: int = 200) -> list[float]:
+    return [
+        (trigger.get_next_fire_time(None, now) - now).total_seconds()
+        for _ in range(count)
+    ]
+
+
+def assert_jittered(delays: list[float], low: float, high: float):
+    assert low <= min(delays) and max(delays) <= high
+    # The delays are spread over the range
+    assert max(delays) - min(delays) > (high - low) / 2
+
+
+def test_regular_interval_within_session(trigger):
+    delays = get_delays(trigger, SESSION_OPEN + timedelta(hours=2))
+    assert_jittered(delays, INTERVAL * (1 - JITTER), INTERVAL * (1 + JITTER))
+
+
+@pytest.mark.parametrize(
+    "now",
+    [
+        SESSION_OPEN + timedelta(minutes=5),
+        SESSION_CLOSE - timedelta(minutes=10),
+    ],
+)
+def test_edge_interval_after_open_and_before_close(trigger, now):
+    delays = get_delays(trigger, now)
+    assert_jittered(delays, EDGE_INTERVAL * (1 - JITTER), EDGE_INTERVAL * (1 + JITTER))
+
+
+def test_last_poll_is_at_close(trigger):
+    now = SESSION_CLOSE - timedelta(seconds=10)
+    assert trigger.get_next_fire_time(None, now) == SESSION_CLOSE
+
+
+@pytest.mark.parametrize(
+    "now, next_open",
+    [
+        # Before the open
+        (
+            datetime(2026, 3, 9, 8, tzinfo=timezone.utc),
+            SESSION_OPEN,
+        ),
+        # At the close, the next session is the next day
+        (
+            SESSION_CLOSE,
+            SESSION_OPEN + timedelta(days=1),
+        ),
+        # Over the weekend
+        (
+            datetime(2026, 3, 14, 15, tzinfo=timezone.utc),
+            datetime(2026, 3, 16, 13, 30, tzinfo=timezone.utc),
+        ),
+        # Over Good Friday
+        (
+            datetime(2026, 4, 2, 20, tzinfo=timezone.utc),
+            datetime(2026, 4, 6, 13, 30, tzinfo=timezone.utc),
+        ),
+        # After the early close on Christmas Eve at 18:00 UTC
+        (
+            datetime(2026, 12, 24, 18, tzinfo=timezone.utc),
+            datetime(2026, 12, 28, 14, 30, tzinfo=timezone.utc),
+        ),
+    ],
+)
+def test_first_poll_is_at_next_open(trigger, now, next_open):
+    delays = get_delays(trigger, now)
+    offset = (next_open - now).total_seconds()
+    # Replicas don't poll at once at the open either
+    assert_jittered(delays, offset, offset + EDGE_INTERVAL * JITTER)
+
+
+def test_early_close_ends_session(trigger):
+    now = datetime(2026, 11, 27, 17, 59, 50, tzinfo=timezone.utc)
+    assert trigger.get_next_fire_time(None, now) == datetime(
+        2026, 11, 27, 18, tzinfo=timezone.utc
+    )
+
+
+def test_fire_time_is_in_time_zone_of_now(trigger):
+    new_york = ZoneInfo("America/New_York")
+    now = (SESSION_OPEN + timedelta(hours=2)).astimezone(new_york)
+    assert trigger.get_next_fire_time(None, now).tzinfo == new_york
+
+
+def test_no_polls_while_market_is_closed(trigger):
+    calendar = MarketCalendar()
+    now = datetime(2026, 3, 13, 12, tzinfo=timezone.utc)
+    end = datetime(2026, 3, 17, tzinfo=timezone.utc)
+    while now < end:
+        now = trigger.get_next_fire_time(None, now)
+        assert calendar.is_open(now.timestamp())
+        # The same time is never polled twice
+        now += timedelta(milliseconds=1)
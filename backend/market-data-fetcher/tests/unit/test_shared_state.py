@@ -0,0 +1,49 @@
+"""
+This file (test_shared_state.py) contains the unit tests for the shared state.
+
+These tests save the state of the leader and load it as a follower
+on an in-memory Redis server.
+"""
+
+import pytest
+from app.components.exchange_rate import ExchangeRate
+from app.components.quote import Quote
+from app.components.security import Security
+from app.components.shared_state import SharedState
+
+
+@pytest.fixture
+def shared_state(app, redis_server):
+    shared_state = SharedState()
+    shared_state.init_app(app)
+    return shared_state
+
+
+def test_quotes_are_loaded_when_newer(shared_state):
+    assert shared_state.load_quotes(0.0) is None
+    shared_state.save_quotes([Quote("IBM", 150.5, 1000), Quote("AAPL", 190.0, 0)], 10)
+    quotes_time, quotes = shared_state.load_quotes(0.0)
+    assert quotes_time == 10
+    assert [(q.get_symbol(), q.get_price(), q.get_volume()) for q in quotes] == [
+        ("IBM", 150.5, 1000),
+        ("AAPL", 190.0, 0),
+    ]
+    assert shared_state.load_quotes(quotes_time) is None
+
+
+def test_exchange_rates_are_loaded(shared_state):
+    shared_state.save_exchange_rates([ExchangeRate("USD", "EUR", 0.94, 0.92)])
+    updated_at, rates = shared_state.load_exchange_rates(0.0)
+    assert [
+        (r.get_from_currency(), r.get_to_currency(), r.get_ask(), r.get_bid())
+        for r in rates
+    ] == [("USD", "EUR", 0.94, 0.92)]
+    assert shared_state.load_exchange_rates(updated_at) is None
+
+
+def test_securities_are_loaded(shared_state):
+    security = Security("IBM", "IBM Corp.", 150.5, "NYSE", "stock")
+    shared_state.save_securities([security])
+    updated_at, securities = shared_state.load_securities(0.0)
+    assert [loaded.to_row() for loaded in securities] == [security.to_row()]
+    assert shared_state.load_securities(updated_at) is None
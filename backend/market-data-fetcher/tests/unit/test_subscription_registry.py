@@ -0,0 +1,69 @@
+"""
+This file (test_subscription_registry.py) contains the unit tests for
+the subscription registry.
+
+These tests run the scripts of the registry on an in-memory Redis server.
+"""
+
+import pytest
+import time
+from app.components.subscription_registry import SubscriptionRegistry
+
+TTL_SEC = 0.2
+
+
+@pytest.fixture
+def registry(app, redis_server):
+    app.config.update(QUOTE_SUBSCRIPTION_TTL_SEC=TTL_SEC)
+    registry = SubscriptionRegistry()
+    registry.init_app(app)
+    return registry
+
+
+def test_subscriptions_are_counted(registry):
+    registry.subscribe(["IBM", "AAPL"])
+    registry.subscribe(["IBM", "IBM"])
+    assert sorted(registry.get_symbols()) == ["AAPL", "IBM"]
+
+    registry.unsubscribe(["IBM", "AAPL"])
+    assert registry.get_symbols() == ["IBM"]
+    registry.unsubscribe(["IBM"])
+    assert registry.get_symbols() == []
+
+
+def test_unknown_symbols_are_not_unsubscribed(registry):
+    registry.unsubscribe(["IBM"])
+    registry.subscribe(["IBM"])
+    # The earlier cancellation doesn't cancel the new subscription
+    assert registry.get_symbols() == ["IBM"]
+
+
+def test_renewal_subscribes_for_unknown_symbols(registry):
+    registry.subscribe(["IBM"])
+    assert registry.renew(["IBM", "AAPL"]) == 1
+    assert registry.renew([]) == 0
+    # The renewal doesn't add a subscription to the known symbols
+    registry.unsubscribe(["IBM", "AAPL"])
+    assert registry.get_symbols() == []
+
+
+def test_expired_symbols_are_evicted(registry):
+    registry.subscribe(["IBM", "AAPL"])
+    registry.subscribe(["MSFT"])
+    time.sleep(TTL_SEC / 2)
+    registry.renew(["AAPL"])
+    time.sleep(TTL_SEC * 0.75)
+    assert registry.evict_expired() == 2
+    assert registry.get_symbols() == ["AAPL"]
+    assert registry.evict_expired() == 0
+    # An evicted symbol is subscribed for from scratch
+    registry.subscribe(["IBM"])
+    registry.unsubscribe(["IBM"])
+    assert registry.get_symbols() == ["AAPL"]
+
+
+def test_registry_is_shared_by_instances(app, registry):
+    other_registry = SubscriptionRegistry()
+    other_registry.init_app(app)
+    other_registry.subscribe(["IBM"])
+    assert registry.get_symbols() == ["IBM"]
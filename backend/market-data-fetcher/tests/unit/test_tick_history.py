@@ -0,0 +1,74 @@
+"""
+This file (test_tick_history.py) contains the unit tests for the intraday ticks.
+
+These tests check the order and the bounds of the ticks kept in ring buffers.
+"""
+
+import pytest
+from app.components.quote import Quote
+from app.components.tick_history import TickHistory, TickRingBuffer
+
+
+@pytest.fixture
+def tick_history(app):
+    app.config.update(TICK_HISTORY_CAPACITY=3, TICK_HISTORY_MAX_SYMBOLS=2)
+    tick_history = TickHistory()
+    tick_history.init_app(app)
+    return tick_history
+
+
+def test_ring_buffer_keeps_latest_ticks():
+    buffer = TickRingBuffer(capacity=3)
+    for time in range(1, 6):
+        buffer.append(time, time * 10.0, time * 100)
+    times, prices, volumes = buffer.get_since()
+    assert times.tolist() == [3.0, 4.0, 5.0]
+    assert prices.tolist() == [30.0, 40.0, 50.0]
+    assert volumes.tolist() == [300.0, 400.0, 500.0]
+
+
+@pytest.mark.parametrize(
+    "since, expected_times",
+    [(None, [4, 5, 6, 7]), (3, [4, 5, 6, 7]), (5, [6, 7]), (6.5, [7]), (7, [])],
+)
+def test_ring_buffer_gets_ticks_since_time(since, expected_times):
+    buffer = TickRingBuffer(capacity=4)
+    # The ticks wrap around the end of the arrays
+    for time in range(1, 8):
+        buffer.append(time, 1.0, 0)
+    times, _, _ = buffer.get_since(since)
+    assert times.tolist() == expected_times
+
+
+def test_ring_buffer_skips_out_of_order_ticks():
+    buffer = TickRingBuffer(capacity=3)
+    buffer.append(2, 20.0, 0)
+    buffer.append(2, 21.0, 0)
+    buffer.append(1, 10.0, 0)
+    times, prices, _ = buffer.get_since()
+    assert times.tolist() == [2.0]
+    assert prices.tolist() == [20.0]
+
+
+def test_ticks_are_recorded_per_symbol(tick_history):
+    tick_history.record([Quote("IBM", 150.0, 1000), Quote("AAPL", 190.0, None)], 1)
+    tick_history.record([Quote("IBM", 151.0, 1200)], 2)
+    times, prices, volumes = tick_history.get_ticks("IBM")
+    assert times.tolist() == [1.0, 2.0]
+    assert prices.tolist() == [150.0, 151.0]
+    assert volumes.tolist() == [1000.0, 1200.0]
+    # A quote without a volume is recorded with a zero volume
+    assert tick_history.get_ticks("AAPL")[2].tolist() == [0.0]
+    assert tick_history.get_ticks("MSFT") is None
+
+
+def test_ticks_are_bounded_by_symbols(tick_history):
+    quotes = [Quote(symbol, 100.0, 0) for symbol in ("IBM", "AAPL", "MSFT")]
+    tick_history.record(quotes, 1)
+    assert tick_history.get_ticks("MSFT") is None
+
+    assert tick_history.retain(["AAPL", "MSFT"]) == 1
+    assert tick_history.get_ticks("IBM") is None
+    tick_history.record(quotes[1:], 2)
+    assert tick_history.get_ticks("AAPL")[0].tolist() == [1.0, 2.0]
+    assert tick_history.get_ticks("MSFT")[0].tolist() == [2.0]
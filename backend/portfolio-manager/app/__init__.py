@@ -6,8 +6,12 @@ from app.components.extensions import (
     bcrypt,
 )
 from app.components.market_data_subscriber import market_data_subscriber
+from app.components.quote_broadcaster import quote_broadcaster
 from app.components.market_data_fetcher import market_data_fetcher
 from app.components.securities_manager import securities_manager
+from app.components.currencies_manager import currencies_manager
+from app.components.shared_cache import shared_cache
+from app.components.returns import portfolio_returns
 from connexion import FlaskApp
 from connexion.resolver import RelativeResolver
 from flask_jwt_extended import (
@@ -70,8 +74,12 @@ def initialize_extensions(app):
 
 def initialize_components(app):
     market_data_subscriber.init_app(app)
+    quote_broadcaster.init_app(app)
     market_data_fetcher.init_app(app)
+    shared_cache.init_app(app)
+    currencies_manager.init_app(app)
     securities_manager.init_app(app)
+    portfolio_returns.init_app(app)
 
 
 def configure_logging(app):
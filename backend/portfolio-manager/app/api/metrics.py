@@ -0,0 +1,13 @@
+from app.components.errors import make_error_response
+from app.components.market_data_fetcher import market_data_fetcher
+from flask_jwt_extended import jwt_required
+
+
+@jwt_required()
+def read_market_data_fetcher():
+    try:
+        return market_data_fetcher.get_stats(), 200
+    except Exception as error:
+        return make_error_response(
+            500, f"Cannot read market-data-fetcher metrics, error: {error}"
+        )
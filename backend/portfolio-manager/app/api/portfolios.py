@@ -1,6 +1,9 @@
 from app.components.extensions import db
 from app.components.errors import make_error_response, PortfolioManagerError
+from app.components.returns import portfolio_returns
+from app.components.valuation import portfolio_valuation
 from app.models.portfolio import Portfolio, portfolio_schema, portfolios_schema
+from datetime import datetime, timezone
 from flask_jwt_extended import get_current_user, jwt_required
 from sqlalchemy import asc
 
@@ -34,6 +37,19 @@ def get_portfolio_by_id(portfolio_id):
     return portfolio
 
 
+def parse_period_bound(name: str, value: str):
+    if value is None:
+        return None
+    try:
+        bound = datetime.fromisoformat(value)
+    except ValueError as error:
+        raise PortfolioManagerError(
+            400, f"Parameter '{name}' is not a valid datetime, error: {error}"
+        )
+    # Datetimes without a timezone are in UTC as trade datetimes
+    return bound if bound.tzinfo else bound.replace(tzinfo=timezone.utc)
+
+
 def get_portfolio_by_name(portfolio_name):
     user_id = get_current_user().id
     portfolio = db.session.execute(
@@ -76,6 +92,41 @@ def read_one(portfolio_id):
         )
 
 
+@jwt_required()
+def valuation(portfolio_id):
+    try:
+        portfolio = get_portfolio_by_id(portfolio_id)
+        return portfolio_valuation.value_portfolio(portfolio.id), 200
+    except PortfolioManagerError as error:
+        return make_error_response(error.status, error.detail)
+    except Exception as error:
+        db.session.rollback()
+        return make_error_response(
+            500, f"Cannot value a portfolio with id {portfolio_id}, error: {error}"
+        )
+
+
+# 'from' is a Python keyword, so the period arrives in kwargs
+@jwt_required()
+def returns(portfolio_id, **kwargs):
+    try:
+        portfolio = get_portfolio_by_id(portfolio_id)
+        start = parse_period_bound("from", kwargs.get("from"))
+        end = parse_period_bound("to", kwargs.get("to"))
+        if start and end and start >= end:
+            raise PortfolioManagerError(400, "Parameter 'from' must precede 'to'")
+        return portfolio_returns.get_returns(portfolio.id, start, end), 200
+    except PortfolioManagerError as error:
+        return make_error_response(error.status, error.detail)
+    except Exception as error:
+        db.session.rollback()
+        return make_error_response(
+            500,
+            f"Cannot compute returns of a portfolio with id {portfolio_id}, "
+            f"error: {error}",
+        )
+
+
 @jwt_required()
 def create(portfolio):
     try:
@@ -1,4 +1,5 @@
-from app.components.market_data_subscriber import market_data_subscriber
+from app.components.extensions import db
+from app.components.quote_broadcaster import quote_broadcaster
 from app.components.market_data_fetcher import market_data_fetcher
 from app.components.errors import make_error_response
 from flask_jwt_extended import get_current_user, jwt_required
@@ -7,32 +8,26 @@ from flask import (
     stream_with_context,
     Response,
 )
-import redis
 import json
 
-MARKET_DATA_CHANNEL = "market-data-channel"
-
-
-def filter_quotes_by_securities(quotes: dict, securities: list[str]) -> dict:
-    result = {}
-    for security, price in quotes.items():
-        if security in securities:
-            result[security] = price
-    return result
-
 
 def wrap_quotes(quotes: dict) -> str:
     return f"data: {json.dumps(quotes)} \n\n"
 
 
+# Clients ignore comments, so they are used as heartbeats
+HEARTBEAT = ": heartbeat\n\n"
+
+
 @jwt_required()
 def stream(securities):
     current_app.logger.info(f"Subscribe for {securities} quotes streaming")
     try:
         quotes = market_data_fetcher.subscribe_for_quotes(securities)
         current_app.logger.info(f"Quotes: {quotes}")
-        current_user = get_current_user()
-        subscriber = market_data_subscriber.subscribe(MARKET_DATA_CHANNEL)
+        user_id = get_current_user().id
+        heartbeat_interval = current_app.config.get("QUOTE_STREAM_HEARTBEAT_SEC")
+        subscription = quote_broadcaster.subscribe(securities)
 
         def generator(quotes):
             try:
@@ -40,34 +35,36 @@ def stream(securities):
                 yield wrap_quotes(quotes)
 
                 # Stream the quotes from regular updates
-                for payload in subscriber.listen():
-                    current_app.logger.info(f"Redis payload: {payload}")
-                    if payload["type"] == "message":
-                        quotes = json.loads(payload["data"])
-                        quotes = filter_quotes_by_securities(
-                            quotes=quotes, securities=securities
-                        )
-                        current_app.logger.info(
-                            f"Send quotes: {quotes} for user {current_user.id}"
-                        )
-                        yield wrap_quotes(quotes)
+                while True:
+                    quotes = subscription.get(timeout=heartbeat_interval)
+                    yield HEARTBEAT if quotes is None else wrap_quotes(quotes)
             finally:
+                quote_broadcaster.unsubscribe(subscription)
                 try:
-                    subscriber.unsubscribe(MARKET_DATA_CHANNEL)
-                    current_app.logger.info(
-                        f"A user {current_user.id} successfully unsibscribed from quotes streaming"
-                    )
-                except redis.ConnectionError:
+                    market_data_fetcher.unsubscribe_from_quotes(securities)
+                except Exception as error:
+                    # Subscriptions which aren't cancelled expire anyway
                     current_app.logger.error(
-                        f"A user {current_user.id} cannot unsubscribe"
+                        f"Unable to unsubscribe from quotes. {error}"
                     )
+                current_app.logger.info(
+                    f"A user {user_id} unsubscribed from quotes streaming, "
+                    f"{subscription.dropped} updates have been dropped"
+                )
 
         current_app.logger.info(
-            f"A user {current_user.id} successfully subscribed for {securities} quotes streaming"
+            f"A user {user_id} successfully subscribed for {securities} quotes "
+            f"streaming, active streams: {quote_broadcaster.get_subscriptions_count()}"
         )
+        # The stream doesn't use the database, so the connection used to load
+        # the user goes back to the pool instead of being held by the stream
+        db.session.remove()
         # stream_with_context will keep the request context active during the generator
         return Response(
-            stream_with_context(generator(quotes)), content_type="text/event-stream"
+            stream_with_context(generator(quotes)),
+            content_type="text/event-stream",
+            # Disables buffering of the stream by nginx
+            headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
         )
     except Exception as error:
         current_app.logger.error(f"Unable to subscribe to quotes. {error}")
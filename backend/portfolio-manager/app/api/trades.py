@@ -1,6 +1,7 @@
 from datetime import datetime
 from app.components.extensions import db
 from app.components.errors import make_error_response, PortfolioManagerError
+from app.components.positions_manager import positions_manager
 from app.api.portfolios import get_portfolio_by_id
 from app.models.portfolio import (
     Trade,
@@ -93,6 +94,7 @@ def create(portfolio_id, trade_params):
         trade_params["portfolio_id"] = portfolio_id
         new_trade = trade_schema.load(trade_params, session=db.session)
         portfolio.trades.append(new_trade)
+        positions_manager.on_trade_created(new_trade)
         db.session.commit()
         return trade_schema.dump(new_trade), 201
     except PortfolioManagerError as error:
@@ -110,6 +112,7 @@ def update(portfolio_id, trade_id, trade_params):
         trade_params["portfolio_id"] = portfolio_id
         new_trade = trade_schema.load(trade_params, session=db.session)
         existing_trade = get_trade(portfolio_id, trade_id)
+        previous_security_id = existing_trade.security_id
         existing_trade.currency_id = new_trade.currency_id
         existing_trade.security_id = new_trade.security_id
         existing_trade.trade_type = new_trade.trade_type
@@ -117,6 +120,9 @@ def update(portfolio_id, trade_id, trade_params):
         existing_trade.unit_price = new_trade.unit_price
         existing_trade.quantity = new_trade.quantity
         existing_trade.brokerage_fee = new_trade.brokerage_fee
+        positions_manager.on_trades_changed(
+            portfolio_id, {previous_security_id, existing_trade.security_id}
+        )
         db.session.commit()
         return trade_schema.dump(existing_trade), 200
     except PortfolioManagerError as error:
@@ -132,6 +138,7 @@ def delete(portfolio_id, trade_id):
         get_portfolio_by_id(portfolio_id)
         trade = get_trade(portfolio_id, trade_id)
         db.session.delete(trade)
+        positions_manager.on_trades_changed(portfolio_id, {trade.security_id})
         db.session.commit()
         return "", 204
     except PortfolioManagerError as error:
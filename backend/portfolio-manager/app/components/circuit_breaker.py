@@ -0,0 +1,64 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing dependency for a while.
+
+    The circuit opens after a number of consecutive failures and rejects calls
+    until the reset timeout passes. Then a single trial call is let through:
+    its success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        :param failure_threshold: The number of consecutive failures opening the circuit.
+        :param reset_timeout: For how many seconds the open circuit rejects calls.
+        """
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may be made. A caller which is allowed to make
+        a call must report its result with record_success or record_failure.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self._reset_timeout
+            ):
+                self._state = self.HALF_OPEN
+                return True
+            # The trial call is in flight or the circuit is open
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self._failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def get_state(self) -> str:
+        with self._lock:
+            return self._state
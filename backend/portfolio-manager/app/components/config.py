@@ -28,10 +28,26 @@ class Config(object):
     # system that is built on top of the SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Max number of connections to the database which the service may open.
+    # They are split evenly between gunicorn workers, every worker has
+    # a pool of persistent connections and may open as many temporary ones
+    DATABASE_MAX_CONNECTIONS = int(os.getenv("DATABASE_MAX_CONNECTIONS", 80))
+    WEB_WORKERS = int(os.getenv("GUNICORN_WORKERS", 4))
+    DATABASE_CONNECTIONS_PER_WORKER = max(2, DATABASE_MAX_CONNECTIONS // WEB_WORKERS)
+
     # Makes sure that DB connections from the pool are still valid.
     # It's importation for entire application since many DBaaS options
-    # automatically close idle connections
-    SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": True}
+    # automatically close idle connections.
+    # The pool caps the DB use of a worker's 2000 greenlets (gunicorn's
+    # worker_connections) at DATABASE_MAX_CONNECTIONS // GUNICORN_WORKERS
+    # connections, the rest wait for a free one for pool_timeout seconds at most
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_pre_ping": True,
+        "pool_size": DATABASE_CONNECTIONS_PER_WORKER // 2,
+        "max_overflow": DATABASE_CONNECTIONS_PER_WORKER
+        - DATABASE_CONNECTIONS_PER_WORKER // 2,
+        "pool_timeout": 5,
+    }
 
     # A secret key is used for signing cookies. The secret key is
     # required by session object which is built on top of cookies.
@@ -85,15 +101,94 @@ class Config(object):
     # Market Data Fetcher URL
     MARKET_DATA_FETCHER_BASE_URL = "http://market-data-fetcher:5000/api/v1"
 
+    # Max number of keep-alive connections to the market-data-fetcher per worker
+    MARKET_DATA_FETCHER_POOL_SIZE = int(os.getenv("MARKET_DATA_FETCHER_POOL_SIZE", 10))
+
+    # Timeouts of requests to the market-data-fetcher
+    MARKET_DATA_FETCHER_CONNECT_TIMEOUT_SEC = 3
+    MARKET_DATA_FETCHER_READ_TIMEOUT_SEC = 10
+    # The traded securities list is large and takes longer to be read
+    MARKET_DATA_FETCHER_SECURITIES_READ_TIMEOUT_SEC = 120
+
+    # Max number of retries of a failed request to the market-data-fetcher.
+    # Retries are delayed by backoff_factor * 2 ** (retry - 1) + random(0, jitter) seconds
+    MARKET_DATA_FETCHER_RETRIES = 2
+    MARKET_DATA_FETCHER_BACKOFF_FACTOR_SEC = 0.2
+    MARKET_DATA_FETCHER_BACKOFF_JITTER_SEC = 0.2
+
+    # Number of consecutive failed requests which stop requests to the market-data-fetcher
+    # for MARKET_DATA_FETCHER_RESET_TIMEOUT_SEC
+    MARKET_DATA_FETCHER_FAILURE_THRESHOLD = 5
+    MARKET_DATA_FETCHER_RESET_TIMEOUT_SEC = 30
+
     # Securities update interval
     SECURITIES_UPDATE_INTERVAL_HOURS = 24
 
+    # Number of securities upserted by a single statement during synchronization
+    SECURITIES_SYNC_BATCH_SIZE = 5000
+
+    # Max number of quote updates buffered for a single quote stream.
+    # The oldest updates are dropped when a client doesn't keep up
+    QUOTE_STREAM_QUEUE_SIZE = 16
+
+    # A comment is sent to idle quote streams this often, so proxies keep them
+    # open and closed connections are detected
+    QUOTE_STREAM_HEARTBEAT_SEC = 15
+
+    # Delay before the quote listener resubscribes after losing the Redis connection
+    QUOTE_STREAM_RECONNECT_DELAY_SEC = 1
+
+    # Number of channels the quotes are sharded between by symbols, the same as
+    # in the market-data-fetcher. All the quotes are received from
+    # the market-data-channel if 0
+    QUOTE_CHANNEL_SHARDS = int(os.getenv("QUOTE_CHANNEL_SHARDS", 64))
+
+    # Transport of the quote messages, the same as in the market-data-fetcher:
+    # "pubsub" receives them from channels, "streams" reads them from Redis
+    # streams and resumes from the last read message after reconnecting
+    QUOTE_TRANSPORT = os.getenv("QUOTE_TRANSPORT", "pubsub")
+
+    # Max number of the latest messages of a quote stream read back to find
+    # the last snapshot, when the listener starts reading the stream
+    QUOTE_STREAM_REPLAY_COUNT = 100
+
+    # How often the symbols of quote streams are renewed in the market-data-fetcher.
+    # It evicts the symbols which haven't been renewed for 5 minutes
+    QUOTE_SUBSCRIPTION_HEARTBEAT_SEC = 60
+
+    # How often the quote listener applies changes of the subscribed channels
+    QUOTE_LISTENER_POLL_INTERVAL_SEC = 0.5
+
     # Max number of searched securities per request
     SECURITIES_MAX_SEARCH_RESULTS = 50
 
+    # Securities search backend:
+    # index - the in-memory search index built in every process
+    # trigram - the ranked search in Postgres backed by trigram indexes
+    SECURITIES_SEARCH_BACKEND = os.getenv("SECURITIES_SEARCH_BACKEND", "index")
+
+    # How often the securities search index checks whether the security table has changed
+    SECURITIES_SEARCH_INDEX_CHECK_INTERVAL_SEC = 60
+
+    # Max number of memoized portfolio returns per process
+    PORTFOLIO_RETURNS_CACHE_SIZE = 1024
+
+    # For how long returns of a period valued at the latest quotes are memoized
+    PORTFOLIO_RETURNS_CACHE_TTL_SEC = 60
+
     # Currency exchange rate update interval
     CURRENCY_EXCHANGE_RATE_UPDATE_INTERVAL_HOURS = 24
 
+    # For how long exchange rates are served from the shared cache without a refresh
+    EXCHANGE_RATES_CACHE_TTL_SEC = 60 * 60
+
+    # For how long a worker may refresh a value of the shared cache
+    # before other workers stop waiting for it
+    SHARED_CACHE_LOCK_TIMEOUT_SEC = 10
+
+    # How often workers waiting for a value check the shared cache
+    SHARED_CACHE_POLL_INTERVAL_SEC = 0.05
+
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -1,16 +1,34 @@
 from app.components.extensions import db
 from app.components.market_data_fetcher import market_data_fetcher
+from app.components.shared_cache import shared_cache
 from app.models.portfolio import Currency
 
+EXCHANGE_RATES_CACHE_KEY = "portfolio-manager:exchange-rates"
+
 
 class CurrenciesManager:
     def __init__(self):
         pass
 
+    def init_app(self, app):
+        self._exchange_rates_ttl = app.config.get("EXCHANGE_RATES_CACHE_TTL_SEC")
+        # Stale rates are still better than none until the next fetcher update
+        self._exchange_rates_stale_ttl = (
+            app.config.get("CURRENCY_EXCHANGE_RATE_UPDATE_INTERVAL_HOURS") * 60 * 60
+        )
+
     def get_currencies(self) -> list[Currency]:
         return db.session.scalars(db.select(Currency)).all()
 
     def get_exchange_rates(self):
+        return shared_cache.get(
+            EXCHANGE_RATES_CACHE_KEY,
+            self.fetch_exchange_rates,
+            self._exchange_rates_ttl,
+            self._exchange_rates_stale_ttl,
+        )
+
+    def fetch_exchange_rates(self):
         currencies = db.session.scalars(db.select(Currency.code)).all()
         return market_data_fetcher.get_currency_exchange_rates(currencies)
 
@@ -0,0 +1,38 @@
+import bisect
+import itertools
+import threading
+
+# Upper bounds of histogram buckets in milliseconds
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Counts of latencies in fixed buckets, similar to a Prometheus histogram."""
+
+    def __init__(self, buckets_ms: tuple = DEFAULT_BUCKETS_MS):
+        self._buckets_ms = buckets_ms
+        # The last bucket counts latencies above the largest bound
+        self._counts = [0] * (len(buckets_ms) + 1)
+        self._sum_ms = 0.0
+        self._errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, error: bool = False):
+        milliseconds = seconds * 1000
+        with self._lock:
+            self._counts[bisect.bisect_left(self._buckets_ms, milliseconds)] += 1
+            self._sum_ms += milliseconds
+            self._errors += error
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            cumulative_counts = list(itertools.accumulate(self._counts))
+            count = cumulative_counts[-1]
+            bounds = [f"le_{bound}ms" for bound in self._buckets_ms] + ["le_inf"]
+            return {
+                "count": count,
+                "errors": self._errors,
+                "mean_ms": round(self._sum_ms / count, 3) if count else None,
+                # Every bucket counts latencies up to its bound
+                "buckets": dict(zip(bounds, cumulative_counts)),
+            }
@@ -1,18 +1,76 @@
-import requests
+from app.components.circuit_breaker import CircuitBreaker
+from app.components.errors import PortfolioManagerError
+from app.components.latency_histogram import LatencyHistogram
+from collections import defaultdict
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import os
+import requests
+import threading
+import time
+
+HEARTBEAT_ENDPOINT = "/market/quote/heartbeat"
 
 
 class MarketDataFetcher:
     def init_app(self, app):
         self._base_url = app.config.get("MARKET_DATA_FETCHER_BASE_URL")
+        self._pool_size = app.config.get("MARKET_DATA_FETCHER_POOL_SIZE")
+        self._timeout = (
+            app.config.get("MARKET_DATA_FETCHER_CONNECT_TIMEOUT_SEC"),
+            app.config.get("MARKET_DATA_FETCHER_READ_TIMEOUT_SEC"),
+        )
+        self._securities_timeout = (
+            self._timeout[0],
+            app.config.get("MARKET_DATA_FETCHER_SECURITIES_READ_TIMEOUT_SEC"),
+        )
+        # Connection errors, read timeouts and overloaded responses are retried
+        # with an exponential backoff and a random jitter. Only GET requests and
+        # heartbeats are idempotent. Subscriptions are counted by the fetcher,
+        # so a retried subscription or cancellation would be counted twice
+        self._retry = Retry(
+            total=app.config.get("MARKET_DATA_FETCHER_RETRIES"),
+            backoff_factor=app.config.get("MARKET_DATA_FETCHER_BACKOFF_FACTOR_SEC"),
+            backoff_jitter=app.config.get("MARKET_DATA_FETCHER_BACKOFF_JITTER_SEC"),
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        self._heartbeat_retry = self._retry.new(allowed_methods=frozenset({"POST"}))
+        self._circuit_breaker = CircuitBreaker(
+            app.config.get("MARKET_DATA_FETCHER_FAILURE_THRESHOLD"),
+            app.config.get("MARKET_DATA_FETCHER_RESET_TIMEOUT_SEC"),
+        )
+        self._latencies = defaultdict(LatencyHistogram)
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
 
     def subscribe_for_quotes(self, securities: list[str]):
         current_app.logger.info(f"Add securities for quotes updates: {securities}")
         return self.__send_request("/market/quote", method="POST", json=securities)
 
+    def get_quotes(self, securities: list[str]):
+        current_app.logger.info(f"Get quotes without subscribing: {securities}")
+        return self.__send_request(
+            "/market/quote", method="GET", params={"symbols": ",".join(securities)}
+        )
+
+    def unsubscribe_from_quotes(self, securities: list[str]):
+        current_app.logger.info(f"Remove securities from quotes updates: {securities}")
+        return self.__send_request(
+            "/market/quote/unsubscribe", method="POST", json=securities
+        )
+
+    def renew_quote_subscriptions(self, securities: list[str]):
+        return self.__send_request(HEARTBEAT_ENDPOINT, method="POST", json=securities)
+
     def get_traded_securities(self):
         current_app.logger.info("Get traded securities")
-        return self.__send_request("/market/securities", method="GET")
+        return self.__send_request(
+            "/market/securities", method="GET", timeout=self._securities_timeout
+        )
 
     def get_currency_exchange_rates(self, currencies: list[str]):
         current_app.logger.info("Get currency exchange rates")
@@ -23,12 +81,74 @@ class MarketDataFetcher:
     def make_full_url(self, route: str):
         return self._base_url + route
 
-    def __send_request(self, endpoint: str, method, json=None, params=None):
-        response = requests.request(
-            method, self.make_full_url(endpoint), json=json, params=params
-        )
-        response.raise_for_status()
-        return response.json()
+    def get_stats(self) -> dict:
+        """
+        Get the state of the circuit breaker and latency histograms
+        of requests to the market-data-fetcher by endpoints.
+        """
+        return {
+            "circuit_breaker": self._circuit_breaker.get_state(),
+            "latencies": {
+                endpoint: histogram.to_dict()
+                for endpoint, histogram in list(self._latencies.items())
+            },
+        }
+
+    def __get_session(self) -> requests.Session:
+        # Connections can't be shared with forked gunicorn workers,
+        # so every process creates its own pool
+        with self._session_lock:
+            if self._session is None or self._session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self._pool_size,
+                    max_retries=self._retry,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                # The longest matching prefix selects the adapter of a request
+                session.mount(
+                    self.make_full_url(HEARTBEAT_ENDPOINT),
+                    HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self._pool_size,
+                        max_retries=self._heartbeat_retry,
+                    ),
+                )
+                self._session = session
+                self._session_pid = os.getpid()
+            return self._session
+
+    def __send_request(
+        self, endpoint: str, method, json=None, params=None, timeout=None
+    ):
+        if not self._circuit_breaker.allow_request():
+            raise PortfolioManagerError(
+                503, "The market-data-fetcher is unavailable, try again later"
+            )
+        start_time = time.perf_counter()
+        failed = True
+        try:
+            response = self.__get_session().request(
+                method,
+                self.make_full_url(endpoint),
+                json=json,
+                params=params,
+                timeout=timeout or self._timeout,
+            )
+            # Client errors are caused by a request, not by the fetcher state
+            failed = response.status_code >= 500
+            response.raise_for_status()
+            return response.json()
+        finally:
+            self._latencies[endpoint].observe(
+                time.perf_counter() - start_time, error=failed
+            )
+            if failed:
+                self._circuit_breaker.record_failure()
+            else:
+                self._circuit_breaker.record_success()
 
 
 market_data_fetcher = MarketDataFetcher()
@@ -1,5 +1,11 @@
 from app.components.errors import PortfolioManagerError
 import redis
+import zlib
+
+MARKET_DATA_CHANNEL = "market-data-channel"
+
+# The field of a quote stream entry with the message
+STREAM_DATA_FIELD = b"data"
 
 
 # Market Data Subscriber
@@ -8,8 +14,11 @@ class MarketDataSubscriber:
         pass
 
     def init_app(self, app):
+        self._shards = app.config.get("QUOTE_CHANNEL_SHARDS")
         url = app.config.get("REDIS_URL")
         self._redis = redis.from_url(url, decode_responses=True)
+        # Quote messages are binary
+        self._quotes_redis = redis.from_url(url)
         if not self._redis.ping():
             app.logger.error(f"Cannot connect to redis '{url}' url")
             raise PortfolioManagerError(f"Cannot connect to redis '{url}' url")
@@ -20,6 +29,59 @@ class MarketDataSubscriber:
         pubsub.subscribe(channel)
         return pubsub
 
+    def get_quote_channel(self, symbol: str) -> str:
+        # Quotes are sharded between the channels by crc32 of symbols
+        # the same way as the market-data-fetcher publishes them
+        if not self._shards:
+            return MARKET_DATA_CHANNEL
+        return f"quotes:{zlib.crc32(symbol.encode()) % self._shards}"
+
+    def subscribe_to_quotes(self, symbols: list[str]):
+        """
+        Subscribe to the channels of the symbol quotes only.
+
+        :param symbols: The security symbols.
+        :return: The subscription, which isn't subscribed to any channel
+            if there are no symbols. Channel names and messages are bytes.
+        """
+        pubsub = self._quotes_redis.pubsub(ignore_subscribe_messages=True)
+        channels = {self.get_quote_channel(symbol) for symbol in symbols}
+        if channels:
+            pubsub.subscribe(*channels)
+        return pubsub
+
+    def read_quote_streams(self, stream_ids: dict[str, bytes], timeout: float) -> list:
+        """
+        Read the messages appended to the quote streams after the given ones.
+
+        :param stream_ids: The IDs of the last read messages by stream names.
+        :param timeout: For how many seconds to wait for a message.
+        :return: The streams with their messages as IDs and data in order.
+        """
+        if not stream_ids:
+            return []
+        streams = self._quotes_redis.xread(stream_ids, block=int(timeout * 1000))
+        return [
+            (
+                stream.decode(),
+                [(entry_id, fields[STREAM_DATA_FIELD]) for entry_id, fields in entries],
+            )
+            for stream, entries in streams or ()
+        ]
+
+    def get_latest_quote_messages(self, stream: str, count: int) -> list:
+        """
+        Get the latest messages of a quote stream.
+
+        :param stream: The stream name.
+        :param count: The max number of messages.
+        :return: The IDs and data of the messages from the newest one.
+        """
+        return [
+            (entry_id, fields[STREAM_DATA_FIELD])
+            for entry_id, fields in self._quotes_redis.xrevrange(stream, count=count)
+        ]
+
 
 # Init Market Data Subscriber
 market_data_subscriber = MarketDataSubscriber()
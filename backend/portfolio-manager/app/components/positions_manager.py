@@ -0,0 +1,236 @@
+from app.components.extensions import db
+from app.components.valuation import apply_trade, compute_positions
+from app.models.portfolio import Portfolio, Position, Trade, TradeType
+from flask import current_app
+import math
+import numpy as np
+import time
+
+# Stored and recomputed position values closer than this are considered equal
+CHECK_TOLERANCE = 1e-6
+
+
+class PositionsManager:
+    def on_trade_created(self, trade: Trade):
+        """
+        Update the position of a trade which has been added to the session.
+
+        A trade placed after the latest trade of a position is applied to it
+        directly, otherwise the position is recomputed from its trades.
+        The caller commits the session.
+
+        :param trade: The new trade.
+        """
+        self.__lock_portfolio(trade.portfolio_id)
+        db.session.flush()
+        position = db.session.get(
+            Position, (trade.portfolio_id, trade.security_id), populate_existing=True
+        )
+        if position is None or (trade.trade_datetime, trade.id) < (
+            position.last_trade_datetime,
+            position.last_trade_id,
+        ):
+            self.recompute_position(trade.portfolio_id, trade.security_id)
+            return
+        quantity = (
+            -trade.quantity if trade.trade_type == TradeType.sell else trade.quantity
+        )
+        position.quantity, position.cost_basis, position.realized_pnl = apply_trade(
+            (position.quantity, position.cost_basis, position.realized_pnl),
+            quantity,
+            trade.unit_price,
+            trade.brokerage_fee,
+        )
+        position.last_trade_datetime = trade.trade_datetime
+        position.last_trade_id = trade.id
+
+    def on_trades_changed(self, portfolio_id: int, security_ids: set[int]):
+        """
+        Recompute positions after trades have been updated or deleted in the session.
+        The caller commits the session.
+
+        :param portfolio_id: The portfolio id.
+        :param security_ids: The securities of the changed trades before and after the change.
+        """
+        self.__lock_portfolio(portfolio_id)
+        db.session.flush()
+        for security_id in sorted(security_ids):
+            self.recompute_position(portfolio_id, security_id)
+
+    def recompute_position(self, portfolio_id: int, security_id: int):
+        """
+        Recompute a position from all its trades. The position is removed
+        when there are no trades left.
+
+        :param portfolio_id: The portfolio id.
+        :param security_id: The security id.
+        """
+        positions = self.compute_portfolio_positions(portfolio_id, security_id)
+        position = db.session.get(Position, (portfolio_id, security_id))
+        if not positions:
+            if position is not None:
+                db.session.delete(position)
+            return
+        if position is None:
+            db.session.add(positions[0])
+            return
+        for field in (
+            "quantity",
+            "cost_basis",
+            "realized_pnl",
+            "last_trade_datetime",
+            "last_trade_id",
+        ):
+            setattr(position, field, getattr(positions[0], field))
+
+    def compute_portfolio_positions(
+        self, portfolio_id: int, security_id: int = None
+    ) -> list[Position]:
+        """
+        Compute positions of a portfolio from its trades.
+
+        :param portfolio_id: The portfolio id.
+        :param security_id: Compute only the position of the security if given.
+        :return: The transient positions ordered by security id.
+        """
+        query = (
+            db.select(
+                Trade.security_id,
+                db.case(
+                    (Trade.trade_type == TradeType.sell, -Trade.quantity),
+                    else_=Trade.quantity,
+                ),
+                Trade.unit_price,
+                Trade.brokerage_fee,
+                Trade.trade_datetime,
+                Trade.id,
+            )
+            .filter(Trade.portfolio_id == portfolio_id)
+            .order_by(Trade.trade_datetime, Trade.id)
+        )
+        if security_id is not None:
+            query = query.filter(Trade.security_id == security_id)
+        rows = db.session.execute(query).all()
+        if not rows:
+            return []
+
+        security_ids, quantities, unit_prices, fees, _, _ = zip(*rows)
+        columns = compute_positions(
+            np.array(security_ids, dtype=np.int64),
+            np.array(quantities, dtype=np.float64),
+            np.array(unit_prices, dtype=np.float64),
+            np.array(fees, dtype=np.float64),
+        )
+        # Trades are in chronological order, so the latest trade of a security wins
+        last_trades = {row[0]: (row[4], row[5]) for row in rows}
+        return [
+            Position(
+                portfolio_id=portfolio_id,
+                security_id=security_id,
+                quantity=quantity,
+                cost_basis=cost_basis,
+                realized_pnl=realized_pnl,
+                last_trade_datetime=last_trades[security_id][0],
+                last_trade_id=last_trades[security_id][1],
+            )
+            for security_id, quantity, cost_basis, realized_pnl in zip(
+                columns["security_id"].tolist(),
+                columns["quantity"].tolist(),
+                columns["cost_basis"].tolist(),
+                columns["realized_pnl"].tolist(),
+            )
+        ]
+
+    def rebuild_positions(self, portfolio_ids: list[int] = None) -> dict:
+        """
+        Replace stored positions with the ones computed from trades.
+        Every portfolio is rebuilt in its own transaction.
+
+        :param portfolio_ids: The portfolios to rebuild, all portfolios if not given.
+        :return: The rebuild statistics.
+        """
+        start_time = time.perf_counter()
+        stats = {"portfolios": 0, "positions": 0}
+        for portfolio_id in portfolio_ids or self.__get_portfolio_ids():
+            try:
+                self.__lock_portfolio(portfolio_id)
+                db.session.execute(
+                    db.delete(Position).where(Position.portfolio_id == portfolio_id)
+                )
+                positions = self.compute_portfolio_positions(portfolio_id)
+                db.session.add_all(positions)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            stats["portfolios"] += 1
+            stats["positions"] += len(positions)
+        stats["seconds"] = round(time.perf_counter() - start_time, 2)
+        current_app.logger.info(f"Positions have been rebuilt. Stats: {stats}")
+        return stats
+
+    def check_positions(self, portfolio_ids: list[int] = None) -> list[dict]:
+        """
+        Compare stored positions with the ones computed from trades.
+
+        :param portfolio_ids: The portfolios to check, all portfolios if not given.
+        :return: The mismatches. Every mismatch has portfolio_id, security_id,
+                 field, stored and expected values. A missing or an unexpected
+                 position is reported with the 'position' field.
+        """
+        mismatches = []
+        for portfolio_id in portfolio_ids or self.__get_portfolio_ids():
+            stored = {
+                position.security_id: position
+                for position in db.session.scalars(
+                    db.select(Position).filter_by(portfolio_id=portfolio_id)
+                )
+            }
+            expected = {
+                position.security_id: position
+                for position in self.compute_portfolio_positions(portfolio_id)
+            }
+            for security_id in sorted(stored.keys() | expected.keys()):
+                mismatches.extend(
+                    self.__compare_positions(
+                        portfolio_id,
+                        security_id,
+                        stored.get(security_id),
+                        expected.get(security_id),
+                    )
+                )
+        return mismatches
+
+    def __compare_positions(self, portfolio_id, security_id, stored, expected):
+        def make_mismatch(field, stored_value, expected_value):
+            return {
+                "portfolio_id": portfolio_id,
+                "security_id": security_id,
+                "field": field,
+                "stored": stored_value,
+                "expected": expected_value,
+            }
+
+        if stored is None or expected is None:
+            return [make_mismatch("position", stored is not None, expected is not None)]
+        return [
+            make_mismatch(field, getattr(stored, field), getattr(expected, field))
+            for field in ("quantity", "cost_basis", "realized_pnl")
+            if not math.isclose(
+                getattr(stored, field),
+                getattr(expected, field),
+                abs_tol=CHECK_TOLERANCE,
+            )
+        ]
+
+    def __get_portfolio_ids(self) -> list[int]:
+        return db.session.scalars(db.select(Portfolio.id).order_by(Portfolio.id)).all()
+
+    def __lock_portfolio(self, portfolio_id: int):
+        # Serializes changes of positions of a portfolio between concurrent transactions
+        db.session.execute(
+            db.select(Portfolio.id).filter_by(id=portfolio_id).with_for_update()
+        )
+
+
+positions_manager = PositionsManager()
@@ -0,0 +1,347 @@
+from app.components.errors import PortfolioManagerError
+from app.components.market_data_fetcher import market_data_fetcher
+from app.components.market_data_subscriber import market_data_subscriber
+from app.components.quote_message import decode_quotes_message
+import logging
+import os
+import queue
+import threading
+import time
+
+# Message types
+QUOTES_DELTA = "delta"
+QUOTES_SNAPSHOT = "snapshot"
+
+# Quote transports
+PUBSUB_TRANSPORT = "pubsub"
+STREAMS_TRANSPORT = "streams"
+
+# The ID to read an empty stream from its first message
+FIRST_STREAM_ID = b"0-0"
+
+
+class QuoteSubscription:
+    """
+    Quote updates of a set of symbols delivered to a single client.
+
+    Updates are kept in a bounded queue. When a client doesn't keep up,
+    the oldest update is dropped: newer quotes supersede older ones.
+    """
+
+    def __init__(self, symbols: list[str], queue_size: int):
+        self.symbols = frozenset(symbols)
+        self._updates = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def get(self, timeout: float = None) -> dict | None:
+        """
+        Wait for the next update.
+
+        :param timeout: For how many seconds to wait, forever if not given.
+        :return: The quotes by symbols or None if no update arrived in time.
+        """
+        try:
+            return self._updates.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, quotes: dict):
+        while True:
+            try:
+                self._updates.put_nowait(quotes)
+                return
+            except queue.Full:
+                try:
+                    self._updates.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class QuoteBroadcaster:
+    """
+    Fans quote updates out from a single Redis subscription per worker process.
+
+    A background listener decodes every market data message once and delivers
+    every client only the quotes of its symbols. Clients are found through
+    the symbol to subscriptions index, so the cost of a message is proportional
+    to the number of interested clients. The listener subscribes only to
+    the quote channels of the symbols of the clients, so the cost of receiving
+    and decoding messages is proportional to the interest too.
+
+    The publisher sends only changed quotes, numbered by a sequence per channel,
+    and periodic snapshots of all of them. The last known quotes are kept, so
+    after a gap in the sequence a snapshot delivers clients the quotes they missed.
+
+    With the streams transport, the listener reads the streams of the channels
+    from the last read message, so no messages are lost while reconnecting.
+    A stream is started from its last snapshot, so the current quotes of
+    the symbols of a new client are dispatched at once.
+
+    The market-data-fetcher stops publishing quotes of symbols which haven't been
+    renewed for a while, so the symbols of the clients are renewed periodically.
+    """
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._channels_changed = False
+        self._quotes = {}
+        self._sequences = {}
+        self._stream_ids = {}
+        self._gaps = 0
+        self._lock = threading.Lock()
+        self._listener = None
+        self._heartbeat = None
+        self._listener_pid = None
+        self._logger = logging.getLogger(__name__)
+
+    def init_app(self, app):
+        self._app = app
+        self._queue_size = app.config.get("QUOTE_STREAM_QUEUE_SIZE")
+        self._reconnect_delay = app.config.get("QUOTE_STREAM_RECONNECT_DELAY_SEC")
+        self._poll_interval = app.config.get("QUOTE_LISTENER_POLL_INTERVAL_SEC")
+        self._heartbeat_interval = app.config.get("QUOTE_SUBSCRIPTION_HEARTBEAT_SEC")
+        self._transport = app.config.get("QUOTE_TRANSPORT", PUBSUB_TRANSPORT)
+        if self._transport not in (PUBSUB_TRANSPORT, STREAMS_TRANSPORT):
+            raise PortfolioManagerError(
+                f"Quote transport '{self._transport}' isn't supported"
+            )
+        self._replay_count = app.config.get("QUOTE_STREAM_REPLAY_COUNT")
+        self._logger = app.logger
+
+    def subscribe(self, symbols: list[str]) -> QuoteSubscription:
+        subscription = QuoteSubscription(symbols, self._queue_size)
+        with self._lock:
+            for symbol in subscription.symbols:
+                if symbol not in self._subscriptions:
+                    self._subscriptions[symbol] = set()
+                    self._channels_changed = True
+                self._subscriptions[symbol].add(subscription)
+            self.__start_listener()
+        return subscription
+
+    def unsubscribe(self, subscription: QuoteSubscription):
+        with self._lock:
+            for symbol in subscription.symbols:
+                subscriptions = self._subscriptions.get(symbol)
+                if subscriptions is None:
+                    continue
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[symbol]
+                    self._channels_changed = True
+
+    def get_subscriptions_count(self) -> int:
+        with self._lock:
+            return len(set().union(*self._subscriptions.values()))
+
+    def get_gaps_count(self) -> int:
+        return self._gaps
+
+    def handle_message(self, channel: str, message: dict):
+        """
+        Apply a market data message and dispatch the quotes it changes.
+
+        :param channel: The channel the message has been received from.
+        :param message: The decoded message with its type, sequence and quotes.
+        """
+        sequence = message["sequence"]
+        quotes = message["quotes"]
+        known_quotes = self._quotes.setdefault(channel, {})
+        if message["type"] == QUOTES_SNAPSHOT:
+            # Only quotes missed after a gap or a reconnection differ
+            changed_quotes = {
+                symbol: price
+                for symbol, price in quotes.items()
+                if known_quotes.get(symbol) != price
+            }
+            self._quotes[channel] = quotes
+        else:
+            last_sequence = self._sequences.get(channel)
+            if last_sequence is not None and sequence != last_sequence + 1:
+                self._gaps += 1
+                self._logger.warning(
+                    f"Quote message {sequence} of {channel} follows {last_sequence}, "
+                    "quotes will be resynchronized by the next snapshot"
+                )
+            changed_quotes = quotes
+            known_quotes.update(quotes)
+        self._sequences[channel] = sequence
+        if changed_quotes:
+            self.dispatch(changed_quotes)
+
+    def dispatch(self, quotes: dict):
+        """
+        Deliver quotes to the subscriptions of their symbols.
+
+        :param quotes: The quotes by symbols.
+        """
+        updates = {}
+        with self._lock:
+            for symbol, price in quotes.items():
+                for subscription in self._subscriptions.get(symbol, ()):
+                    updates.setdefault(subscription, {})[symbol] = price
+        for subscription, subscription_quotes in updates.items():
+            subscription.put(subscription_quotes)
+
+    def __start_listener(self):
+        # Threads don't survive a fork of a gunicorn worker,
+        # so every process starts its own on the first subscription
+        if self._listener is not None and self._listener_pid == os.getpid():
+            return
+        self._listener = threading.Thread(
+            target=self.__listen, name="quote-broadcaster", daemon=True
+        )
+        # Heartbeats are sent by another thread, so that a slow market-data-fetcher
+        # doesn't delay quotes
+        self._heartbeat = threading.Thread(
+            target=self.__send_heartbeats, name="quote-heartbeat", daemon=True
+        )
+        self._listener_pid = os.getpid()
+        self._listener.start()
+        self._heartbeat.start()
+
+    def __send_heartbeats(self):
+        while True:
+            time.sleep(self._heartbeat_interval)
+            try:
+                self.send_heartbeat()
+            except Exception as error:
+                self._logger.error(f"Unable to renew quote subscriptions. {error}")
+
+    def send_heartbeat(self):
+        """
+        Renew the symbols of the clients in the market-data-fetcher.
+        """
+        with self._lock:
+            symbols = list(self._subscriptions)
+        if not symbols:
+            return
+        with self._app.app_context():
+            market_data_fetcher.renew_quote_subscriptions(symbols)
+
+    def update_channels(self, pubsub, channels: set[str]) -> set[str]:
+        """
+        Subscribe to the quote channels of the subscribed symbols only.
+
+        :param pubsub: The Redis subscription of the listener.
+        :param channels: The currently subscribed channels.
+        :return: The subscribed channels after the update.
+        """
+        with self._lock:
+            self._channels_changed = False
+            required_channels = {
+                market_data_subscriber.get_quote_channel(symbol)
+                for symbol in self._subscriptions
+            }
+        new_channels = required_channels - channels
+        if new_channels:
+            pubsub.subscribe(*new_channels)
+        unused_channels = channels - required_channels
+        if unused_channels:
+            pubsub.unsubscribe(*unused_channels)
+            for channel in unused_channels:
+                self._quotes.pop(channel, None)
+                self._sequences.pop(channel, None)
+        return required_channels
+
+    def update_streams(self):
+        """
+        Read the quote streams of the subscribed symbols only.
+
+        A stream which isn't read yet is replayed from its last snapshot.
+        The other streams keep the IDs of their last read messages.
+        """
+        with self._lock:
+            self._channels_changed = False
+            required_streams = {
+                market_data_subscriber.get_quote_channel(symbol)
+                for symbol in self._subscriptions
+            }
+        for stream in set(self._stream_ids) - required_streams:
+            del self._stream_ids[stream]
+            self._quotes.pop(stream, None)
+            self._sequences.pop(stream, None)
+        for stream in required_streams - set(self._stream_ids):
+            self._stream_ids[stream] = self.__replay_stream(stream)
+
+    def __replay_stream(self, stream: str) -> bytes:
+        entries = market_data_subscriber.get_latest_quote_messages(
+            stream, self._replay_count
+        )
+        if not entries:
+            return FIRST_STREAM_ID
+        # The entries are from the newest one
+        messages = []
+        for _, data in entries:
+            message = self.__decode(data)
+            if message is None:
+                continue
+            messages.append(message)
+            if message["type"] == QUOTES_SNAPSHOT:
+                break
+        for message in reversed(messages):
+            self.handle_message(stream, message)
+        return entries[0][0]
+
+    def __decode(self, data: bytes) -> dict | None:
+        try:
+            return decode_quotes_message(data)
+        except Exception as error:
+            # A malformed message is skipped without reconnecting
+            self._logger.error(f"Unable to decode a quote message. {error}")
+            return None
+
+    def __listen(self):
+        while True:
+            try:
+                if self._transport == STREAMS_TRANSPORT:
+                    self.__read_streams()
+                else:
+                    self.__receive_messages()
+            except Exception as error:
+                self._logger.error(f"Quote listener has failed, reconnecting. {error}")
+            time.sleep(self._reconnect_delay)
+
+    def __receive_messages(self):
+        pubsub = market_data_subscriber.subscribe_to_quotes([])
+        try:
+            # Messages published while disconnected are lost
+            self._sequences.clear()
+            channels = set()
+            self._channels_changed = True
+            while True:
+                # Channels are changed by the listener only, since
+                # a subscription isn't safe to share between threads
+                if self._channels_changed:
+                    channels = self.update_channels(pubsub, channels)
+                message = pubsub.get_message(timeout=self._poll_interval)
+                if message is None or message["type"] != "message":
+                    continue
+                quotes_message = self.__decode(message["data"])
+                if quotes_message is not None:
+                    self.handle_message(message["channel"].decode(), quotes_message)
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+    def __read_streams(self):
+        # The streams are read on from the last read messages after reconnecting
+        self._channels_changed = True
+        while True:
+            if self._channels_changed:
+                self.update_streams()
+            streams = market_data_subscriber.read_quote_streams(
+                self._stream_ids, self._poll_interval
+            )
+            for stream, entries in streams:
+                for entry_id, data in entries:
+                    message = self.__decode(data)
+                    if message is not None:
+                        self.handle_message(stream, message)
+                    self._stream_ids[stream] = entry_id
+
+
+quote_broadcaster = QuoteBroadcaster()
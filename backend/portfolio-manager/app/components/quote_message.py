@@ -0,0 +1,38 @@
+import json
+import msgpack
+import numpy as np
+import zlib
+
+# Version of the message layout, the same as in the market-data-fetcher
+QUOTE_MESSAGE_VERSION = 1
+
+# Content types of the message payload
+CONTENT_TYPE_MSGPACK = "msgpack"
+CONTENT_TYPE_MSGPACK_ZLIB = "msgpack+zlib"
+
+
+def decode_quotes_message(data: bytes) -> dict:
+    """
+    Decode a quotes message from the binary wire format.
+
+    The message is an envelope of the version, the content type and the payload
+    in msgpack. Messages in JSON, which the market-data-fetcher published before
+    the binary format, are decoded too.
+
+    :param data: The message.
+    :return: The message with its type, sequence and quotes by symbols.
+    :raises ValueError: If the message version or content type isn't supported.
+    """
+    if data[:1] == b"{":
+        return json.loads(data)
+    version, content_type, payload = msgpack.unpackb(data)
+    if version != QUOTE_MESSAGE_VERSION:
+        raise ValueError(f"Quote message version {version} isn't supported")
+    if content_type == CONTENT_TYPE_MSGPACK_ZLIB:
+        payload = zlib.decompress(payload)
+    elif content_type != CONTENT_TYPE_MSGPACK:
+        raise ValueError(f"Quote message content type {content_type} isn't supported")
+    message = msgpack.unpackb(payload)
+    prices = np.frombuffer(message.pop("prices"), "<f8").tolist()
+    message["quotes"] = dict(zip(message.pop("symbols"), prices))
+    return message
@@ -0,0 +1,366 @@
+from app.components.extensions import db
+from app.components.market_data_fetcher import market_data_fetcher
+from app.components.valuation import QUANTITY_TOLERANCE, scan_positions
+from app.models.portfolio import Security, Trade, TradeType
+from collections import OrderedDict
+from datetime import datetime, timezone
+import numpy as np
+import threading
+import time
+
+# XIRR discounts cash flows with the actual/365 day count
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+# Portfolio values smaller than this share of the largest value are considered
+# empty, which absorbs the rounding errors left after selling everything
+VALUE_TOLERANCE = 1e-9
+
+# The bracket of log(1 + rate) searched by the XIRR solver,
+# i.e. annual rates from -99.995% to about 2.2 million %
+MIN_LOG_RATE = -10.0
+MAX_LOG_RATE = 10.0
+XIRR_TOLERANCE = 1e-12
+XIRR_MAX_ITERATIONS = 100
+
+
+def solve_xirr(amounts: np.ndarray, years: np.ndarray) -> float | None:
+    """
+    Find the annual rate at which the net present value of cash flows is zero.
+
+    The solver runs Newton's method on x = log(1 + rate), where the net present
+    value is a sum of exponents, and falls back to bisection whenever a Newton
+    step leaves the bracket of the root or doesn't shrink it fast enough.
+    Every iteration evaluates all discount factors at once.
+
+    :param amounts: The cash flows, negative for investments.
+    :param years: The time of every cash flow in years since the first one.
+    :return: The annual rate or None if there is no rate in the searched bracket.
+    """
+    if not (amounts > 0).any() or not (amounts < 0).any():
+        return None
+
+    def evaluate(x):
+        # Discount factors are scaled by the largest one to avoid an overflow.
+        # The scale is positive, so neither the sign of the value nor the
+        # Newton step is affected
+        exponents = -years * x
+        discounted = amounts * np.exp(exponents - exponents.max())
+        return discounted.sum(), -(discounted * years).sum()
+
+    low, high = MIN_LOG_RATE, MAX_LOG_RATE
+    low_value, _ = evaluate(low)
+    high_value, _ = evaluate(high)
+    if low_value == 0:
+        return float(np.expm1(low))
+    if high_value == 0:
+        return float(np.expm1(high))
+    if np.sign(low_value) == np.sign(high_value):
+        return None
+
+    x = 0.0
+    previous_step = high - low
+    for _ in range(XIRR_MAX_ITERATIONS):
+        value, derivative = evaluate(x)
+        if value == 0:
+            break
+        # Keep the root between low and high
+        if np.sign(value) == np.sign(low_value):
+            low = x
+        else:
+            high = x
+        step = value / derivative if derivative != 0 else np.inf
+        if not low < x - step < high or abs(step) > abs(previous_step) / 2:
+            step = x - (low + high) / 2
+        previous_step = step
+        x -= step
+        if abs(step) < XIRR_TOLERANCE:
+            break
+    return float(np.expm1(x))
+
+
+def scan_holdings(
+    security_ids: np.ndarray, quantities: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the position held in the security of every trade before and after it.
+
+    Selling more than the position closes it, like in the positions
+    of valuation.compute_positions.
+
+    :param security_ids: The security ids of trades in chronological order.
+    :param quantities: The trade quantities, negative for sells.
+    :return: The positions before and after every trade in the order of trades.
+    """
+    count = len(security_ids)
+    held_before = np.zeros(count)
+    held_after = np.zeros(count)
+    if count == 0:
+        return held_before, held_after
+    order = np.argsort(security_ids, kind="stable")
+    is_group_start = np.ones(count, dtype=bool)
+    is_group_start[1:] = security_ids[order][1:] != security_ids[order][:-1]
+    positions = np.round(scan_positions(quantities[order], is_group_start), 8)
+    previous_positions = np.roll(positions, 1)
+    previous_positions[is_group_start] = 0.0
+    held_before[order] = previous_positions
+    held_after[order] = positions
+    return held_before, held_after
+
+
+def compute_returns(
+    times: np.ndarray,
+    security_ids: np.ndarray,
+    quantities: np.ndarray,
+    unit_prices: np.ndarray,
+    fees: np.ndarray,
+    start: float = None,
+    end: float = None,
+    end_prices: dict = None,
+) -> dict:
+    """
+    Compute the time-weighted and the money-weighted return of trades over a period.
+
+    Securities are marked at the price of their latest trade, so the portfolio
+    is revalued at every trade. The period is split into sub-periods at every
+    trade: a buy is an external cash flow into the portfolio and a sell is
+    a cash flow out of it, fees included. The time-weighted return links the
+    returns of sub-periods, the money-weighted one is the XIRR of cash flows,
+    where the value at the start is invested and the value at the end is received.
+    Selling more than the position closes it, and only the held quantity
+    is a cash flow.
+
+    :param times: The trade timestamps in seconds in chronological order.
+    :param security_ids: The security ids of trades.
+    :param quantities: The trade quantities, negative for sells.
+    :param unit_prices: The trade unit prices.
+    :param fees: The trade brokerage fees.
+    :param start: The period start timestamp, the first trade if not given.
+    :param end: The period end timestamp, the last trade if not given.
+    :param end_prices: The prices by security ids to value positions at the end.
+                       Securities without a price are marked at their latest trade.
+    :return: twr, xirr, start_value, end_value and net_cash_flow. The returns
+             are None when they aren't defined for the period.
+    """
+    count = len(times)
+    if start is None:
+        start = times[0] if count else 0.0
+    if end is None:
+        end = times[-1] if count else start
+
+    # Previous positions and prices of the same security as every trade.
+    # Trades are grouped by security, then results are put back in place
+    order = np.argsort(security_ids, kind="stable")
+    grouped_prices = unit_prices[order]
+    is_group_start = np.ones(count, dtype=bool)
+    is_group_start[1:] = security_ids[order][1:] != security_ids[order][:-1]
+    group_starts = np.flatnonzero(is_group_start)
+    previous_quantities, held_after = scan_holdings(security_ids, quantities)
+    previous_prices = np.empty(count)
+    shifted_prices = np.roll(grouped_prices, 1)
+    shifted_prices[group_starts] = grouped_prices[group_starts]
+    previous_prices[order] = shifted_prices
+
+    # An oversell sells the held quantity only, like in the positions
+    quantities = np.where(
+        quantities < 0, -np.minimum(-quantities, previous_quantities), quantities
+    )
+
+    # Value of holdings just before and just after every trade
+    trade_values = quantities * unit_prices
+    values_after = np.cumsum(
+        previous_quantities * (unit_prices - previous_prices) + trade_values
+    )
+    values_before = values_after - trade_values
+    cash_flows = trade_values + fees
+
+    first = np.searchsorted(times, start, side="left")
+    last = np.searchsorted(times, end, side="right")
+    start_value = values_after[first - 1] if first > 0 else 0.0
+    end_value = values_after[last - 1] if last > 0 else 0.0
+    if end_prices and last > 0:
+        # Holdings of securities with a price are revalued at that price
+        # The first occurrence in reversed trades is the latest trade of a security
+        held_ids, latest_trades = np.unique(
+            security_ids[:last][::-1], return_index=True
+        )
+        held_quantities = held_after[:last][::-1][latest_trades]
+        last_prices = unit_prices[:last][::-1][latest_trades]
+        prices = np.array(
+            [
+                end_prices.get(security_id, last_price)
+                for security_id, last_price in zip(held_ids.tolist(), last_prices)
+            ]
+        )
+        end_value = float(np.dot(held_quantities, prices))
+
+    # Sub-periods start after every trade and end just before the next one.
+    # A fee is charged to the sub-period in which its money is invested:
+    # the one after a buy and the one before a sell
+    buy_fees = np.where(quantities > 0, fees, 0.0)
+    sell_fees = fees - buy_fees
+    period_starts = np.concatenate(
+        ([start_value], values_after[first:last] + buy_fees[first:last])
+    )
+    period_ends = np.append(
+        values_before[first:last] - sell_fees[first:last], end_value
+    )
+    empty_value = VALUE_TOLERANCE * np.abs(values_after).max(initial=1.0)
+    is_invested = period_starts > empty_value
+    twr = None
+    if is_invested.any():
+        twr = float(np.prod(period_ends[is_invested] / period_starts[is_invested]) - 1)
+
+    # The investor's cash flows: the start value and buys are invested
+    amounts = np.concatenate(([-start_value], -cash_flows[first:last], [end_value]))
+    flow_times = np.concatenate(([start], times[first:last], [end]))
+    xirr = None
+    if end > start:
+        xirr = solve_xirr(amounts, (flow_times - start) / SECONDS_PER_YEAR)
+
+    return {
+        "twr": twr,
+        "xirr": xirr,
+        "start_value": float(start_value),
+        "end_value": float(end_value),
+        "net_cash_flow": float(cash_flows[first:last].sum()),
+    }
+
+
+class PortfolioReturns:
+    def __init__(self):
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def init_app(self, app):
+        self._cache_size = app.config.get("PORTFOLIO_RETURNS_CACHE_SIZE")
+        self._cache_ttl = app.config.get("PORTFOLIO_RETURNS_CACHE_TTL_SEC")
+
+    def get_returns(
+        self, portfolio_id: int, start: datetime = None, end: datetime = None
+    ) -> dict:
+        """
+        Compute the returns of a portfolio over a period.
+
+        Results are memoized per portfolio, period and the state of its trades.
+        A period without an end is valued at the latest quotes, so its result
+        also expires after PORTFOLIO_RETURNS_CACHE_TTL_SEC.
+
+        :param portfolio_id: The portfolio id.
+        :param start: The period start, the first trade if not given.
+        :param end: The period end, now if not given.
+        :return: The period and its time-weighted and money-weighted returns.
+        """
+        trades_count, trades_updated_at = db.session.execute(
+            db.select(db.func.count(Trade.id), db.func.max(Trade.updated_at)).filter(
+                Trade.portfolio_id == portfolio_id
+            )
+        ).one()
+        key = (portfolio_id, start, end, trades_count, trades_updated_at)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._cache.move_to_end(key)
+                return entry[1]
+
+        result = self.compute_portfolio_returns(portfolio_id, start, end)
+        expires_at = time.monotonic() + self._cache_ttl if end is None else None
+        with self._cache_lock:
+            self._cache[key] = (expires_at, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def compute_portfolio_returns(
+        self, portfolio_id: int, start: datetime = None, end: datetime = None
+    ) -> dict:
+        times, security_ids, quantities, unit_prices, fees = self.load_trade_columns(
+            portfolio_id
+        )
+        end_prices = None
+        if end is None:
+            end = datetime.now(timezone.utc)
+            end_prices = self.__get_latest_prices(security_ids, quantities)
+        if start is None:
+            start = (
+                datetime.fromtimestamp(times[0], timezone.utc) if len(times) else end
+            )
+        returns = compute_returns(
+            times,
+            security_ids,
+            quantities,
+            unit_prices,
+            fees,
+            start.timestamp(),
+            end.timestamp(),
+            end_prices,
+        )
+
+        def to_rate(value):
+            return None if value is None else round(value, 6)
+
+        return {
+            "portfolio_id": portfolio_id,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "twr": to_rate(returns["twr"]),
+            "xirr": to_rate(returns["xirr"]),
+            "start_value": round(returns["start_value"], 2),
+            "end_value": round(returns["end_value"], 2),
+            "net_cash_flow": round(returns["net_cash_flow"], 2),
+        }
+
+    def load_trade_columns(self, portfolio_id: int) -> tuple[np.ndarray, ...]:
+        """
+        Load trades of a portfolio as columns in chronological order.
+
+        :param portfolio_id: The portfolio id.
+        :return: The timestamp, security_id, signed quantity, unit_price and fee columns.
+        """
+        rows = db.session.execute(
+            db.select(
+                db.func.extract("epoch", Trade.trade_datetime),
+                Trade.security_id,
+                db.case(
+                    (Trade.trade_type == TradeType.sell, -Trade.quantity),
+                    else_=Trade.quantity,
+                ),
+                Trade.unit_price,
+                Trade.brokerage_fee,
+            )
+            .filter(Trade.portfolio_id == portfolio_id)
+            .order_by(Trade.trade_datetime, Trade.id)
+        ).all()
+        times, security_ids, quantities, unit_prices, fees = (
+            zip(*rows) if rows else ((),) * 5
+        )
+        return (
+            np.array(times, dtype=np.float64),
+            np.array(security_ids, dtype=np.int64),
+            np.array(quantities, dtype=np.float64),
+            np.array(unit_prices, dtype=np.float64),
+            np.array(fees, dtype=np.float64),
+        )
+
+    def __get_latest_prices(self, security_ids, quantities) -> dict[int, float]:
+        _, held_after = scan_holdings(security_ids, quantities)
+        # The first occurrence in reversed trades is the latest trade of a security
+        held_ids, latest_trades = np.unique(security_ids[::-1], return_index=True)
+        held_quantities = held_after[::-1][latest_trades]
+        open_ids = held_ids[held_quantities >= QUANTITY_TOLERANCE].tolist()
+        if not open_ids:
+            return {}
+        symbols = dict(
+            db.session.execute(
+                db.select(Security.id, Security.symbol).where(Security.id.in_(open_ids))
+            ).all()
+        )
+        quotes = market_data_fetcher.get_quotes(list(symbols.values()))
+        return {
+            security_id: quotes[symbol]
+            for security_id, symbol in symbols.items()
+            if quotes.get(symbol) is not None
+        }
+
+
+portfolio_returns = PortfolioReturns()
@@ -1,37 +1,242 @@
 from app.components.extensions import db
+from app.components.errors import PortfolioManagerError
+from app.components.market_data_fetcher import market_data_fetcher
+from app.components.security_search_index import SecuritySearchIndex
 from app.models.portfolio import (
+    AssetType,
     Security,
     SecurityStatus,
 )
 from flask import current_app
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+import threading
+import time
 
 
 class SecuritiesManager:
     def __init__(self):
-        pass
+        self._search_index = None
+        self._search_index_version = None
+        self._search_index_checked_at = 0.0
+        self._search_index_lock = threading.Lock()
 
     def init_app(self, app):
         self._max_search_number = app.config.get("SECURITIES_MAX_SEARCH_RESULTS")
+        self._search_index_check_interval = app.config.get(
+            "SECURITIES_SEARCH_INDEX_CHECK_INTERVAL_SEC"
+        )
+        search_backends = {
+            "index": self.search_in_index,
+            "trigram": self.search_in_database,
+        }
+        backend = app.config.get("SECURITIES_SEARCH_BACKEND")
+        if backend not in search_backends:
+            raise ValueError(f"Unknown securities search backend '{backend}'")
+        self._search = search_backends[backend]
+        self._sync_batch_size = app.config.get("SECURITIES_SYNC_BATCH_SIZE")
 
     def search_securities(self, query: str) -> list[Security]:
         try:
             if not query:
                 return []
-            query = query.lower()
+            return self._search(query)
+        except Exception as error:
+            current_app.logger.error(f"Unable to search for securities. {error}")
+            return []
+
+    def search_in_index(self, query: str) -> list:
+        return self.get_search_index().search(query, self._max_search_number)
+
+    def search_in_database(self, query: str) -> list:
+        # Postgres filters and ranks securities with the help of the trigram indexes
+        # and returns only the best matches: exact symbol matches go first, then
+        # symbol and name prefix matches, then the most similar securities.
+        # Symbols and names with typos are found if their similarity reaches
+        # pg_trgm.similarity_threshold, 0.3 by default. A short symbol reaches it
+        # with an extra or a missing letter, but not with swapped letters
+        query = query.strip()
+        if not query:
+            return []
+        rank = db.case(
+            (db.func.lower(Security.symbol) == query.lower(), 0),
+            (Security.symbol.istartswith(query, autoescape=True), 1),
+            (Security.name.istartswith(query, autoescape=True), 2),
+            else_=3,
+        )
+        similarity = db.func.greatest(
+            db.func.similarity(Security.symbol, query),
+            db.func.similarity(Security.name, query),
+        )
+        return db.session.execute(
+            self.__select_security_columns()
+            .where(
+                Security.status != SecurityStatus.delisted,
+                db.or_(
+                    Security.symbol.icontains(query, autoescape=True),
+                    Security.name.icontains(query, autoescape=True),
+                    Security.symbol.op("%")(query),
+                    Security.name.op("%")(query),
+                ),
+            )
+            .order_by(
+                rank,
+                similarity.desc(),
+                db.func.length(Security.symbol),
+                Security.symbol,
+            )
+            .limit(self._max_search_number)
+        ).all()
+
+    def sync_securities(self) -> dict:
+        """
+        Synchronize the security table with the traded securities of the market-data-fetcher.
 
-            def is_match(security):
-                if security.status == SecurityStatus.delisted:
-                    return False
-                return (
-                    query in security.symbol.lower() or query in security.name.lower()
+        Securities are upserted in batches and the ones which are no longer traded
+        are marked as delisted. Everything is done in a single transaction.
+        """
+        start_time = time.perf_counter()
+        rows = market_data_fetcher.get_traded_securities()
+        if not rows:
+            # Don't delist the whole table because of an empty response
+            raise PortfolioManagerError(502, "The traded securities list is empty")
+
+        stats = {"received": len(rows), "inserted": 0, "updated": 0, "skipped": 0}
+        securities = {}
+        symbol_length = Security.symbol.type.length
+        for row in rows:
+            try:
+                security = {
+                    "symbol": row["symbol"],
+                    "name": row["name"],
+                    "exchange": row["exchange"],
+                    "asset_type": AssetType(row["assetType"].upper()),
+                    "status": SecurityStatus.active,
+                }
+            except (KeyError, ValueError, AttributeError):
+                stats["skipped"] += 1
+                continue
+            # A single row violating a column constraint would roll back the whole sync
+            if (
+                not all(
+                    isinstance(security[column], str) and security[column].strip()
+                    for column in ("symbol", "name", "exchange")
                 )
+                or len(security["symbol"]) > symbol_length
+            ):
+                stats["skipped"] += 1
+                continue
+            securities[security["symbol"]] = security
 
-            # TODO: add caching
-            securities = db.session.scalars(db.select(Security)).all()
-            matched_securities = list(filter(is_match, securities))
-            return matched_securities[: self._max_search_number]
-        except Exception as error:
-            current_app.logger.info(error)
+        try:
+            values = list(securities.values())
+            for start in range(0, len(values), self._sync_batch_size):
+                batch = values[start : start + self._sync_batch_size]
+                for (is_inserted,) in db.session.execute(self.__make_upsert(batch)):
+                    stats["inserted" if is_inserted else "updated"] += 1
+            # An anti-join is planned as a hash join, while '<> ALL(array)' scans
+            # the whole array for every security before Postgres 15
+            traded = (
+                db.func.unnest(db.literal(list(securities), ARRAY(db.String)))
+                .table_valued("symbol")
+                .render_derived(name="traded")
+            )
+            result = db.session.execute(
+                db.update(Security)
+                .where(
+                    Security.status == SecurityStatus.active,
+                    ~db.exists().where(traded.c.symbol == Security.symbol),
+                )
+                .values(status=SecurityStatus.delisted, updated_at=db.func.now())
+                .execution_options(synchronize_session=False)
+            )
+            stats["delisted"] = result.rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        stats["seconds"] = round(time.perf_counter() - start_time, 2)
+        current_app.logger.info(
+            f"Stats: received {stats['received']} securities, "
+            f"inserted {stats['inserted']}, updated {stats['updated']}, "
+            f"delisted {stats['delisted']}, skipped {stats['skipped']} "
+            f"in {stats['seconds']} seconds."
+        )
+        return stats
+
+    def get_search_index(self) -> SecuritySearchIndex:
+        # The index is shared by all requests of a process. Postgres is queried at most
+        # once per check interval to find out whether the security table has changed
+        if (
+            self._search_index is not None
+            and time.monotonic() - self._search_index_checked_at
+            < self._search_index_check_interval
+        ):
+            return self._search_index
+
+        with self._search_index_lock:
+            if time.monotonic() - self._search_index_checked_at >= (
+                self._search_index_check_interval
+            ):
+                version = db.session.execute(
+                    db.select(
+                        db.func.count(Security.id), db.func.max(Security.updated_at)
+                    )
+                ).one()
+                if self._search_index is None or version != self._search_index_version:
+                    self._search_index = self.__build_search_index()
+                    self._search_index_version = version
+                self._search_index_checked_at = time.monotonic()
+            return self._search_index
+
+    def __build_search_index(self) -> SecuritySearchIndex:
+        start_time = time.perf_counter()
+        securities = db.session.execute(
+            self.__select_security_columns().where(
+                Security.status != SecurityStatus.delisted
+            )
+        ).all()
+        search_index = SecuritySearchIndex(securities)
+        current_app.logger.info(
+            f"Stats: indexed {len(search_index)} securities "
+            f"in {time.perf_counter() - start_time:.2f} seconds."
+        )
+        return search_index
+
+    def __make_upsert(self, securities: list[dict]):
+        statement = insert(Security).values(securities)
+        excluded = statement.excluded
+        # Rows are only updated when something has changed, so updated_at
+        # keeps tracking real changes of the table
+        return statement.on_conflict_do_update(
+            index_elements=[Security.symbol],
+            set_={
+                "name": excluded.name,
+                "exchange": excluded.exchange,
+                "asset_type": excluded.asset_type,
+                "status": excluded.status,
+                "updated_at": db.func.now(),
+            },
+            where=db.or_(
+                Security.name != excluded.name,
+                Security.exchange != excluded.exchange,
+                Security.asset_type != excluded.asset_type,
+                Security.status != excluded.status,
+            ),
+        ).returning(db.literal_column("xmax = 0"))
+
+    def __select_security_columns(self):
+        # Plain rows are cheaper to build than ORM objects and
+        # aren't bound to the current session
+        return db.select(
+            Security.id,
+            Security.symbol,
+            Security.name,
+            Security.exchange,
+            Security.asset_type,
+            Security.status,
+            Security.updated_at,
+        )
 
 
 securities_manager = SecuritiesManager()
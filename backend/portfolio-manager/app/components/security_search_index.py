@@ -0,0 +1,148 @@
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+import heapq
+
+# Length of n-grams stored in the inverted index
+NGRAM_SIZE = 3
+
+# Marks the end of an indexed string, so every substring of length
+# NGRAM_SIZE - 1 is still a prefix of some indexed n-gram
+END_OF_STRING = "\x00"
+
+
+def make_ngrams(text: str) -> set[str]:
+    return {text[i : i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def make_postings(items: dict) -> dict:
+    # Arrays of unsigned ints take several times less memory than lists of ints
+    return {key: array("I", positions) for key, positions in items.items()}
+
+
+class SecuritySearchIndex:
+    """
+    Immutable in-memory search index over security symbols and names.
+
+    Symbols and name words are kept in sorted arrays for prefix lookups and
+    every symbol and name is split into n-grams stored in an inverted index
+    for substring lookups. Matches are ranked as follows: exact symbol match,
+    symbol prefix, name word prefix, symbol substring and name substring.
+    Matches with the same rank are ordered by the symbol length and the symbol.
+    """
+
+    def __init__(self, securities):
+        """
+        Build the index.
+
+        :param securities: The securities to index. Each security must have
+                           'symbol' and 'name' attributes.
+        """
+        # Positions of securities follow the order of matches with the same rank,
+        # so the best matches are the ones with the smallest positions
+        self._securities = sorted(
+            securities, key=lambda security: (len(security.symbol), security.symbol)
+        )
+        self._symbols = [security.symbol.lower() for security in self._securities]
+        self._names = [security.name.lower() for security in self._securities]
+
+        self._symbol_prefixes = sorted(
+            (symbol, position) for position, symbol in enumerate(self._symbols)
+        )
+
+        words = defaultdict(list)
+        ngrams = defaultdict(list)
+        for position, (symbol, name) in enumerate(zip(self._symbols, self._names)):
+            for word in set(name.split()):
+                words[word].append(position)
+            for ngram in make_ngrams(f"{symbol}{END_OF_STRING}{name}{END_OF_STRING}"):
+                ngrams[ngram].append(position)
+        self._word_postings = make_postings(words)
+        self._words = sorted(self._word_postings)
+        self._ngram_postings = make_postings(ngrams)
+        self._ngrams = sorted(self._ngram_postings)
+
+    def __len__(self):
+        return len(self._securities)
+
+    def search(self, query: str, limit: int) -> list:
+        """
+        Search for securities matching a query.
+
+        :param query: The query to match symbols and names against.
+        :param limit: The max number of securities to return.
+        :return: The best ranked securities.
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        matches = []
+        matched_positions = set()
+
+        def add_matches(positions):
+            # Positions are sorted, so the first ones are the best matches
+            for position in positions:
+                if len(matches) == limit:
+                    break
+                if position not in matched_positions:
+                    matches.append(position)
+                    matched_positions.add(position)
+
+        # Matches of a better rank always go first, so stop
+        # as soon as there are enough matches
+        symbol_prefix_matches = self.__find_symbol_prefix_matches(query)
+        add_matches(p for p in symbol_prefix_matches if self._symbols[p] == query)
+        add_matches(heapq.nsmallest(limit, symbol_prefix_matches))
+        if len(matches) < limit:
+            add_matches(self.__find_word_prefix_matches(query))
+        if len(matches) < limit:
+            candidates = sorted(self.__find_substring_candidates(query))
+            add_matches(p for p in candidates if query in self._symbols[p])
+            add_matches(p for p in candidates if query in self._names[p])
+        return [self._securities[position] for position in matches]
+
+    def __find_symbol_prefix_matches(self, query):
+        matches = []
+        for index in range(
+            bisect_left(self._symbol_prefixes, (query,)), len(self._symbol_prefixes)
+        ):
+            symbol, position = self._symbol_prefixes[index]
+            if not symbol.startswith(query):
+                break
+            matches.append(position)
+        return matches
+
+    def __find_word_prefix_matches(self, query):
+        postings = []
+        for index in range(bisect_left(self._words, query), len(self._words)):
+            word = self._words[index]
+            if not word.startswith(query):
+                break
+            postings.append(self._word_postings[word])
+        # A name may have several words with the same prefix, so the merged
+        # positions are deduplicated while the matches are being added
+        return heapq.merge(*postings)
+
+    def __find_substring_candidates(self, query):
+        if len(query) >= NGRAM_SIZE:
+            # Every match contains all n-grams of the query
+            postings = []
+            for ngram in make_ngrams(query):
+                if ngram not in self._ngram_postings:
+                    return set()
+                postings.append(self._ngram_postings[ngram])
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for items in postings[1:]:
+                candidates.intersection_update(items)
+            return candidates
+
+        # A short query is a prefix of n-grams it is a part of
+        candidates = set()
+        for index in range(bisect_left(self._ngrams, query), len(self._ngrams)):
+            ngram = self._ngrams[index]
+            if not ngram.startswith(query):
+                break
+            candidates.update(self._ngram_postings[ngram])
+        return candidates
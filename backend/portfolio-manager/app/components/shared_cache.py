@@ -0,0 +1,132 @@
+from flask import current_app
+import json
+import redis
+import threading
+import time
+import uuid
+
+# Deletes a lock only if it's still held by the given token
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SharedCache:
+    """
+    Cache in Redis shared by all workers of the service.
+
+    Every value is fresh for its TTL and then may be served stale for
+    a while longer, while one worker refreshes it in the background.
+    Refreshes are single-flight: a worker refreshes a value only if it
+    holds the refresh lock of the value, other workers serve the stale value
+    or, when there is no value yet, wait until the lock holder stores it.
+    """
+
+    def __init__(self):
+        pass
+
+    def init_app(self, app):
+        url = app.config.get("REDIS_URL")
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._release_lock = self._redis.register_script(RELEASE_LOCK_SCRIPT)
+        self._lock_timeout = app.config.get("SHARED_CACHE_LOCK_TIMEOUT_SEC")
+        self._poll_interval = app.config.get("SHARED_CACHE_POLL_INTERVAL_SEC")
+
+    def get(self, key: str, load, ttl: float, stale_ttl: float):
+        """
+        Get a value from the cache loading it when required.
+
+        :param key: The cache key.
+        :param load: The function without arguments returning a JSON serializable value.
+        :param ttl: For how many seconds a value is fresh.
+        :param stale_ttl: For how many seconds a value is served after it becomes stale.
+        :return: The cached or the loaded value.
+        """
+        # A Redis outage degrades to loading the value directly
+        try:
+            entry = self.__read(key)
+            if entry is not None:
+                if time.time() - entry["refreshed_at"] >= ttl:
+                    self.__refresh_in_background(key, load, ttl, stale_ttl)
+                return entry["value"]
+            return self.__wait_or_load(key, load, ttl, stale_ttl)
+        except redis.RedisError as error:
+            current_app.logger.warning(f"Cannot use the cache for '{key}'. {error}")
+            return load()
+
+    def __wait_or_load(self, key, load, ttl, stale_ttl):
+        deadline = time.monotonic() + self._lock_timeout
+        while time.monotonic() < deadline:
+            token = self.__acquire_lock(key)
+            if token is not None:
+                try:
+                    return self.__refresh(key, load, ttl, stale_ttl)
+                finally:
+                    self.__release_lock(key, token)
+            # Other worker is loading the value
+            time.sleep(self._poll_interval)
+            entry = self.__read(key)
+            if entry is not None:
+                return entry["value"]
+        current_app.logger.warning(f"Timed out waiting for '{key}' to be loaded")
+        return load()
+
+    def __refresh_in_background(self, key, load, ttl, stale_ttl):
+        try:
+            token = self.__acquire_lock(key)
+        except redis.RedisError as error:
+            # The stale value is served until the next try
+            current_app.logger.warning(f"Cannot lock '{key}' for a refresh. {error}")
+            return
+        if token is None:
+            # Other worker is already refreshing the value
+            return
+        app = current_app._get_current_object()
+
+        def refresh():
+            with app.app_context():
+                try:
+                    self.__refresh(key, load, ttl, stale_ttl)
+                except Exception as error:
+                    app.logger.error(f"Cannot refresh '{key}' in the cache. {error}")
+                finally:
+                    self.__release_lock(key, token)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def __refresh(self, key, load, ttl, stale_ttl):
+        value = load()
+        entry = {"value": value, "refreshed_at": time.time()}
+        try:
+            self._redis.set(key, json.dumps(entry), ex=max(1, round(ttl + stale_ttl)))
+        except redis.RedisError as error:
+            # The loaded value is returned anyway instead of being loaded again
+            current_app.logger.warning(f"Cannot store '{key}' in the cache. {error}")
+        return value
+
+    def __read(self, key):
+        data = self._redis.get(key)
+        return None if data is None else json.loads(data)
+
+    def __acquire_lock(self, key):
+        token = uuid.uuid4().hex
+        acquired = self._redis.set(
+            self.__lock_key(key), token, nx=True, px=round(self._lock_timeout * 1000)
+        )
+        return token if acquired else None
+
+    def __release_lock(self, key, token):
+        try:
+            self._release_lock(keys=[self.__lock_key(key)], args=[token])
+        except redis.RedisError as error:
+            # The lock expires after its timeout
+            current_app.logger.warning(f"Cannot unlock '{key}'. {error}")
+
+    def __lock_key(self, key):
+        return f"{key}:lock"
+
+
+shared_cache = SharedCache()
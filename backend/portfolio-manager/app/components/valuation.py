@@ -0,0 +1,275 @@
+from app.components.extensions import db
+from app.components.market_data_fetcher import market_data_fetcher
+from app.models.portfolio import Position, Security
+import numpy as np
+
+# Positions smaller than this are considered closed
+QUANTITY_TOLERANCE = 1e-8
+
+
+def scan_cost_basis(factors: np.ndarray, costs: np.ndarray) -> np.ndarray:
+    """
+    Solve the recurrence cost_basis[k] = factors[k] * cost_basis[k - 1] + costs[k].
+
+    The recurrence is an inclusive scan over affine maps, which is computed in
+    log2(n) vectorized passes. Each pass composes every map with the one
+    'step' positions before it. A zero factor resets the cost basis.
+
+    :param factors: The share of the previous cost basis kept by every trade.
+    :param costs: The cost added by every trade.
+    :return: The cost basis after every trade.
+    """
+    factors = factors.copy()
+    cost_basis = costs.copy()
+    step = 1
+    while step < len(cost_basis) and factors[step:].any():
+        # The right hand sides are evaluated before the arrays are updated
+        cost_basis[step:] = cost_basis[step:] + factors[step:] * cost_basis[:-step]
+        factors[step:] = factors[step:] * factors[:-step]
+        step *= 2
+    return cost_basis
+
+
+def scan_positions(quantities: np.ndarray, is_group_start: np.ndarray) -> np.ndarray:
+    """
+    Solve the recurrence position[k] = max(position[k - 1] + quantities[k], 0).
+
+    Every trade is a map x -> max(x + shift, floor), and a composition of such
+    maps is a map of the same form, so the recurrence is an inclusive scan
+    computed in log2(n) vectorized passes like scan_cost_basis. A map of
+    the first trade of a group ignores the previous position.
+
+    :param quantities: The trade quantities, negative for sells.
+    :param is_group_start: True for the first trade of every group.
+    :return: The position after every trade.
+    """
+    shifts = np.where(is_group_start, -np.inf, quantities)
+    positions = np.where(is_group_start, np.maximum(quantities, 0.0), 0.0)
+    step = 1
+    while step < len(positions) and np.isfinite(shifts[step:]).any():
+        # The right hand sides are evaluated before the arrays are updated
+        positions[step:] = np.maximum(
+            positions[:-step] + shifts[step:], positions[step:]
+        )
+        shifts[step:] = shifts[:-step] + shifts[step:]
+        step *= 2
+    return positions
+
+
+def compute_positions(
+    security_ids: np.ndarray,
+    quantities: np.ndarray,
+    unit_prices: np.ndarray,
+    fees: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """
+    Compute per security positions from trades with the average cost method.
+
+    Buys add their price and fee to the cost basis. Sells reduce the cost basis
+    proportionally to the sold quantity and realize the difference between
+    the proceeds net of the fee and the average cost of the sold quantity.
+    Short positions aren't supported: selling more than the position closes it,
+    and only the held quantity is realized.
+
+    :param security_ids: The security ids of trades in chronological order.
+    :param quantities: The trade quantities, negative for sells.
+    :param unit_prices: The trade unit prices.
+    :param fees: The trade brokerage fees.
+    :return: The columns of positions ordered by security id: security_id,
+             quantity, cost_basis and realized_pnl.
+    """
+    if len(security_ids) == 0:
+        empty = np.empty(0)
+        return {
+            "security_id": np.empty(0, dtype=np.int64),
+            "quantity": empty,
+            "cost_basis": empty,
+            "realized_pnl": empty,
+        }
+
+    # Group trades by security keeping the chronological order inside groups
+    order = np.argsort(security_ids, kind="stable")
+    security_ids = security_ids[order]
+    quantities = quantities[order]
+    unit_prices = unit_prices[order]
+    fees = fees[order]
+
+    is_group_start = np.empty(len(security_ids), dtype=bool)
+    is_group_start[0] = True
+    np.not_equal(security_ids[1:], security_ids[:-1], out=is_group_start[1:])
+    group_starts = np.flatnonzero(is_group_start)
+    group_ends = np.append(group_starts[1:], len(security_ids)) - 1
+
+    positions = np.round(scan_positions(quantities, is_group_start), 8)
+    previous_positions = np.empty_like(positions)
+    previous_positions[0] = 0.0
+    previous_positions[1:] = positions[:-1]
+    previous_positions[group_starts] = 0.0
+
+    is_sell = quantities < 0
+    # An oversell sells the whole position only
+    sold = np.where(is_sell, np.minimum(-quantities, previous_positions), 0.0)
+    is_close = is_sell & (sold >= previous_positions - QUANTITY_TOLERANCE)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sell_factors = np.where(is_close, 0.0, 1.0 - sold / previous_positions)
+    factors = np.where(is_sell, sell_factors, 1.0)
+    # Every group starts with an empty cost basis
+    factors[group_starts] = 0.0
+    costs = np.where(is_sell, 0.0, quantities * unit_prices + fees)
+
+    cost_basis = scan_cost_basis(factors, costs)
+    previous_cost_basis = np.empty_like(cost_basis)
+    previous_cost_basis[0] = 0.0
+    previous_cost_basis[1:] = cost_basis[:-1]
+    previous_cost_basis[group_starts] = 0.0
+
+    sold_cost = np.where(
+        is_close,
+        previous_cost_basis,
+        previous_cost_basis * (1.0 - factors),
+    )
+    realized_pnl = np.where(is_sell, sold * unit_prices - fees - sold_cost, 0.0)
+
+    final_positions = positions[group_ends]
+    return {
+        "security_id": security_ids[group_starts],
+        "quantity": np.where(
+            np.abs(final_positions) < QUANTITY_TOLERANCE, 0.0, final_positions
+        ),
+        "cost_basis": cost_basis[group_ends],
+        "realized_pnl": np.add.reduceat(realized_pnl, group_starts),
+    }
+
+
+def apply_trade(
+    position: tuple[float, float, float],
+    quantity: float,
+    unit_price: float,
+    fee: float,
+) -> tuple[float, float, float]:
+    """
+    Apply a single trade to a position with the same rules as compute_positions.
+
+    :param position: The quantity, cost basis and realized P&L of a position.
+    :param quantity: The trade quantity, negative for sells.
+    :param unit_price: The trade unit price.
+    :param fee: The trade brokerage fee.
+    :return: The quantity, cost basis and realized P&L after the trade.
+    """
+    previous_quantity, cost_basis, realized_pnl = position
+    new_quantity = round(max(previous_quantity + quantity, 0.0), 8)
+    if abs(new_quantity) < QUANTITY_TOLERANCE:
+        new_quantity = 0.0
+    if quantity >= 0:
+        return new_quantity, cost_basis + quantity * unit_price + fee, realized_pnl
+    sold = min(-quantity, previous_quantity)
+    if sold >= previous_quantity - QUANTITY_TOLERANCE:
+        sold_cost = cost_basis
+    else:
+        sold_cost = cost_basis * sold / previous_quantity
+    return (
+        new_quantity,
+        cost_basis - sold_cost,
+        realized_pnl + sold * unit_price - fee - sold_cost,
+    )
+
+
+class PortfolioValuation:
+    def value_portfolio(self, portfolio_id: int) -> dict:
+        """
+        Value a portfolio using the latest quotes.
+
+        :param portfolio_id: The portfolio id.
+        :return: The portfolio positions and totals.
+        """
+        rows = db.session.execute(
+            db.select(
+                Position.security_id,
+                Security.symbol,
+                Position.quantity,
+                Position.cost_basis,
+                Position.realized_pnl,
+            )
+            .join(Position.security)
+            .filter(Position.portfolio_id == portfolio_id)
+            .order_by(Position.security_id)
+        ).all()
+        security_ids, symbols, quantities, cost_basis, realized_pnl = (
+            zip(*rows) if rows else ((),) * 5
+        )
+        columns = {
+            "security_id": np.array(security_ids, dtype=np.int64),
+            "quantity": np.array(quantities, dtype=np.float64),
+            "cost_basis": np.array(cost_basis, dtype=np.float64),
+            "realized_pnl": np.array(realized_pnl, dtype=np.float64),
+        }
+        symbols = dict(zip(security_ids, symbols))
+        open_symbols = [
+            symbols[security_id]
+            for security_id, quantity in zip(security_ids, quantities)
+            if quantity != 0
+        ]
+        quotes = market_data_fetcher.get_quotes(open_symbols) if open_symbols else {}
+        return self.make_valuation(portfolio_id, columns, symbols, quotes)
+
+    def make_valuation(
+        self, portfolio_id: int, columns: dict, symbols: dict, quotes: dict
+    ) -> dict:
+        """
+        Value positions at the given quotes.
+
+        :param portfolio_id: The portfolio id.
+        :param columns: The position columns returned by compute_positions.
+        :param symbols: The security symbols by security ids.
+        :param quotes: The latest prices by symbols.
+        :return: The portfolio positions and totals.
+        """
+        security_ids = columns["security_id"].tolist()
+        quantities = columns["quantity"]
+        cost_basis = columns["cost_basis"]
+        prices = np.array(
+            [quotes.get(symbols[security_id], np.nan) for security_id in security_ids],
+            dtype=np.float64,
+        )
+        market_values = np.where(quantities == 0, 0.0, quantities * prices)
+        unrealized_pnl = market_values - cost_basis
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average_costs = np.where(quantities > 0, cost_basis / quantities, 0.0)
+
+        def to_amounts(values):
+            # NaN means that there is no quote for a security
+            return [
+                None if value != value else value
+                for value in np.round(values, 2).tolist()
+            ]
+
+        position_columns = {
+            "security_id": security_ids,
+            "symbol": [symbols[security_id] for security_id in security_ids],
+            "quantity": quantities.tolist(),
+            "average_cost": to_amounts(average_costs),
+            "cost_basis": to_amounts(cost_basis),
+            "price": to_amounts(prices),
+            "market_value": to_amounts(market_values),
+            "realized_pnl": to_amounts(columns["realized_pnl"]),
+            "unrealized_pnl": to_amounts(unrealized_pnl),
+        }
+        positions = [
+            dict(zip(position_columns, values))
+            for values in zip(*position_columns.values())
+        ]
+        # Positions without a quote are left out of the totals
+        totals = {
+            "market_value": np.nansum(market_values),
+            "cost_basis": np.sum(cost_basis),
+            "realized_pnl": np.sum(columns["realized_pnl"]),
+            "unrealized_pnl": np.nansum(unrealized_pnl),
+        }
+        return {
+            "portfolio_id": portfolio_id,
+            "positions": positions,
+            **dict(zip(totals, to_amounts(list(totals.values())))),
+        }
+
+
+portfolio_valuation = PortfolioValuation()
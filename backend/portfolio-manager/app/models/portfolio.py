@@ -2,6 +2,7 @@ from app.components.extensions import db, marshmallow
 from app.models.user import User
 from marshmallow_enum import EnumField
 from marshmallow_sqlalchemy import fields
+from sqlalchemy import DDL, event
 
 import enum
 
@@ -69,6 +70,21 @@ class SecurityStatus(enum.Enum):
 
 class Security(db.Model):
     __tablename__ = "security"
+    # Trigram indexes speed up the ranked search by a part of a symbol or a name
+    __table_args__ = (
+        db.Index(
+            "ix_security_symbol_trgm",
+            "symbol",
+            postgresql_using="gin",
+            postgresql_ops={"symbol": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "ix_security_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     symbol = db.Column(db.String(30), nullable=False, unique=True, index=True)
@@ -88,6 +104,14 @@ class Security(db.Model):
     )
 
 
+# Trigram operator classes are provided by the pg_trgm extension
+event.listen(
+    Security.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
+
+
 class TradeType(enum.Enum):
     buy = "BUY"
     sell = "SELL"
@@ -132,6 +156,43 @@ class Trade(db.Model):
     security = db.relationship("Security", back_populates="trades")
 
 
+class Position(db.Model):
+    """
+    A holding of a security in a portfolio derived from the portfolio trades.
+
+    Positions are maintained by the positions manager in the same transaction
+    as trades, so reading holdings doesn't require reading every trade.
+    """
+
+    __tablename__ = "position"
+
+    portfolio_id = db.Column(
+        db.Integer,
+        db.ForeignKey("portfolio.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    security_id = db.Column(
+        db.Integer,
+        db.ForeignKey("security.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    quantity = db.Column(db.Float, nullable=False)
+    cost_basis = db.Column(db.Float, nullable=False)
+    realized_pnl = db.Column(db.Float, nullable=False)
+    # The latest trade applied to the position. Trades placed after it
+    # are applied incrementally, other changes recompute the position
+    last_trade_datetime = db.Column(db.DateTime(timezone=True), nullable=False)
+    last_trade_id = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+    )
+
+    security = db.relationship("Security")
+
+
 class SecuritySchema(marshmallow.SQLAlchemyAutoSchema):
     class Meta:
         model = Security
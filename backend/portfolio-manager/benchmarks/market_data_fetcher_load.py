@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Load test of requests to the market-data-fetcher against a local stub.
+
+Compares the throughput and the latency of a request per connection, which
+the market data fetcher client used to do, with the pooled keep-alive session.
+The stub answers quote subscriptions and exchange rates in the format of the
+market-data-fetcher, optionally after a delay emulating its processing time.
+
+Usage: python -m benchmarks.market_data_fetcher_load [--threads 8] [--requests 500] [--delay-ms 0]
+"""
+
+from app.components.market_data_fetcher import MarketDataFetcher
+from flask import Flask
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import requests
+import statistics
+import threading
+import time
+
+QUOTES = {"AAPL": 178.12, "MSFT": 329.41, "TSLA": 251.05}
+EXCHANGE_RATES = [
+    {"from": "USD", "to": "EUR", "rate": 0.94},
+    {"from": "USD", "to": "RUB", "rate": 97.3},
+]
+
+
+def make_stub_handler(delay: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        # Keeps connections alive between requests. Headers and a body are
+        # written separately, so Nagle's algorithm would delay every response
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.__respond(EXCHANGE_RATES)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.__respond(QUOTES)
+
+        def log_message(self, format, *args):
+            pass
+
+        def __respond(self, payload):
+            if delay:
+                time.sleep(delay)
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StubHandler
+
+
+def run_load(app, send, threads: int, requests_per_thread: int) -> tuple:
+    latencies = [[] for _ in range(threads)]
+
+    def worker(index):
+        # Every thread emulates a worker serving requests in the app context
+        with app.app_context():
+            for i in range(requests_per_thread):
+                start_time = time.perf_counter()
+                send(i)
+                latencies[index].append((time.perf_counter() - start_time) * 1000)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start_time = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+    all_latencies = [latency for thread in latencies for latency in thread]
+    percentiles = statistics.quantiles(all_latencies, n=100)
+    return len(all_latencies) / elapsed, percentiles[49], percentiles[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--delay-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_stub_handler(args.delay_ms / 1000)
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/api/v1"
+
+    app = Flask(__name__)
+    app.config.from_object("app.components.config.Config")
+    app.config["MARKET_DATA_FETCHER_BASE_URL"] = base_url
+    app.config["MARKET_DATA_FETCHER_POOL_SIZE"] = args.threads
+    fetcher = MarketDataFetcher()
+    fetcher.init_app(app)
+
+    def send_unpooled(i):
+        # The previous client: a new connection for every request and no timeout
+        if i % 2:
+            url = f"{base_url}/market/fx"
+            response = requests.request("GET", url, params={"currencies": "EUR,RUB"})
+        else:
+            url = f"{base_url}/market/quote"
+            response = requests.request("POST", url, json=list(QUOTES))
+        response.raise_for_status()
+        return response.json()
+
+    def send_pooled(i):
+        if i % 2:
+            return fetcher.get_currency_exchange_rates(["EUR", "RUB"])
+        return fetcher.subscribe_for_quotes(list(QUOTES))
+
+    print(
+        f"Threads: {args.threads}, requests per thread: {args.requests}, "
+        f"stub delay: {args.delay_ms} ms"
+    )
+    app.logger.disabled = True
+    for title, send in (("unpooled", send_unpooled), ("pooled", send_pooled)):
+        throughput, p50, p99 = run_load(app, send, args.threads, args.requests)
+        print(
+            f"{title:>8}: {throughput:8.0f} requests/s, "
+            f"p50 {p50:7.2f} ms, p99 {p99:7.2f} ms"
+        )
+    print(json.dumps(fetcher.get_stats()["latencies"], indent=2))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
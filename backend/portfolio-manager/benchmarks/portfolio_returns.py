@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Benchmark of the portfolio returns over synthetic trades.
+
+Measures the vectorized computation of the time-weighted return and the XIRR
+of portfolios with the given numbers of cash flows over ten years, over the
+whole history and over its last year. Loading trades from the database isn't
+included: repeated requests of the same period are served from the memo.
+
+Usage: python -m benchmarks.portfolio_returns [--repeat 20]
+"""
+
+from app.components.returns import SECONDS_PER_YEAR, compute_returns
+import argparse
+import numpy as np
+import statistics
+import time
+
+SECURITIES = 50
+YEARS = 10
+
+
+def make_trades(count: int):
+    random = np.random.default_rng(0)
+    times = np.sort(random.uniform(0, YEARS * SECONDS_PER_YEAR, count))
+    security_ids = random.integers(1, SECURITIES + 1, count)
+    quantities = np.round(random.uniform(1, 100, count), 2)
+    # Prices drift upwards, every third trade sells a part of the bought quantity
+    unit_prices = np.round(
+        100 * np.exp(times / SECONDS_PER_YEAR * 0.05 + random.normal(0, 0.1, count)),
+        2,
+    )
+    fees = np.round(random.uniform(0, 5, count), 2)
+    sells = np.arange(count) % 3 == 2
+    quantities[sells] = -np.round(quantities[sells] / 4, 2)
+    return times, security_ids, quantities, unit_prices, fees
+
+
+def measure(trades, start, repeat: int) -> tuple[float, float, dict]:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        returns = compute_returns(*trades, start=start)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings), max(timings), returns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for count in (10000, 100000, 1000000):
+        trades = make_trades(count)
+        for title, start in (
+            ("all", None),
+            ("last year", (YEARS - 1) * SECONDS_PER_YEAR),
+        ):
+            median, worst, returns = measure(trades, start, args.repeat)
+            print(
+                f"{count:>7} cash flows, {title:>9}: "
+                f"median {median:8.2f} ms, max {worst:8.2f} ms, "
+                f"twr {returns['twr']:8.4f}, xirr {returns['xirr']:7.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
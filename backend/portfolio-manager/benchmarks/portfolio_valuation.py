@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Benchmark of the portfolio valuation over synthetic trades.
+
+Measures the valuation of portfolios with the given number of trades spread
+over a number of securities. The valuation from trades computes positions,
+cost basis and P&L with numpy, which is what rebuilding positions does.
+The valuation from positions only values the stored positions, which is what
+the valuation endpoint does. Reading from the database isn't included.
+
+Usage: python -m benchmarks.portfolio_valuation [--trades 100000] [--repeat 20]
+"""
+
+from app.components.valuation import compute_positions, portfolio_valuation
+import argparse
+import numpy as np
+import statistics
+import time
+
+
+def make_trades(count: int, securities: int):
+    random = np.random.default_rng(0)
+    security_ids = random.integers(1, securities + 1, count)
+    quantities = np.round(random.uniform(1, 100, count), 2)
+    unit_prices = np.round(random.uniform(10, 500, count), 2)
+    fees = np.round(random.uniform(0, 5, count), 2)
+    # Every third trade sells a part of the accumulated position
+    sells = np.arange(count) % 3 == 2
+    quantities[sells] = -np.round(quantities[sells] / 4, 2)
+    return security_ids, quantities, unit_prices, fees
+
+
+def measure(value, repeat: int) -> tuple[float, float]:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        value()
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trades", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for securities in (1, 50, 1000):
+        trades = make_trades(args.trades, securities)
+        symbols = {
+            security_id: f"S{security_id}" for security_id in range(securities + 1)
+        }
+        quotes = {symbol: 100.0 for symbol in symbols.values()}
+        columns = compute_positions(*trades)
+        for title, value in (
+            (
+                "from trades",
+                lambda: portfolio_valuation.make_valuation(
+                    1, compute_positions(*trades), symbols, quotes
+                ),
+            ),
+            (
+                "from positions",
+                lambda: portfolio_valuation.make_valuation(1, columns, symbols, quotes),
+            ),
+        ):
+            median, worst = measure(value, args.repeat)
+            print(
+                f"{args.trades} trades, {securities:>4} securities, {title:>14}: "
+                f"median {median:7.2f} ms, max {worst:7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Benchmark of fanning a market data message out to quote streams.
+
+Compares the previous per-stream processing, where every stream decoded the
+whole message and filtered it by its symbols, with the quote broadcaster,
+which decodes a message once and finds interested streams by symbols.
+
+Usage: python -m benchmarks.quote_fanout [--streams 5000] [--symbols 2000] [--messages 20]
+"""
+
+from app.components.quote_broadcaster import QuoteBroadcaster
+from flask import Flask
+import argparse
+import json
+import random
+import statistics
+import time
+
+SYMBOLS_PER_STREAM = 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--streams", type=int, default=5000)
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    symbols = [f"S{i}" for i in range(args.symbols)]
+    streams = [random.sample(symbols, SYMBOLS_PER_STREAM) for _ in range(args.streams)]
+    message = json.dumps({symbol: random.uniform(10, 500) for symbol in symbols})
+
+    def per_stream():
+        for securities in streams:
+            quotes = json.loads(message)
+            {
+                security: price
+                for security, price in quotes.items()
+                if security in securities
+            }
+
+    app = Flask(__name__)
+    app.config.update(QUOTE_STREAM_QUEUE_SIZE=16, QUOTE_STREAM_RECONNECT_DELAY_SEC=1)
+    broadcaster = QuoteBroadcaster()
+    broadcaster.init_app(app)
+    broadcaster._QuoteBroadcaster__start_listener = lambda: None
+    subscriptions = [broadcaster.subscribe(securities) for securities in streams]
+
+    def broadcast():
+        broadcaster.dispatch(json.loads(message))
+        # Streams take their updates as the SSE generators would
+        for subscription in subscriptions:
+            subscription.get(timeout=0)
+
+    print(
+        f"Streams: {args.streams}, symbols per message: {args.symbols}, "
+        f"symbols per stream: {SYMBOLS_PER_STREAM}"
+    )
+    for title, fan_out in (("per stream", per_stream), ("broadcaster", broadcast)):
+        timings = []
+        for _ in range(args.messages):
+            start_time = time.perf_counter()
+            fan_out()
+            timings.append((time.perf_counter() - start_time) * 1000)
+        print(f"{title:>12}: median {statistics.median(timings):9.2f} ms per message")
+
+
+if __name__ == "__main__":
+    main()
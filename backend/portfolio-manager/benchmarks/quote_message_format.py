@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Benchmark of decoding quote messages.
+
+Compares decoding the previous JSON messages with the binary format of
+quote_message, uncompressed and compressed, for messages of a few quotes,
+a delta of a shard and a snapshot of all quotes.
+
+Usage: python -m benchmarks.quote_message_format [--number 2000]
+"""
+
+from app.components.quote_message import decode_quotes_message
+import argparse
+import json
+import msgpack
+import numpy as np
+import random
+import timeit
+import zlib
+
+MESSAGE_SIZES = (5, 100, 5000)
+
+
+def encode(quotes: dict, compress: bool) -> bytes:
+    # The same way as the market-data-fetcher encodes messages
+    payload = msgpack.packb(
+        {
+            "type": "delta",
+            "sequence": 1,
+            "symbols": list(quotes),
+            "prices": np.array(list(quotes.values()), "<f8").tobytes(),
+        }
+    )
+    if compress:
+        return msgpack.packb((1, "msgpack+zlib", zlib.compress(payload, 1)))
+    return msgpack.packb((1, "msgpack", payload))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    for size in MESSAGE_SIZES:
+        quotes = {f"S{i:04}": round(random.uniform(10, 500), 4) for i in range(size)}
+        number = max(args.number * MESSAGE_SIZES[0] // size, 10)
+        print(f"Quotes: {size}")
+        for title, data in (
+            (
+                "json",
+                json.dumps({"type": "delta", "sequence": 1, "quotes": quotes}).encode(),
+            ),
+            ("binary", encode(quotes, compress=False)),
+            ("zlib", encode(quotes, compress=True)),
+        ):
+            assert decode_quotes_message(data)["quotes"] == quotes
+            seconds = timeit.timeit(lambda: decode_quotes_message(data), number=number)
+            print(
+                f"{title:>8}: {len(data):7} bytes, "
+                f"{number / seconds:9.0f} messages/s, "
+                f"{number * size / seconds / 1e6:6.2f} M quotes/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
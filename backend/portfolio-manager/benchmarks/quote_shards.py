@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Benchmark of receiving quotes from a single channel and from sharded channels.
+
+A worker whose streams are interested in a number of symbols receives and
+decodes a whole snapshot of the universe from the single market data channel.
+With sharded channels it receives only the messages of the shards of its
+symbols. Compares the bytes and the decoding time per snapshot.
+
+Usage: python -m benchmarks.quote_shards [--universe 5000] [--shards 64] [--interest 10,100,1000]
+"""
+
+from app.components.market_data_subscriber import MarketDataSubscriber
+import argparse
+import json
+import random
+import statistics
+import time
+
+REPEATS = 20
+
+
+def measure(messages: list[str]) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start_time = time.perf_counter()
+        for message in messages:
+            json.loads(message)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--universe", type=int, default=5000)
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument("--interest", default="10,100,1000")
+    args = parser.parse_args()
+
+    random.seed(0)
+    symbols = [f"S{i}" for i in range(args.universe)]
+    quotes = {symbol: round(random.uniform(10, 500), 2) for symbol in symbols}
+
+    subscriber = MarketDataSubscriber()
+    subscriber._shards = args.shards
+    shards = {}
+    for symbol, price in quotes.items():
+        channel = subscriber.get_quote_channel(symbol)
+        shards.setdefault(channel, {})[symbol] = price
+
+    def to_message(channel_quotes):
+        return json.dumps({"type": "snapshot", "sequence": 1, "quotes": channel_quotes})
+
+    single_message = to_message(quotes)
+    shard_messages = {channel: to_message(quotes) for channel, quotes in shards.items()}
+    single_time = measure([single_message])
+
+    print(f"Universe: {args.universe} symbols, shards: {args.shards}")
+    print(f"single channel: {len(single_message):9d} bytes, {single_time:7.3f} ms")
+    for interest in map(int, args.interest.split(",")):
+        channels = {
+            subscriber.get_quote_channel(symbol)
+            for symbol in random.sample(symbols, interest)
+        }
+        messages = [shard_messages[channel] for channel in channels]
+        print(
+            f"{interest:5d} symbols: {sum(map(len, messages)):9d} bytes, "
+            f"{measure(messages):7.3f} ms, {len(channels)} channels"
+        )
+
+
+if __name__ == "__main__":
+    main()
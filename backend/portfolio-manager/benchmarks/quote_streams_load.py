@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Load test of idle quote streams against a running portfolio-manager.
+
+Measures the latency of a regular REST request, first alone and then while
+the given number of quote streams are kept open. With sync workers every
+stream pins a worker, so the REST requests queue up behind the streams.
+With the gevent workers of gunicorn.conf.py the latency should stay the same.
+
+Usage: python -m benchmarks.quote_streams_load --email user@example.com --password secret
+    [--base-url http://localhost:8000/api/v1] [--streams 5000] [--symbols AAPL,MSFT]
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse  # noqa: E402
+import gevent  # noqa: E402
+import gevent.event  # noqa: E402
+import requests  # noqa: E402
+import statistics  # noqa: E402
+import time  # noqa: E402
+
+
+def measure_latency(session, url: str, count: int) -> tuple:
+    latencies = []
+    for _ in range(count):
+        start_time = time.perf_counter()
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return percentiles[49], percentiles[98]
+
+
+def hold_stream(cookies, url: str, symbols: str, opened: list, stop):
+    try:
+        with requests.get(
+            url,
+            params={"securities": symbols},
+            cookies=cookies,
+            stream=True,
+            timeout=60,
+        ) as response:
+            response.raise_for_status()
+            opened.append(True)
+            # Reads the quotes and heartbeats until the test is over
+            for _ in response.iter_lines():
+                if stop.is_set():
+                    return
+    except requests.RequestException:
+        opened.append(False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--streams", type=int, default=5000)
+    parser.add_argument("--symbols", default="AAPL,MSFT")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    response = session.post(
+        f"{args.base_url}/login",
+        json={"email": args.email, "password": args.password},
+    )
+    response.raise_for_status()
+    rest_url = f"{args.base_url}/currencies"
+    stream_url = f"{args.base_url}/securities/quotes/stream"
+
+    p50, p99 = measure_latency(session, rest_url, args.requests)
+    print(f"REST latency without streams: p50 {p50:7.2f} ms, p99 {p99:7.2f} ms")
+
+    opened = []
+    stop = gevent.event.Event()
+    streams = [
+        gevent.spawn(
+            hold_stream, session.cookies, stream_url, args.symbols, opened, stop
+        )
+        for _ in range(args.streams)
+    ]
+    deadline = time.monotonic() + 60
+    while len(opened) < args.streams and time.monotonic() < deadline:
+        gevent.sleep(0.5)
+    print(f"Open streams: {opened.count(True)}, failed: {opened.count(False)}")
+
+    p50, p99 = measure_latency(session, rest_url, args.requests)
+    print(
+        f"REST latency with {opened.count(True)} streams: "
+        f"p50 {p50:7.2f} ms, p99 {p99:7.2f} ms"
+    )
+    stop.set()
+    gevent.killall(streams, block=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Benchmark of the securities search over a synthetic security table.
+
+Compares the latency of the linear scan, which the search used to run on every
+request, with the in-memory search index. The linear scan is measured over
+objects which are already in memory, so the numbers are its lower bound:
+the real scan also loads and hydrates every row of the security table.
+
+With --database both search backends of the securities manager are compared
+on the security table of the database configured by FLASK_CONFIG.
+
+Usage: python -m benchmarks.securities_search [--securities 70000] [--queries 2000]
+       python -m benchmarks.securities_search --database [--queries 2000]
+"""
+
+from app.components.security_search_index import SecuritySearchIndex
+from types import SimpleNamespace
+import argparse
+import os
+import random
+import statistics
+import string
+import time
+
+MAX_SEARCH_RESULTS = 50
+
+WORDS = [
+    "american", "bancorp", "capital", "energy", "financial", "global", "group",
+    "health", "holdings", "industries", "international", "systems", "technologies",
+    "therapeutics", "trust", "pharmaceuticals", "resources", "realty", "partners",
+    "acquisition", "solutions", "networks", "semiconductor", "mining", "insurance",
+]  # fmt: skip
+
+
+def make_securities(count: int) -> list:
+    random.seed(0)
+    symbols = set()
+    while len(symbols) < count:
+        length = random.randint(1, 5)
+        symbols.add("".join(random.choices(string.ascii_uppercase, k=length)))
+    securities = []
+    for symbol in sorted(symbols):
+        words = random.sample(WORDS, k=random.randint(1, 3))
+        name = f"{symbol.capitalize()}{random.randint(1, 999)} " + " ".join(words)
+        securities.append(SimpleNamespace(symbol=symbol, name=name.title() + " Inc."))
+    return securities
+
+
+def make_queries(securities: list, count: int) -> list[str]:
+    # Emulate typing: every query is a prefix of a symbol or a name word
+    queries = []
+    for security in random.sample(securities, k=count):
+        text = random.choice([security.symbol, random.choice(security.name.split())])
+        queries.append(text[: random.randint(1, len(text))])
+    return queries
+
+
+def linear_scan(securities: list, query: str) -> list:
+    query = query.lower()
+
+    def is_match(security):
+        return query in security.symbol.lower() or query in security.name.lower()
+
+    return list(filter(is_match, securities))[:MAX_SEARCH_RESULTS]
+
+
+def measure(search, queries: list[str]) -> tuple[float, float]:
+    latencies = []
+    for query in queries:
+        start_time = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return percentiles[49], percentiles[98]
+
+
+def benchmark_database(queries_count: int):
+    from app import create_app
+    from app.components.extensions import db
+    from app.components.securities_manager import securities_manager
+    from app.models.portfolio import Security
+
+    app = create_app(os.environ["FLASK_CONFIG"])
+    with app.app_context():
+        securities = db.session.execute(db.select(Security.symbol, Security.name)).all()
+        queries = make_queries(securities, min(queries_count, len(securities)))
+        # Build the index before measuring
+        securities_manager.get_search_index()
+
+        print(f"Securities: {len(securities)}, queries: {len(queries)}")
+        for title, search in (
+            ("index", securities_manager.search_in_index),
+            ("trigram", securities_manager.search_in_database),
+        ):
+            p50, p99 = measure(search, queries)
+            print(f"{title:>12}: p50 {p50:8.3f} ms, p99 {p99:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--securities", type=int, default=70000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--database", action="store_true")
+    args = parser.parse_args()
+
+    if args.database:
+        benchmark_database(args.queries)
+        return
+
+    securities = make_securities(args.securities)
+    queries = make_queries(securities, args.queries)
+
+    start_time = time.perf_counter()
+    index = SecuritySearchIndex(securities)
+    build_time = time.perf_counter() - start_time
+
+    print(f"Securities: {len(securities)}, queries: {len(queries)}")
+    print(f"Index build time: {build_time:.2f} s")
+    for title, search in (
+        ("linear scan", lambda query: linear_scan(securities, query)),
+        ("search index", lambda query: index.search(query, MAX_SEARCH_RESULTS)),
+    ):
+        p50, p99 = measure(search, queries)
+        print(f"{title:>12}: p50 {p50:8.3f} ms, p99 {p99:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
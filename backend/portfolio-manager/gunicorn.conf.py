@@ -0,0 +1,31 @@
+# Gunicorn configuration of the portfolio-manager.
+# Settings can be overridden from the command line, e.g. --workers 2
+
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Quote streams stay open for as long as a page is open. Sync workers would
+# serve a single stream each, so cooperative gevent workers are used. A gevent
+# worker monkey-patches sockets, so Redis and HTTP clients yield while waiting
+# for I/O, and runs every request in its own greenlet
+worker_class = "gevent"
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+
+# Max number of simultaneous clients, streams included, served by a worker
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 2000))
+
+# A worker which doesn't notify the master for this many seconds is restarted.
+# Streams don't block the notifications since they yield while waiting
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_fork(server, worker):
+    # psycopg2 is a C extension, which isn't patched by gevent. The wait callback
+    # makes it yield to other greenlets while waiting for the database
+    from psycogreen.gevent import patch_psycopg
+
+    patch_psycopg()
+    server.log.info(f"Made psycopg2 cooperative in worker {worker.pid}")
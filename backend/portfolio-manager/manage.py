@@ -111,5 +111,72 @@ def create_initial_db():
     create_db(os.getenv("APPLICATION_DB"))
 
 
+@cli.command()
+def sync_securities():
+    """Synchronize the security table with the market-data-fetcher."""
+    from app import create_app
+    from app.components.securities_manager import securities_manager
+
+    app = create_app(os.environ["FLASK_CONFIG"])
+    with app.app_context():
+        stats = securities_manager.sync_securities()
+    click.echo(
+        f"Synchronized {stats['received']} securities in {stats['seconds']} seconds: "
+        f"{stats['inserted']} inserted, {stats['updated']} updated, "
+        f"{stats['delisted']} delisted, {stats['skipped']} skipped"
+    )
+
+
+@cli.command()
+@click.option(
+    "--portfolio-id",
+    "portfolio_ids",
+    type=int,
+    multiple=True,
+    help="A portfolio to rebuild. All portfolios are rebuilt by default.",
+)
+def rebuild_positions(portfolio_ids):
+    """Recompute the position table from trades."""
+    from app import create_app
+    from app.components.positions_manager import positions_manager
+
+    app = create_app(os.environ["FLASK_CONFIG"])
+    with app.app_context():
+        stats = positions_manager.rebuild_positions(list(portfolio_ids))
+    click.echo(
+        f"Rebuilt {stats['positions']} positions of {stats['portfolios']} portfolios "
+        f"in {stats['seconds']} seconds"
+    )
+
+
+@cli.command()
+@click.option(
+    "--portfolio-id",
+    "portfolio_ids",
+    type=int,
+    multiple=True,
+    help="A portfolio to check. All portfolios are checked by default.",
+)
+def check_positions(portfolio_ids):
+    """Compare the position table with positions recomputed from trades."""
+    from app import create_app
+    from app.components.positions_manager import positions_manager
+
+    app = create_app(os.environ["FLASK_CONFIG"])
+    with app.app_context():
+        mismatches = positions_manager.check_positions(list(portfolio_ids))
+    for mismatch in mismatches:
+        click.echo(
+            f"Portfolio {mismatch['portfolio_id']}, security {mismatch['security_id']}: "
+            f"{mismatch['field']} is {mismatch['stored']}, "
+            f"expected {mismatch['expected']}"
+        )
+    if mismatches:
+        raise click.ClickException(
+            f"Found {len(mismatches)} mismatches, run rebuild-positions to fix them"
+        )
+    click.echo("Positions are consistent with trades")
+
+
 if __name__ == "__main__":
     cli()
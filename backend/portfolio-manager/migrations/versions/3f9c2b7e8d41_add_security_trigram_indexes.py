@@ -0,0 +1,41 @@
+"""Add security trigram indexes
+
+Revision ID: 3f9c2b7e8d41
+Revises: 71b6be49c9a1
+Create Date: 2026-10-18 10:12:31.415926
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3f9c2b7e8d41"
+down_revision = "71b6be49c9a1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.batch_alter_table("security", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_security_symbol_trgm",
+            ["symbol"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={"symbol": "gin_trgm_ops"},
+        )
+        batch_op.create_index(
+            "ix_security_name_trgm",
+            ["name"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("security", schema=None) as batch_op:
+        batch_op.drop_index("ix_security_name_trgm")
+        batch_op.drop_index("ix_security_symbol_trgm")
+    # The extension is left installed since other objects may depend on it
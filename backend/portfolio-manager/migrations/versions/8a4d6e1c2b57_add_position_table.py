@@ -0,0 +1,51 @@
+"""Add position table
+
+Revision ID: 8a4d6e1c2b57
+Revises: 3f9c2b7e8d41
+Create Date: 2026-10-18 14:02:11.271828
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8a4d6e1c2b57"
+down_revision = "3f9c2b7e8d41"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "position",
+        sa.Column("portfolio_id", sa.Integer(), nullable=False),
+        sa.Column("security_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("cost_basis", sa.Float(), nullable=False),
+        sa.Column("realized_pnl", sa.Float(), nullable=False),
+        sa.Column("last_trade_datetime", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_trade_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["portfolio_id"],
+            ["portfolio.id"],
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["security_id"],
+            ["security.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("portfolio_id", "security_id"),
+    )
+    # Positions of existing trades are filled in by 'manage.py rebuild-positions'
+
+
+def downgrade():
+    op.drop_table("position")
@@ -7,7 +7,14 @@ from flask_security import current_user
 from manage import create_db
 from app import create_app
 from app.components.extensions import db, security
-from app.models.portfolio import Currency, Portfolio, Security, Trade
+from app.models.portfolio import (
+    AssetType,
+    Currency,
+    Portfolio,
+    Security,
+    SecurityStatus,
+    Trade,
+)
 
 registered_user = {"email": "registered.user@gmail.com", "password": "Registered.user1"}
 new_user = {"email": "new.user@gmail.com", "password": "New.user2"}
@@ -18,9 +25,13 @@ currencies = [
 ]
 
 securities = [
-    {"isin": "US4592001014", "symbol": "IBM"},
-    {"isin": "US88160R1014", "symbol": "TSLA"},
-    {"isin": "US0378331005", "symbol": "AAPL"},
+    {
+        "symbol": "IBM",
+        "name": "International Business Machines Corp.",
+        "exchange": "NYSE",
+    },
+    {"symbol": "TSLA", "name": "Tesla, Inc.", "exchange": "NASDAQ"},
+    {"symbol": "AAPL", "name": "Apple Inc.", "exchange": "NASDAQ"},
 ]
 
 existing_portfolio = {"name": "Existing portfolio", "currency_id": 1}
@@ -77,7 +88,13 @@ def init_database(test_client):
 
     # Create securities
     for sec in securities:
-        db.session.add(Security(**sec))
+        db.session.add(
+            Security(
+                **sec,
+                asset_type=AssetType.stock,
+                status=SecurityStatus.active,
+            )
+        )
 
     db.session.commit()
 
@@ -0,0 +1,109 @@
+"""
+This file (test_securities.py) contains the functional tests for
+the securities synchronisation and search.
+
+These tests synchronise the security table with the traded securities
+returned by a stubbed market-data-fetcher and search it in Postgres.
+"""
+
+import pytest
+from app.components.extensions import db
+from app.components.market_data_fetcher import market_data_fetcher
+from app.components.securities_manager import securities_manager
+from app.models.portfolio import AssetType, Security, SecurityStatus
+
+
+def make_row(symbol, name, exchange="NYSE", asset_type="stock"):
+    return {
+        "symbol": symbol,
+        "name": name,
+        "price": 100.0,
+        "exchange": exchange,
+        "assetType": asset_type,
+    }
+
+
+def test_sync_securities(init_database, monkeypatch):
+    """
+    GIVEN a Flask application configured for testing
+    WHEN the security table is synchronised with the traded securities
+    THEN check that new securities are inserted, changed ones are updated,
+         securities which are no longer traded are delisted and invalid rows
+         are skipped without failing the synchronisation
+    """
+    rows = [
+        make_row("IBM", "International Business Machines Corp."),
+        make_row("TSLA", "Tesla, Inc.", exchange="NYSE"),
+        make_row("MSFT", "Microsoft Corporation", exchange="NASDAQ"),
+        make_row("NONAME", None),
+        make_row("NOEXCHANGE", "No Exchange Inc.", exchange=""),
+        make_row("BOND", "Bond Inc.", asset_type="bond"),
+        {"symbol": "NOTYPE", "name": "No Type Inc.", "exchange": "NYSE"},
+    ]
+    monkeypatch.setattr(market_data_fetcher, "get_traded_securities", lambda: rows)
+
+    stats = securities_manager.sync_securities()
+
+    assert stats["received"] == 7
+    assert stats["inserted"] == 1
+    # IBM is unchanged, TSLA has moved to another exchange
+    assert stats["updated"] == 1
+    assert stats["delisted"] == 1
+    assert stats["skipped"] == 4
+    statuses = dict(
+        db.session.execute(db.select(Security.symbol, Security.status)).all()
+    )
+    assert statuses == {
+        "IBM": SecurityStatus.active,
+        "TSLA": SecurityStatus.active,
+        "AAPL": SecurityStatus.delisted,
+        "MSFT": SecurityStatus.active,
+    }
+    msft = db.session.execute(db.select(Security).filter_by(symbol="MSFT")).scalar_one()
+    assert msft.exchange == "NASDAQ"
+    assert msft.asset_type == AssetType.stock
+
+    # A delisted security is listed again when it's traded again
+    rows.append(make_row("AAPL", "Apple Inc.", exchange="NASDAQ"))
+    stats = securities_manager.sync_securities()
+    assert stats["inserted"] == 0
+    assert stats["updated"] == 1
+    assert stats["delisted"] == 0
+
+
+@pytest.mark.parametrize(
+    "query, symbols",
+    [
+        ("ibm", ["IBM"]),
+        ("T", ["TSLA", "IBM"]),
+        ("apple", ["AAPL"]),
+        # Near misses of symbols and names
+        ("IBMM", ["IBM"]),
+        ("Tesle", ["TSLA"]),
+        ("XYZ", []),
+    ],
+)
+def test_search_in_database(init_database, query, symbols):
+    """
+    GIVEN a Flask application configured for testing
+    WHEN securities are searched with the trigram backend
+    THEN check that exact symbol matches go first, followed by prefix matches
+         and then by securities similar to the query
+    """
+    found = securities_manager.search_in_database(query)
+    assert [security.symbol for security in found] == symbols
+
+
+def test_search_in_database_skips_delisted(init_database):
+    """
+    GIVEN a Flask application configured for testing
+    WHEN a delisted security is searched with the trigram backend
+    THEN check that it isn't found
+    """
+    db.session.execute(
+        db.update(Security)
+        .where(Security.symbol == "AAPL")
+        .values(status=SecurityStatus.delisted)
+    )
+    db.session.commit()
+    assert securities_manager.search_in_database("AAPL") == []
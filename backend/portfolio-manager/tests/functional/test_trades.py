@@ -10,7 +10,8 @@ from datetime import datetime
 from sqlalchemy import func
 from conftest import existing_trade, create_random_trade_params
 from app.components.extensions import db
-from app.models.portfolio import Trade
+from app.components.positions_manager import positions_manager
+from app.models.portfolio import Position, Trade
 
 
 def test_unauthenticated_trades_read_all(test_client):
@@ -298,3 +299,43 @@ def test_successful_trade_delete(test_client, create_trade):
     """
     response = test_client.delete("/api/portfolios/1/trades/1")
     assert response.status_code == 200
+
+
+def test_positions_follow_trades(test_client, create_portfolio):
+    """
+    GIVEN a Flask application configured for testing
+    WHEN trades are created, updated and deleted when the user is logged in
+    THEN check that the positions are consistent with the trades
+    """
+    trade_params = create_random_trade_params()
+    trade_params.update(security_id=1, trade_type="buy", unit_price=100.0)
+    trade_params.update(quantity=4.0, brokerage_fee=2.0)
+    response = test_client.post("/api/portfolios/1/trades", json=trade_params)
+    assert response.status_code == 201
+    first_trade_id = response.json["id"]
+
+    trade_params = create_random_trade_params()
+    trade_params.update(security_id=1, trade_type="sell", unit_price=120.0)
+    trade_params.update(quantity=1.0, brokerage_fee=1.0)
+    response = test_client.post("/api/portfolios/1/trades", json=trade_params)
+    assert response.status_code == 201
+
+    position = db.session.get(Position, (1, 1), populate_existing=True)
+    assert position.quantity == pytest.approx(3.0)
+    assert position.cost_basis == pytest.approx(402.0 * 3 / 4)
+    assert position.realized_pnl == pytest.approx(120.0 - 1.0 - 402.0 / 4)
+    assert positions_manager.check_positions() == []
+
+    trade_params = create_random_trade_params()
+    trade_params.update(security_id=2, trade_type="buy")
+    response = test_client.put(
+        f"/api/portfolios/1/trades/{first_trade_id}", json=trade_params
+    )
+    assert response.status_code == 200
+    assert db.session.get(Position, (1, 2), populate_existing=True) is not None
+    assert positions_manager.check_positions() == []
+
+    response = test_client.delete(f"/api/portfolios/1/trades/{first_trade_id}")
+    assert response.status_code == 204
+    assert db.session.get(Position, (1, 2), populate_existing=True) is None
+    assert positions_manager.check_positions() == []
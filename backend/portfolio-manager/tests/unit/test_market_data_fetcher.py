@@ -0,0 +1,162 @@
+"""
+This file (test_market_data_fetcher.py) contains the unit tests for the
+market-data-fetcher client, its circuit breaker and latency histograms.
+"""
+
+import pytest
+import requests
+import threading
+import time
+from app.components.circuit_breaker import CircuitBreaker
+from app.components.errors import PortfolioManagerError
+from app.components.latency_histogram import LatencyHistogram
+from app.components.market_data_fetcher import MarketDataFetcher
+from flask import Flask
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def create_fetcher(base_url: str, retries: int) -> tuple[Flask, MarketDataFetcher]:
+    app = Flask(__name__)
+    app.config.update(
+        MARKET_DATA_FETCHER_BASE_URL=base_url,
+        MARKET_DATA_FETCHER_POOL_SIZE=1,
+        MARKET_DATA_FETCHER_CONNECT_TIMEOUT_SEC=1,
+        MARKET_DATA_FETCHER_READ_TIMEOUT_SEC=1,
+        MARKET_DATA_FETCHER_SECURITIES_READ_TIMEOUT_SEC=1,
+        MARKET_DATA_FETCHER_RETRIES=retries,
+        MARKET_DATA_FETCHER_BACKOFF_FACTOR_SEC=0,
+        MARKET_DATA_FETCHER_BACKOFF_JITTER_SEC=0,
+        MARKET_DATA_FETCHER_FAILURE_THRESHOLD=100,
+        MARKET_DATA_FETCHER_RESET_TIMEOUT_SEC=60,
+    )
+    fetcher = MarketDataFetcher()
+    fetcher.init_app(app)
+    return app, fetcher
+
+
+def test_circuit_breaker_opens_after_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.get_state() == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_circuit_breaker_lets_single_trial_request():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert breaker.get_state() == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.get_state() == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_circuit_breaker_reopens_after_failed_trial():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.get_state() == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(buckets_ms=(10, 100))
+    for seconds in (0.005, 0.01, 0.05, 1.0):
+        histogram.observe(seconds)
+    histogram.observe(0.2, error=True)
+    stats = histogram.to_dict()
+    assert stats["count"] == 5
+    assert stats["errors"] == 1
+    assert stats["buckets"] == {"le_10ms": 2, "le_100ms": 3, "le_inf": 5}
+
+
+def test_unavailable_fetcher_opens_circuit():
+    # Nothing listens on the port, so connections are refused at once
+    app, fetcher = create_fetcher("http://127.0.0.1:9/api/v1", retries=0)
+    fetcher._circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    with app.app_context():
+        for _ in range(2):
+            with pytest.raises(requests.ConnectionError):
+                fetcher.get_currency_exchange_rates(["EUR"])
+        with pytest.raises(PortfolioManagerError) as error:
+            fetcher.get_currency_exchange_rates(["EUR"])
+    assert error.value.status == 503
+    stats = fetcher.get_stats()
+    assert stats["circuit_breaker"] == CircuitBreaker.OPEN
+    assert stats["latencies"]["/market/fx"]["errors"] == 2
+
+
+def test_only_idempotent_requests_are_retried():
+    requested_paths = []
+
+    class OverloadedHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            requested_paths.append(self.path)
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OverloadedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        app, fetcher = create_fetcher(
+            f"http://127.0.0.1:{server.server_port}/api/v1", retries=2
+        )
+        with app.app_context():
+            for request in (
+                fetcher.subscribe_for_quotes,
+                fetcher.unsubscribe_from_quotes,
+                fetcher.renew_quote_subscriptions,
+            ):
+                with pytest.raises(requests.HTTPError):
+                    request(["IBM"])
+    finally:
+        server.shutdown()
+        server.server_close()
+    # Subscriptions are counted, so only heartbeats are repeated
+    assert requested_paths == [
+        "/api/v1/market/quote",
+        "/api/v1/market/quote/unsubscribe",
+        *["/api/v1/market/quote/heartbeat"] * 3,
+    ]
+
+
+def test_quotes_are_read_without_subscribing():
+    requests_made = []
+
+    class QuotesHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_made.append((self.command, self.path))
+            body = b'{"IBM": 150.5}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QuotesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        app, fetcher = create_fetcher(
+            f"http://127.0.0.1:{server.server_port}/api/v1", retries=0
+        )
+        with app.app_context():
+            assert fetcher.get_quotes(["IBM", "XXX"]) == {"IBM": 150.5}
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert requests_made == [("GET", "/api/v1/market/quote?symbols=IBM%2CXXX")]
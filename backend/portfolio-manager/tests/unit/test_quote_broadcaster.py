@@ -0,0 +1,172 @@
+"""
+This file (test_quote_broadcaster.py) contains the unit tests for the quote broadcaster.
+
+These tests dispatch quotes directly, without the Redis listener.
+"""
+
+import json
+import pytest
+from app.components.market_data_fetcher import market_data_fetcher
+from app.components.market_data_subscriber import market_data_subscriber
+from app.components.quote_broadcaster import QuoteBroadcaster, QuoteSubscription
+from flask import Flask
+
+
+@pytest.fixture
+def broadcaster(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(
+        QUOTE_STREAM_QUEUE_SIZE=2,
+        QUOTE_STREAM_RECONNECT_DELAY_SEC=1,
+        QUOTE_LISTENER_POLL_INTERVAL_SEC=0.5,
+        QUOTE_STREAM_REPLAY_COUNT=100,
+    )
+    broadcaster = QuoteBroadcaster()
+    broadcaster.init_app(app)
+    # Subscriptions would start the Redis listener otherwise
+    monkeypatch.setattr(broadcaster, "_QuoteBroadcaster__start_listener", lambda: None)
+    return broadcaster
+
+
+def test_quotes_are_delivered_to_interested_subscriptions(broadcaster):
+    apple = broadcaster.subscribe(["AAPL"])
+    both = broadcaster.subscribe(["AAPL", "TSLA"])
+    microsoft = broadcaster.subscribe(["MSFT"])
+    broadcaster.dispatch({"AAPL": 178.1, "TSLA": 251.0, "IBM": 140.2})
+
+    assert apple.get(timeout=0) == {"AAPL": 178.1}
+    assert both.get(timeout=0) == {"AAPL": 178.1, "TSLA": 251.0}
+    assert microsoft.get(timeout=0) is None
+
+
+def test_unsubscribed_subscription_gets_no_quotes(broadcaster):
+    subscription = broadcaster.subscribe(["AAPL"])
+    assert broadcaster.get_subscriptions_count() == 1
+    broadcaster.unsubscribe(subscription)
+    assert broadcaster.get_subscriptions_count() == 0
+    broadcaster.dispatch({"AAPL": 178.1})
+    assert subscription.get(timeout=0) is None
+
+
+def test_slow_subscription_drops_oldest_quotes():
+    subscription = QuoteSubscription(["AAPL"], queue_size=2)
+    for price in (1.0, 2.0, 3.0):
+        subscription.put({"AAPL": price})
+    assert subscription.dropped == 1
+    assert subscription.get(timeout=0) == {"AAPL": 2.0}
+    assert subscription.get(timeout=0) == {"AAPL": 3.0}
+
+
+def test_deltas_are_dispatched_and_gaps_are_counted(broadcaster):
+    subscription = broadcaster.subscribe(["AAPL", "TSLA"])
+    broadcaster.handle_message(
+        "quotes:1",
+        {"type": "snapshot", "sequence": 1, "quotes": {"AAPL": 178.1, "TSLA": 251.0}},
+    )
+    assert subscription.get(timeout=0) == {"AAPL": 178.1, "TSLA": 251.0}
+    broadcaster.handle_message(
+        "quotes:1", {"type": "delta", "sequence": 2, "quotes": {"AAPL": 179.0}}
+    )
+    assert subscription.get(timeout=0) == {"AAPL": 179.0}
+    assert broadcaster.get_gaps_count() == 0
+    broadcaster.handle_message(
+        "quotes:1", {"type": "delta", "sequence": 4, "quotes": {"TSLA": 250.0}}
+    )
+    assert subscription.get(timeout=0) == {"TSLA": 250.0}
+    assert broadcaster.get_gaps_count() == 1
+
+
+def test_snapshot_dispatches_only_missed_quotes(broadcaster):
+    subscription = broadcaster.subscribe(["AAPL", "TSLA"])
+    broadcaster.handle_message(
+        "quotes:1",
+        {"type": "snapshot", "sequence": 1, "quotes": {"AAPL": 178.1, "TSLA": 251.0}},
+    )
+    subscription.get(timeout=0)
+    # The delta with a new TSLA quote has been lost
+    broadcaster.handle_message(
+        "quotes:1",
+        {"type": "snapshot", "sequence": 3, "quotes": {"AAPL": 178.1, "TSLA": 249.5}},
+    )
+    assert subscription.get(timeout=0) == {"TSLA": 249.5}
+    # Nothing is dispatched while in sync
+    broadcaster.handle_message(
+        "quotes:1",
+        {"type": "snapshot", "sequence": 4, "quotes": {"AAPL": 178.1, "TSLA": 249.5}},
+    )
+    assert subscription.get(timeout=0) is None
+
+
+class RecordingPubSub:
+    def __init__(self):
+        self.channels = set()
+
+    def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+
+def test_listener_subscribes_to_channels_of_symbols_only(broadcaster, monkeypatch):
+    monkeypatch.setattr(market_data_subscriber, "_shards", 64, raising=False)
+    apple = market_data_subscriber.get_quote_channel("AAPL")
+    tesla = market_data_subscriber.get_quote_channel("TSLA")
+    assert apple.startswith("quotes:") and apple != tesla
+
+    pubsub = RecordingPubSub()
+    subscription = broadcaster.subscribe(["AAPL", "TSLA"])
+    channels = broadcaster.update_channels(pubsub, set())
+    assert channels == pubsub.channels == {apple, tesla}
+
+    broadcaster.unsubscribe(subscription)
+    broadcaster.subscribe(["AAPL"])
+    channels = broadcaster.update_channels(pubsub, channels)
+    assert channels == pubsub.channels == {apple}
+
+
+def test_heartbeat_renews_symbols_of_subscriptions(broadcaster, monkeypatch):
+    renewed = []
+    monkeypatch.setattr(
+        market_data_fetcher, "renew_quote_subscriptions", renewed.append
+    )
+    broadcaster.send_heartbeat()
+    assert renewed == []
+
+    broadcaster.subscribe(["AAPL", "TSLA"])
+    broadcaster.subscribe(["AAPL"])
+    broadcaster.send_heartbeat()
+    assert [sorted(symbols) for symbols in renewed] == [["AAPL", "TSLA"]]
+
+
+def test_new_stream_is_replayed_from_last_snapshot(broadcaster, monkeypatch):
+    monkeypatch.setattr(market_data_subscriber, "_shards", 0, raising=False)
+    messages = [
+        (b"3-0", {"type": "delta", "sequence": 3, "quotes": {"AAPL": 179.0}}),
+        (
+            b"2-0",
+            {"type": "snapshot", "sequence": 2, "quotes": {"AAPL": 178.1, "TSLA": 251}},
+        ),
+        (b"1-0", {"type": "delta", "sequence": 1, "quotes": {"AAPL": 170.0}}),
+    ]
+    replayed = []
+
+    def get_latest_quote_messages(stream, count):
+        replayed.append(stream)
+        return [
+            (entry_id, json.dumps(message).encode()) for entry_id, message in messages
+        ]
+
+    monkeypatch.setattr(
+        market_data_subscriber, "get_latest_quote_messages", get_latest_quote_messages
+    )
+    subscription = broadcaster.subscribe(["AAPL", "TSLA"])
+    broadcaster.update_streams()
+    assert subscription.get(timeout=0) == {"AAPL": 178.1, "TSLA": 251}
+    assert subscription.get(timeout=0) == {"AAPL": 179.0}
+    assert broadcaster.get_gaps_count() == 0
+
+    # A stream which is being read continues from its last read message
+    broadcaster.subscribe(["AAPL"])
+    broadcaster.update_streams()
+    assert replayed == ["market-data-channel"]
@@ -0,0 +1,51 @@
+"""
+This file (test_quote_message.py) contains the unit tests for decoding quote messages.
+
+These tests encode messages the same way as the market-data-fetcher publishes them.
+"""
+
+import json
+import msgpack
+import numpy as np
+import pytest
+import zlib
+from app.components.quote_message import decode_quotes_message
+
+
+def encode(quotes: dict, content_type="msgpack", version=1) -> bytes:
+    payload = msgpack.packb(
+        {
+            "type": "delta",
+            "sequence": 7,
+            "symbols": list(quotes),
+            "prices": np.array(list(quotes.values()), "<f8").tobytes(),
+        }
+    )
+    if content_type == "msgpack+zlib":
+        payload = zlib.compress(payload)
+    return msgpack.packb((version, content_type, payload))
+
+
+@pytest.mark.parametrize("content_type", ["msgpack", "msgpack+zlib"])
+def test_binary_message_is_decoded(content_type):
+    data = encode({"AAPL": 178.1, "TSLA": 251.0}, content_type)
+    assert decode_quotes_message(data) == {
+        "type": "delta",
+        "sequence": 7,
+        "quotes": {"AAPL": 178.1, "TSLA": 251.0},
+    }
+
+
+def test_json_message_is_decoded():
+    message = {"type": "snapshot", "sequence": 1, "quotes": {"AAPL": 178.1}}
+    assert decode_quotes_message(json.dumps(message).encode()) == message
+
+
+def test_unsupported_version_is_rejected():
+    with pytest.raises(ValueError):
+        decode_quotes_message(encode({"AAPL": 178.1}, version=2))
+
+
+def test_unsupported_content_type_is_rejected():
+    with pytest.raises(ValueError):
+        decode_quotes_message(encode({"AAPL": 178.1}, content_type="msgpack+lz4"))
@@ -0,0 +1,167 @@
+"""
+This file (test_returns.py) contains the unit tests for the portfolio returns.
+
+These tests check the XIRR solver and compare vectorized time-weighted returns
+with the ones computed trade by trade.
+"""
+
+import numpy as np
+import pytest
+from app.components.returns import SECONDS_PER_YEAR, compute_returns, solve_xirr
+
+DAY = 24 * 60 * 60
+
+
+def compute_twr_sequentially(times, security_ids, quantities, unit_prices, fees):
+    holdings, prices = {}, {}
+    growth, period_start = 1.0, 0.0
+    for _, security_id, quantity, unit_price, fee in zip(
+        times, security_ids, quantities, unit_prices, fees
+    ):
+        prices[security_id] = unit_price
+        value = sum(holdings[key] * prices[key] for key in holdings)
+        if period_start > 0:
+            growth *= (value if quantity > 0 else value - fee) / period_start
+        if quantity < 0:
+            quantity = -min(-quantity, holdings.get(security_id, 0.0))
+        holdings[security_id] = holdings.get(security_id, 0.0) + quantity
+        period_start = value + quantity * unit_price + (fee if quantity > 0 else 0)
+    value = sum(holdings[key] * prices[key] for key in holdings)
+    return growth * value / period_start - 1
+
+
+def test_xirr_of_single_investment():
+    assert solve_xirr(np.array([-100.0, 110.0]), np.array([0.0, 1.0])) == (
+        pytest.approx(0.1)
+    )
+    assert solve_xirr(np.array([-100.0, 81.0]), np.array([0.0, 2.0])) == (
+        pytest.approx(-0.1)
+    )
+
+
+def test_xirr_without_solution():
+    assert solve_xirr(np.array([-100.0, -10.0]), np.array([0.0, 1.0])) is None
+    assert solve_xirr(np.array([0.0, 0.0]), np.array([0.0, 1.0])) is None
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_xirr_zeroes_net_present_value(seed):
+    random = np.random.default_rng(seed)
+    count = 10000
+    years = np.sort(random.uniform(0, 10, count))
+    years[0] = 0.0
+    amounts = -random.uniform(1, 100, count)
+    amounts[-1] = -amounts[:-1].sum() * random.uniform(0.5, 3)
+
+    rate = solve_xirr(amounts, years)
+    assert rate is not None
+    npv = (amounts / (1 + rate) ** years).sum()
+    assert npv == pytest.approx(0, abs=1e-6 * np.abs(amounts).sum())
+
+
+def test_twr_ignores_cash_flows():
+    times = np.array([0.0, 1.0, 2.0]) * DAY
+    returns = compute_returns(
+        times,
+        np.array([1, 1, 1]),
+        np.array([10.0, 90.0, -100.0]),
+        np.array([100.0, 110.0, 121.0]),
+        np.zeros(3),
+    )
+    assert returns["twr"] == pytest.approx(1.1 * 1.1 - 1)
+    assert returns["start_value"] == 0.0
+    assert returns["end_value"] == pytest.approx(0.0)
+    assert returns["net_cash_flow"] == pytest.approx(1000 + 9900 - 12100)
+
+
+def test_period_inside_trades():
+    times = np.array([0.0, 365.0, 730.0]) * DAY
+    returns = compute_returns(
+        times,
+        np.array([1, 2, 1]),
+        np.array([10.0, 5.0, 10.0]),
+        np.array([100.0, 50.0, 110.0]),
+        np.zeros(3),
+        start=100.0 * DAY,
+        end=800.0 * DAY,
+    )
+    # The period starts after the first trade and ends after the third one.
+    # The first security gains 10% on 1000 of 1250 invested
+    assert returns["start_value"] == pytest.approx(1000.0)
+    assert returns["end_value"] == pytest.approx(20 * 110.0 + 5 * 50.0)
+    assert returns["net_cash_flow"] == pytest.approx(250.0 + 1100.0)
+    assert returns["twr"] == pytest.approx(0.08)
+
+
+def test_end_prices():
+    times = np.array([0.0, SECONDS_PER_YEAR / 2])
+    returns = compute_returns(
+        times,
+        np.array([1, 2]),
+        np.array([10.0, 10.0]),
+        np.array([100.0, 10.0]),
+        np.zeros(2),
+        end=SECONDS_PER_YEAR,
+        end_prices={1: 121.0},
+    )
+    assert returns["end_value"] == pytest.approx(1210.0 + 100.0)
+    # The gain of the first security is known only at the end
+    assert returns["twr"] == pytest.approx(1310.0 / 1100.0 - 1)
+    # 1000 invested for a year and 100 for half a year grow to 1310
+    rate = returns["xirr"]
+    assert 1000 * (1 + rate) + 100 * (1 + rate) ** 0.5 == pytest.approx(1310.0)
+
+
+def test_oversell_closes_position():
+    times = np.array([0.0, 1.0, 2.0]) * DAY
+    security_ids = np.array([1, 1, 1])
+    quantities = np.array([10.0, -15.0, 4.0])
+    unit_prices = np.array([100.0, 120.0, 110.0])
+    returns = compute_returns(times, security_ids, quantities, unit_prices, np.zeros(3))
+    # Only the 10 held units are sold, the buy after opens a new position
+    assert returns["end_value"] == pytest.approx(4 * 110.0)
+    assert returns["net_cash_flow"] == pytest.approx(1000 - 1200 + 440)
+    assert returns["twr"] == pytest.approx(0.2)
+
+    returns = compute_returns(
+        times,
+        security_ids,
+        quantities,
+        unit_prices,
+        np.zeros(3),
+        end=3 * DAY,
+        end_prices={1: 120.0},
+    )
+    assert returns["end_value"] == pytest.approx(4 * 120.0)
+
+
+def test_no_trades():
+    empty = np.empty(0)
+    returns = compute_returns(empty, empty.astype(np.int64), empty, empty, empty)
+    assert returns["twr"] is None
+    assert returns["xirr"] is None
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_trades(seed):
+    random = np.random.default_rng(seed)
+    count = 1000
+    times = np.sort(random.uniform(0, 5 * SECONDS_PER_YEAR, count))
+    security_ids = random.integers(1, 10, count)
+    quantities = np.round(random.uniform(1, 100, count), 2)
+    positions = {}
+    for i, security_id in enumerate(security_ids):
+        position = positions.get(security_id, 0.0)
+        # Sell a part, the whole or more than the whole of a position
+        if position > 0 and random.random() < 0.4:
+            quantities[i] = -min(quantities[i], position * random.choice((0.5, 1, 2)))
+        positions[security_id] = max(round(position + quantities[i], 2), 0.0)
+    unit_prices = np.round(random.uniform(50, 150, count), 2)
+    fees = np.round(random.uniform(0, 5, count), 2)
+
+    returns = compute_returns(times, security_ids, quantities, unit_prices, fees)
+    expected = compute_twr_sequentially(
+        times, security_ids, quantities, unit_prices, fees
+    )
+    assert returns["twr"] == pytest.approx(expected, rel=1e-9)
+    assert returns["xirr"] is not None
@@ -0,0 +1,54 @@
+"""
+This file (test_security_search_index.py) contains the unit tests for the securities search index.
+
+These tests check matching and ranking of securities by a search query.
+"""
+
+from types import SimpleNamespace
+from app.components.security_search_index import SecuritySearchIndex
+
+securities = [
+    SimpleNamespace(symbol="AAPL", name="Apple Inc."),
+    SimpleNamespace(symbol="AA", name="Alcoa Corporation"),
+    SimpleNamespace(symbol="PAAS", name="Pan American Silver Corp."),
+    SimpleNamespace(symbol="APLE", name="Apple Hospitality REIT, Inc."),
+    SimpleNamespace(symbol="MSFT", name="Microsoft Corporation"),
+    SimpleNamespace(symbol="SNAP", name="Snap Inc."),
+]
+
+
+def search_symbols(query, limit=50):
+    index = SecuritySearchIndex(securities)
+    return [security.symbol for security in index.search(query, limit)]
+
+
+def test_empty_query():
+    assert search_symbols("") == []
+    assert search_symbols("   ") == []
+
+
+def test_no_matches():
+    assert search_symbols("xyz") == []
+
+
+def test_ranking():
+    # Exact symbol, symbol prefix, name prefix, symbol substring, name substring
+    assert search_symbols("aa") == ["AA", "AAPL", "PAAS"]
+    assert search_symbols("ap") == ["APLE", "AAPL", "SNAP"]
+    assert search_symbols("apple") == ["AAPL", "APLE"]
+
+
+def test_case_insensitive_search():
+    assert search_symbols("MICRO") == ["MSFT"]
+    assert search_symbols("corp") == ["AA", "MSFT", "PAAS"]
+
+
+def test_substring_search():
+    assert search_symbols("ilve") == ["PAAS"]
+    assert search_symbols("rosof") == ["MSFT"]
+    assert search_symbols("sft") == ["MSFT"]
+
+
+def test_search_limit():
+    assert search_symbols("a", limit=2) == ["AA", "AAPL"]
+    assert search_symbols("a", limit=0) == []
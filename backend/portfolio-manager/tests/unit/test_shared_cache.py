@@ -0,0 +1,141 @@
+"""
+This file (test_shared_cache.py) contains the unit tests for the shared cache.
+
+These tests run the cache over an in-memory stand-in for Redis.
+"""
+
+import pytest
+import redis as redis_module
+import time
+from app.components import shared_cache as shared_cache_module
+from app.components.shared_cache import SharedCache
+from flask import Flask
+
+
+class InMemoryRedis:
+    def __init__(self):
+        self.values = {}
+        # Commands which fail as if Redis were unavailable
+        self.failing_commands = set()
+
+    def get(self, name):
+        self.__check("get")
+        return self.values.get(name)
+
+    def set(self, name, value, ex=None, px=None, nx=False):
+        self.__check("set nx" if nx else "set")
+        if nx and name in self.values:
+            return None
+        self.values[name] = value
+        return True
+
+    def register_script(self, script):
+        def release_lock(keys, args):
+            if self.values.get(keys[0]) == args[0]:
+                del self.values[keys[0]]
+
+        return release_lock
+
+    def __check(self, command):
+        if command in self.failing_commands:
+            raise redis_module.ConnectionError("Connection refused")
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = InMemoryRedis()
+    monkeypatch.setattr(shared_cache_module.redis, "from_url", lambda *_, **__: redis)
+    return redis
+
+
+@pytest.fixture
+def cache(redis):
+    app = Flask(__name__)
+    app.config.update(
+        REDIS_URL="redis://localhost",
+        SHARED_CACHE_LOCK_TIMEOUT_SEC=0.2,
+        SHARED_CACHE_POLL_INTERVAL_SEC=0.01,
+    )
+    cache = SharedCache()
+    cache.init_app(app)
+    with app.app_context():
+        yield cache
+
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"rate": self.calls}
+
+
+def test_fresh_value_is_loaded_once(cache):
+    load = Loader()
+    assert cache.get("key", load, ttl=60, stale_ttl=60) == {"rate": 1}
+    assert cache.get("key", load, ttl=60, stale_ttl=60) == {"rate": 1}
+    assert load.calls == 1
+
+
+def test_stale_value_is_served_while_refreshed(cache, redis):
+    load = Loader()
+    cache.get("key", load, ttl=0.01, stale_ttl=60)
+    time.sleep(0.02)
+    # The stale value is returned at once and refreshed in the background
+    assert cache.get("key", load, ttl=0.01, stale_ttl=60) == {"rate": 1}
+    deadline = time.monotonic() + 1
+    while "key:lock" in redis.values and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert load.calls == 2
+    assert cache.get("key", load, ttl=60, stale_ttl=60) == {"rate": 2}
+
+
+def test_stale_value_is_refreshed_by_lock_holder_only(cache, redis):
+    load = Loader()
+    cache.get("key", load, ttl=0.01, stale_ttl=60)
+    time.sleep(0.02)
+    redis.set("key:lock", "other worker")
+    assert cache.get("key", load, ttl=0.01, stale_ttl=60) == {"rate": 1}
+    time.sleep(0.02)
+    assert load.calls == 1
+
+
+def test_missing_value_is_waited_for(cache, redis):
+    load = Loader()
+    redis.set("key:lock", "other worker")
+    # The lock holder never stores the value, so it's loaded after the timeout
+    assert cache.get("key", load, ttl=60, stale_ttl=60) == {"rate": 1}
+    assert load.calls == 1
+
+
+@pytest.mark.parametrize("failing_commands", [{"get"}, {"set nx"}, {"set"}])
+def test_redis_outage_degrades_to_load(cache, redis, failing_commands):
+    load = Loader()
+    redis.failing_commands = failing_commands
+    assert cache.get("key", load, ttl=60, stale_ttl=60) == {"rate": 1}
+    assert load.calls == 1
+
+
+def test_polling_failure_degrades_to_load(cache, redis, monkeypatch):
+    load = Loader()
+    redis.set("key:lock", "other worker")
+    get = redis.get
+
+    def get_once(name):
+        # Redis becomes unavailable while the value is waited for
+        redis.failing_commands = {"get"}
+        return get(name)
+
+    monkeypatch.setattr(redis, "get", get_once)
+    assert cache.get("key", load, ttl=60, stale_ttl=60) == {"rate": 1}
+    assert load.calls == 1
+
+
+def test_stale_value_is_served_when_refresh_cannot_be_locked(cache, redis):
+    load = Loader()
+    cache.get("key", load, ttl=0.01, stale_ttl=60)
+    time.sleep(0.02)
+    redis.failing_commands = {"set nx"}
+    assert cache.get("key", load, ttl=0.01, stale_ttl=60) == {"rate": 1}
+    assert load.calls == 1
@@ -0,0 +1,123 @@
+"""
+This file (test_valuation.py) contains the unit tests for the portfolio valuation.
+
+These tests compare vectorized positions with the ones computed trade by trade
+and with the ones maintained incrementally.
+"""
+
+import numpy as np
+import pytest
+from app.components.valuation import apply_trade, compute_positions
+
+
+def compute_positions_sequentially(security_ids, quantities, unit_prices, fees):
+    positions = {}
+    for security_id, quantity, unit_price, fee in zip(
+        security_ids, quantities, unit_prices, fees
+    ):
+        position = positions.setdefault(security_id, [0.0, 0.0, 0.0])
+        if quantity > 0:
+            position[0] += quantity
+            position[1] += quantity * unit_price + fee
+            continue
+        sold = min(-quantity, position[0])
+        sold_cost = position[1] * sold / position[0] if position[0] else 0.0
+        position[2] += sold * unit_price - fee - sold_cost
+        position[0] -= sold
+        position[1] -= sold_cost
+    return {security_id: positions[security_id] for security_id in sorted(positions)}
+
+
+def test_no_trades():
+    columns = compute_positions(*(np.empty(0),) * 4)
+    assert all(len(column) == 0 for column in columns.values())
+
+
+def test_average_cost():
+    columns = compute_positions(
+        np.array([1, 2, 1, 1, 1]),
+        np.array([10.0, 5.0, 10.0, -5.0, -15.0]),
+        np.array([100.0, 50.0, 110.0, 120.0, 90.0]),
+        np.array([1.0, 0.0, 1.0, 1.0, 1.0]),
+    )
+    assert columns["security_id"].tolist() == [1, 2]
+    assert columns["quantity"].tolist() == [0.0, 5.0]
+    assert columns["cost_basis"].tolist() == pytest.approx([0.0, 250.0])
+    # Average cost is (1000 + 1 + 1100 + 1) / 20 = 105.1
+    assert columns["realized_pnl"].tolist() == pytest.approx(
+        [(600 - 1 - 525.5) + (1350 - 1 - 1576.5), 0.0]
+    )
+
+
+def test_oversell_closes_position():
+    columns = compute_positions(
+        np.array([1, 1, 1, 1]),
+        np.array([10.0, -15.0, 4.0, -1.0]),
+        np.array([100.0, 120.0, 110.0, 130.0]),
+        np.array([0.0, 1.0, 0.0, 0.0]),
+    )
+    # The buy after the oversell opens a new position of its own quantity
+    assert columns["quantity"].tolist() == [3.0]
+    assert columns["cost_basis"].tolist() == pytest.approx([330.0])
+    # Only the 10 held units of the oversell are realized
+    assert columns["realized_pnl"].tolist() == pytest.approx(
+        [(1200 - 1 - 1000) + (130 - 110)]
+    )
+    position = (0.0, 0.0, 0.0)
+    for trade in ((10.0, 100.0, 0.0), (-15.0, 120.0, 1.0), (4.0, 110.0, 0.0)):
+        position = apply_trade(position, *trade)
+    assert position == pytest.approx((4.0, 440.0, 199.0))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_trades(seed):
+    random = np.random.default_rng(seed)
+    count = 2000
+    security_ids = random.integers(1, 20, count)
+    quantities = np.round(random.uniform(1, 100, count), 2)
+    # Sell a part, the whole or more than the whole of a position
+    positions = {}
+    for i, security_id in enumerate(security_ids):
+        position = positions.get(security_id, 0.0)
+        if position > 0 and random.random() < 0.45:
+            quantities[i] = -min(quantities[i], position * random.choice((0.5, 1, 2)))
+        positions[security_id] = max(round(position + quantities[i], 2), 0.0)
+    unit_prices = np.round(random.uniform(10, 200, count), 2)
+    fees = np.round(random.uniform(0, 5, count), 2)
+
+    columns = compute_positions(security_ids, quantities, unit_prices, fees)
+    expected = compute_positions_sequentially(
+        security_ids, quantities, unit_prices, fees
+    )
+    assert columns["security_id"].tolist() == list(expected)
+    for i, (quantity, cost_basis, realized_pnl) in enumerate(expected.values()):
+        assert columns["quantity"][i] == pytest.approx(quantity, abs=1e-6)
+        assert columns["cost_basis"][i] == pytest.approx(cost_basis, abs=1e-6)
+        assert columns["realized_pnl"][i] == pytest.approx(realized_pnl, abs=1e-6)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_positions(seed):
+    random = np.random.default_rng(seed)
+    count = 500
+    security_ids = random.integers(1, 5, count)
+    # Oversold positions are closed in the same way by both methods
+    quantities = np.round(random.uniform(-100, 100, count), 2)
+    unit_prices = np.round(random.uniform(10, 200, count), 2)
+    fees = np.round(random.uniform(0, 5, count), 2)
+
+    positions = {}
+    for security_id, quantity, unit_price, fee in zip(
+        security_ids.tolist(), quantities.tolist(), unit_prices.tolist(), fees.tolist()
+    ):
+        positions[security_id] = apply_trade(
+            positions.get(security_id, (0.0, 0.0, 0.0)), quantity, unit_price, fee
+        )
+
+    columns = compute_positions(security_ids, quantities, unit_prices, fees)
+    assert columns["security_id"].tolist() == sorted(positions)
+    for i, security_id in enumerate(sorted(positions)):
+        quantity, cost_basis, realized_pnl = positions[security_id]
+        assert columns["quantity"][i] == pytest.approx(quantity, abs=1e-6)
+        assert columns["cost_basis"][i] == pytest.approx(cost_basis, abs=1e-6)
+        assert columns["realized_pnl"][i] == pytest.approx(realized_pnl, abs=1e-6)